@@ -1,3 +1,149 @@
-from django.contrib import admin
+import os
+from datetime import datetime
 
-# Register your models here.
+from django.apps import apps
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.html import format_html
+from django.utils.text import get_valid_filename
+
+from apps.core.imports import INPUT_FORMATS, enqueue_import_job
+from apps.core.models import ImportJob, OutboxEmail
+
+
+class BackgroundImportAdminMixin:
+    """
+    Mixin para ImportExportModelAdmin: la vista de importación sólo guarda el
+    archivo y crea un ImportJob que se procesa en segundo plano (ver
+    apps.core.imports). El resource_class debe heredar de BulkImportResource.
+    """
+    import_template_name = 'admin/core/importjob/upload.html'
+
+    def import_action(self, request, **kwargs):
+        if not self.has_import_permission(request):
+            raise PermissionDenied
+
+        resource_class = self.get_import_resource_classes(request)[0]
+        if request.method == 'POST' and request.FILES.get('file'):
+            upload = request.FILES['file']
+            input_format = request.POST.get('input_format')
+            if input_format not in INPUT_FORMATS:
+                messages.error(request, 'Formato no soportado.')
+                return redirect(f'admin:{self.opts.app_label}_{self.opts.model_name}_import')
+
+            job = ImportJob(
+                resource=f'{resource_class.__module__}.{resource_class.__qualname__}',
+                model_label=self.model._meta.label,
+                input_format=input_format,
+                dry_run=bool(request.POST.get('dry_run')),
+                user_creation=request.user,
+            )
+            job.file.save(get_valid_filename(upload.name), upload, save=False)
+            job.save()
+            enqueue_import_job(job)
+            messages.success(request, 'Importación en cola; el progreso se actualiza en esta página.')
+            return redirect('admin:core_importjob_change', job.pk)
+
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title=f'Importar {self.model._meta.verbose_name_plural}',
+            formats=list(INPUT_FORMATS),
+            fields=[field.column_name for field in resource_class().get_import_fields()],
+            jobs=ImportJob.objects.filter(model_label=self.model._meta.label)[:10],
+        )
+        return TemplateResponse(request, self.import_template_name, context)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    search_fields = ('id', 'model_label', 'file')
+    list_display = ('id', 'model_label', 'dry_run', 'status', 'progress_display', 'new_rows', 'updated_rows', 'error_rows', 'user_creation', 'date_creation')
+    list_filter = ['status', 'dry_run', 'model_label']
+    readonly_fields = [field.name for field in ImportJob._meta.fields]
+    change_form_template = 'admin/core/importjob/change_form.html'
+
+    @admin.display(description='Progreso')
+    def progress_display(self, obj):
+        return format_html('{} / {} ({}%)', obj.processed_rows, obj.total_rows, obj.progress)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        urls = [
+            path('<int:pk>/confirm/', self.admin_site.admin_view(self.confirm_view), name='core_importjob_confirm'),
+            path('<int:pk>/report/<slug:kind>/', self.admin_site.admin_view(self.report_view), name='core_importjob_report'),
+        ]
+        return urls + super().get_urls()
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        job = self.get_object(request, object_id)
+        extra_context = dict(extra_context or {})
+        if job is not None:
+            extra_context.update(
+                job=job,
+                can_confirm=job.dry_run and job.status == ImportJob.DONE and self._can_import(request, job),
+            )
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    @staticmethod
+    def _can_import(request, job):
+        model = apps.get_model(job.model_label)
+        opts = model._meta
+        return (
+            request.user.has_perm(f'{opts.app_label}.add_{opts.model_name}')
+            and request.user.has_perm(f'{opts.app_label}.change_{opts.model_name}')
+        )
+
+    def confirm_view(self, request, pk):
+        """Ejecuta de verdad una simulación terminada, con el mismo archivo."""
+        job = get_object_or_404(ImportJob, pk=pk, dry_run=True, status=ImportJob.DONE)
+        if request.method != 'POST' or not self._can_import(request, job):
+            raise PermissionDenied
+        new_job = ImportJob.objects.create(
+            resource=job.resource,
+            model_label=job.model_label,
+            file=job.file.name,
+            input_format=job.input_format,
+            dry_run=False,
+            user_creation=request.user,
+        )
+        enqueue_import_job(new_job)
+        messages.success(request, f'Importación #{new_job.pk} en cola.')
+        return redirect('admin:core_importjob_change', new_job.pk)
+
+    def report_view(self, request, pk, kind):
+        job = get_object_or_404(ImportJob, pk=pk)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        report = {'errores': job.error_report, 'cambios': job.diff_report}.get(kind)
+        if not report:
+            raise Http404
+        return FileResponse(report.open('rb'), as_attachment=True, filename=os.path.basename(report.name))
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    search_fields = ('id', 'email_to', 'subject')
+    list_display = ('id', 'email_to', 'subject', 'status', 'attempts', 'next_attempt', 'date_creation', 'date_sent')
+    list_filter = ['status']
+    readonly_fields = [field.name for field in OutboxEmail._meta.fields]
+    actions = ['retry_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reintentar envío')
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEmail.SENT).update(
+            status=OutboxEmail.PENDING, attempts=0, next_attempt=datetime.now()
+        )
+        messages.success(request, f'{updated} correos en cola.')
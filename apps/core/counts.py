@@ -0,0 +1,147 @@
+# standard library
+from collections import Counter
+
+# Django
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, F, signals
+
+# local Django
+from apps.core.models import ListCount
+
+
+"""
+    Conteos de los listados paginados (PQRs, órdenes) sin COUNT(*) por petición.
+
+    Cada modelo registrado con track_list_counts lleva en ListCount la cantidad de
+    filas por estado (y área si la tiene). Las señales de guardado y borrado suman o
+    restan sobre la fila del conteo dentro de la misma transacción; una clave que
+    aún no existe se cuenta de verdad la primera vez que se lee. Las escrituras
+    masivas (bulk_create, update) no disparan señales: quien las hace debe llamar a
+    apply_list_count_changes con las filas que salen y entran, o a
+    rebuild_list_counts, y el comando rebuild_list_counts corrige cualquier deriva.
+
+    En PostgreSQL cada escritura toma un candado consultivo compartido por modelo y
+    el conteo inicial de una clave (o la reconstrucción) uno exclusivo: el COUNT(*)
+    espera a las transacciones que ya están sumando y las que llegan después
+    esperan a que la fila exista, así ningún _add se pierde entre ambos.
+"""
+
+
+# model_label -> attname del área (None si el modelo no tiene área)
+_tracked = {}
+# Espacio de los candados consultivos (PostgreSQL) de los conteos, uno por modelo
+LIST_COUNT_LOCK = 0x4c495354
+
+
+def _key(model, status, area_id):
+    return {'model_label': model._meta.label, 'status': status, 'area_id': area_id or 0}
+
+
+def _row(sender, instance):
+    area_field = _tracked[sender._meta.label]
+    return instance.status, getattr(instance, area_field) if area_field else None
+
+
+def _lock(model, shared):
+    """Candado de transacción sobre los conteos de `model`: compartido al sumar, exclusivo al contar."""
+    if connection.vendor != 'postgresql' or not connection.in_atomic_block:
+        return
+    function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {function}(%s, hashtext(%s))', [LIST_COUNT_LOCK, model._meta.label])
+
+
+def _add(sender, values, delta):
+    _lock(sender, shared=True)
+    ListCount.objects.filter(**_key(sender, *values)).update(count=F('count') + delta)
+
+
+def _remember_previous(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        instance._list_count_previous = None
+        return
+    area_field = _tracked[sender._meta.label]
+    fields = ['status', area_field] if area_field else ['status']
+    previous = sender._default_manager.filter(pk=instance.pk).values_list(*fields).first()
+    if previous is not None and not area_field:
+        previous = (previous[0], None)
+    instance._list_count_previous = previous
+
+
+def _count_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_list_count_previous', None)
+    current = _row(sender, instance)
+    if previous == current:
+        return
+    if previous is not None:
+        _add(sender, previous, -1)
+    _add(sender, current, 1)
+
+
+def _count_deleted(sender, instance, **kwargs):
+    _add(sender, _row(sender, instance), -1)
+
+
+def track_list_counts(model, area_field=None):
+    """Mantiene ListCount de `model` por status y, si se indica, por `area_field` (attname)."""
+    _tracked[model._meta.label] = area_field
+    uid = f'list_counts_{model._meta.label_lower}'
+    signals.pre_save.connect(_remember_previous, sender=model, dispatch_uid=uid)
+    signals.post_save.connect(_count_saved, sender=model, dispatch_uid=uid)
+    signals.post_delete.connect(_count_deleted, sender=model, dispatch_uid=uid)
+
+
+def apply_list_count_changes(model, removed=(), added=()):
+    """Ajusta los conteos de `model` por instancias que salen y entran sin señales (una escritura por clave)."""
+    if model._meta.label not in _tracked:
+        return
+    deltas = Counter(_row(model, instance) for instance in added)
+    deltas.subtract(Counter(_row(model, instance) for instance in removed))
+    for values, delta in deltas.items():
+        if delta:
+            _add(model, values, delta)
+
+
+def list_count(model, status, area_id=None):
+    """Cantidad de filas de `model` en `status` (y área); cuenta de verdad si la clave no existe."""
+    key = _key(model, status, area_id)
+    count = ListCount.objects.filter(**key).values_list('count', flat=True).first()
+    if count is not None:
+        return count
+
+    area_field = _tracked.get(model._meta.label)
+    filters = {'status': status}
+    if area_field:
+        filters[area_field] = area_id
+    with transaction.atomic():
+        # Con el candado ninguna escritura está a medias: otra petición pudo crear la fila
+        _lock(model, shared=False)
+        count = ListCount.objects.filter(**key).values_list('count', flat=True).first()
+        if count is not None:
+            return count
+        count = model._default_manager.filter(**filters).count()
+        ListCount.objects.bulk_create([ListCount(count=count, **key)], ignore_conflicts=True)
+    return count
+
+
+def rebuild_list_counts(*models):
+    """Recalcula los conteos de los modelos indicados (todos los registrados si no se indica ninguno)."""
+    labels = [model._meta.label for model in models] or list(_tracked)
+    rebuilt = 0
+    for label in labels:
+        model = apps.get_model(label)
+        area_field = _tracked[label]
+        fields = ['status', area_field] if area_field else ['status']
+        with transaction.atomic():
+            _lock(model, shared=False)
+            rows = [
+                ListCount(count=row['total'], **_key(model, row['status'], row.get(area_field) if area_field else None))
+                for row in model._default_manager.order_by().values(*fields).annotate(total=Count('pk'))
+            ]
+            ListCount.objects.filter(model_label=label).delete()
+            ListCount.objects.bulk_create(rows)
+        rebuilt += len(rows)
+    return rebuilt
@@ -0,0 +1,411 @@
+# standard library
+import csv
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from datetime import datetime, timedelta
+
+# Django
+from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import connection, connections, transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from django.utils.module_loading import import_string
+
+# third-party
+import tablib
+from import_export import resources
+from import_export.formats import base_formats
+from import_export.instance_loaders import CachedInstanceLoader
+from import_export.results import RowResult
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.utils import get_history_manager_for_model
+
+# local Django
+from apps.core.models import ImportJob
+
+
+"""
+    Importaciones del admin en segundo plano.
+
+    El admin sólo guarda el archivo y crea un ImportJob; el procesamiento ocurre
+    en el comando run_import_jobs (o, con IMPORT_JOBS_IN_PROCESS, en un hilo del
+    proceso web). Un trabajo en Procesando renueva date_updated tras cada bloque;
+    si pasa IMPORT_JOB_LEASE_SECONDS sin hacerlo, el proceso que lo tenía murió:
+    una simulación vuelve a la cola y una importación real queda Fallida con las
+    filas ya confirmadas (reintentarla a ciegas duplicaría filas nuevas).
+    El archivo se divide en bloques de IMPORT_JOB_CHUNK_SIZE
+    filas: la simulación evalúa los bloques en paralelo (cada bloque en su propia
+    transacción que se revierte) y la importación real los confirma uno a uno con
+    bulk_create/bulk_update, actualizando el progreso del trabajo tras cada bloque.
+"""
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = getattr(settings, "IMPORT_JOB_CHUNK_SIZE", 1000)
+WORKERS = getattr(settings, "IMPORT_JOB_WORKERS", 4)
+IN_PROCESS = getattr(settings, "IMPORT_JOBS_IN_PROCESS", False)
+LEASE_SECONDS = getattr(settings, "IMPORT_JOB_LEASE_SECONDS", 900)
+POLL_SECONDS = 5
+
+INPUT_FORMATS = {
+    fmt.__name__: fmt
+    for fmt in (base_formats.CSV, base_formats.XLSX, base_formats.XLS, base_formats.TSV, base_formats.JSON)
+    if fmt().is_available()
+}
+
+IMPORT_TYPE_LABELS = {
+    RowResult.IMPORT_TYPE_NEW: "Nueva",
+    RowResult.IMPORT_TYPE_UPDATE: "Actualización",
+    RowResult.IMPORT_TYPE_SKIP: "Omitida",
+    RowResult.IMPORT_TYPE_INVALID: "Inválida",
+    RowResult.IMPORT_TYPE_ERROR: "Error",
+}
+
+REPORTS_DIR = "imports/reports"
+
+
+class BulkImportResource(resources.ModelResource):
+    """
+    ModelResource que guarda por lotes (bulk_create/bulk_update) en lugar de llamar
+    save() fila por fila. Como el save() de los modelos no se ejecuta, asigna aquí
+    el usuario (user_creation/user_updated) y la fecha de actualización, y escribe
+    el historial de cada lote con bulk_history_create.
+
+    Las señales post_save tampoco se disparan: los recursos que dependan de ellas
+    deben sobrescribir after_bulk_save/after_job.
+    """
+
+    class Meta:
+        use_bulk = True
+        batch_size = CHUNK_SIZE
+        instance_loader_class = CachedInstanceLoader
+
+    def __init__(self, user=None, diff=False, **kwargs):
+        super().__init__(**kwargs)
+        self.user = user
+        self.dry_run = False
+        if diff:
+            # Conservar original e instancia de cada fila para el reporte de cambios
+            self._meta = copy(self._meta)
+            self._meta.skip_diff = False
+            self._meta.skip_html_diff = True
+            self._meta.store_instance = True
+            self._meta.report_skipped = True
+
+    def import_data(self, dataset, dry_run=False, **kwargs):
+        # prepare_instance lo consulta para no consumir nada fuera de la transacción
+        # que la simulación revierte (p.ej. radicados)
+        self.dry_run = dry_run
+        return super().import_data(dataset, dry_run=dry_run, **kwargs)
+
+    def prepare_instance(self, instance):
+        """Ajustes que el save() del modelo haría antes de guardar (self.dry_run en simulaciones)."""
+
+    def before_save_instance(self, instance, row, **kwargs):
+        if self.user is not None:
+            setattr(instance, "user_creation" if instance._state.adding else "user_updated", self.user)
+        if not instance._state.adding:
+            # bulk_update no aplica auto_now
+            instance.date_updated = datetime.now()
+        self.prepare_instance(instance)
+
+    def bulk_create(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        instances = list(self.create_instances)
+        errors = len(result.base_errors) if result is not None else 0
+        super().bulk_create(using_transactions, dry_run, raise_errors, batch_size=batch_size, result=result)
+        if instances and not dry_run and (result is None or len(result.base_errors) == errors):
+            self.after_bulk_save(instances, created=True)
+
+    def bulk_update(self, using_transactions, dry_run, raise_errors, batch_size=None, result=None):
+        instances = list(self.update_instances)
+        errors = len(result.base_errors) if result is not None else 0
+        super().bulk_update(using_transactions, dry_run, raise_errors, batch_size=batch_size, result=result)
+        if instances and not dry_run and (result is None or len(result.base_errors) == errors):
+            self.after_bulk_save(instances, created=False)
+
+    def after_bulk_save(self, instances, created):
+        """Historial del lote recién guardado (dentro de la transacción del bloque)."""
+        try:
+            manager = get_history_manager_for_model(self._meta.model)
+        except NotHistoricalModelError:
+            return
+        manager.bulk_history_create(
+            instances,
+            batch_size=self._meta.batch_size,
+            update=not created,
+            default_user=self.user,
+            default_change_reason="Importación masiva",
+        )
+
+    def after_job(self):
+        """Se llama una vez confirmados todos los bloques de una importación real."""
+
+
+def read_dataset(job):
+    """Carga el archivo del trabajo como tablib.Dataset según su formato."""
+    input_format = INPUT_FORMATS[job.input_format]()
+    with job.file.open("rb") as f:
+        data = f.read()
+    if not input_format.is_binary():
+        data = data.decode("utf-8-sig")
+    return input_format.create_dataset(data)
+
+
+def iter_chunks(dataset, size=CHUNK_SIZE):
+    """(fila inicial, Dataset) por cada bloque de `size` filas."""
+    for start in range(0, dataset.height, size):
+        yield start, tablib.Dataset(*dataset[start:start + size], headers=dataset.headers)
+
+
+def _format_value(value):
+    return "" if value is None else str(value)
+
+
+def _row_changes(resource, row_result):
+    """'campo: antes → después' de los campos que cambian en una actualización."""
+    original, instance = row_result.original, row_result.instance
+    if original is None or instance is None:
+        return ""
+    changes = []
+    for field in resource.get_import_fields():
+        before, after = field.export(original), field.export(instance)
+        if before != after:
+            changes.append(f"{field.column_name}: {_format_value(before)} → {_format_value(after)}")
+    return "; ".join(changes)
+
+
+def _chunk_outcome(resource, result, start, diff):
+    """Resume el resultado de import_data de un bloque con números de fila del archivo."""
+    errors = []
+    for number, row_errors in result.row_errors():
+        for error in row_errors:
+            errors.append((start + number, "Error", str(error.error), list((error.row or {}).values())))
+    for invalid in result.invalid_rows:
+        messages = [
+            f"{field}: {' '.join(map(str, msgs))}" if field != NON_FIELD_ERRORS else " ".join(map(str, msgs))
+            for field, msgs in invalid.error_dict.items()
+        ]
+        errors.append((start + invalid.number, "Inválida", "; ".join(messages), list(invalid.values)))
+    for error in result.base_errors:
+        errors.append(("", "Bloque", f"Filas {start + 1}-{start + result.total_rows}: {error.error}", []))
+
+    changes = []
+    if diff:
+        for number, row_result in enumerate(result.rows, start + 1):
+            if row_result.import_type in (RowResult.IMPORT_TYPE_NEW, RowResult.IMPORT_TYPE_UPDATE):
+                changes.append((
+                    number,
+                    IMPORT_TYPE_LABELS[row_result.import_type],
+                    _format_value(row_result.object_id),
+                    _row_changes(resource, row_result),
+                ))
+
+    return {
+        "start": start,
+        "rows": result.total_rows,
+        "totals": dict(result.totals),
+        "has_errors": result.has_errors(),
+        "errors": errors,
+        "changes": changes,
+    }
+
+
+class ImportJobRunner:
+    """
+    Procesa un ImportJob ya reclamado (estado Procesando). Los trabajos cuyo
+    resource es una subclase de ImportJobRunner se procesan con esa subclase.
+    """
+
+    def __init__(self, job, workers=WORKERS, chunk_size=CHUNK_SIZE):
+        self.job = job
+        self.chunk_size = job.chunk_size or chunk_size
+        # SQLite serializa las escrituras: la simulación en paralelo sólo vale en PostgreSQL
+        self.workers = max(1, workers) if connection.vendor == "postgresql" else 1
+        self.resource_class = import_string(job.resource)
+        self.user = job.user_creation
+        self.counts = {"new_rows": 0, "updated_rows": 0, "skipped_rows": 0, "error_rows": 0, "processed_rows": 0}
+        self.rolled_back = []
+
+    def _simulate_chunk(self, chunk):
+        start, dataset = chunk
+        try:
+            resource = self.resource_class(user=self.user, diff=True)
+            result = resource.import_data(dataset, dry_run=True, use_transactions=True)
+            return _chunk_outcome(resource, result, start, diff=True)
+        finally:
+            if self.workers > 1:
+                # Cada hilo del pool abre sus propias conexiones (también la de radicados)
+                connections.close_all()
+
+    def _import_chunks(self, chunks):
+        # Un único recurso para acumular lo que after_job necesita de todos los bloques
+        resource = self.resource_class(user=self.user)
+        for start, dataset in chunks:
+            result = resource.import_data(dataset, dry_run=False, use_transactions=True)
+            yield _chunk_outcome(resource, result, start, diff=False)
+        resource.after_job()
+
+    def _update(self, outcome):
+        totals = outcome["totals"]
+        if outcome["has_errors"] and not self.job.dry_run:
+            # import_data revierte el bloque completo si alguna fila falla
+            self.rolled_back.append(f"{outcome['start'] + 1}-{outcome['start'] + outcome['rows']}")
+        else:
+            self.counts["new_rows"] += totals.get(RowResult.IMPORT_TYPE_NEW, 0)
+            self.counts["updated_rows"] += totals.get(RowResult.IMPORT_TYPE_UPDATE, 0)
+            self.counts["skipped_rows"] += totals.get(RowResult.IMPORT_TYPE_SKIP, 0)
+        self.counts["error_rows"] += (
+            totals.get(RowResult.IMPORT_TYPE_ERROR, 0) + totals.get(RowResult.IMPORT_TYPE_INVALID, 0)
+        )
+        self.counts["processed_rows"] += outcome["rows"]
+        # date_updated es el latido del trabajo (ver reclaim_stale_import_jobs)
+        ImportJob.objects.filter(pk=self.job.pk).update(date_updated=datetime.now(), **self.counts)
+
+    def _report_path(self, suffix):
+        name = f"{REPORTS_DIR}/{self.job.pk}_{suffix}.csv"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return name, path
+
+    def run(self):
+        dataset = read_dataset(self.job)
+        ImportJob.objects.filter(pk=self.job.pk).update(total_rows=dataset.height)
+        chunks = iter_chunks(dataset, self.chunk_size)
+
+        error_name, error_path = self._report_path("errores")
+        diff_name, diff_path = self._report_path("cambios")
+        errors = 0
+        with open(error_path, "w", newline="", encoding="utf-8") as error_file:
+            error_writer = csv.writer(error_file)
+            error_writer.writerow(["fila", "tipo", "error"] + list(dataset.headers or []))
+
+            if self.job.dry_run:
+                diff_file = open(diff_path, "w", newline="", encoding="utf-8")
+                diff_writer = csv.writer(diff_file)
+                diff_writer.writerow(["fila", "tipo", "id", "cambios"])
+                executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+                outcomes = executor.map(self._simulate_chunk, chunks) if executor else map(self._simulate_chunk, chunks)
+            else:
+                diff_file = executor = None
+                outcomes = self._import_chunks(chunks)
+
+            try:
+                # map conserva el orden de los bloques aunque se evalúen en paralelo
+                for outcome in outcomes:
+                    for number, kind, message, values in outcome["errors"]:
+                        error_writer.writerow([number, kind, message] + [_format_value(v) for v in values])
+                        errors += 1
+                    if diff_file:
+                        diff_writer.writerows(outcome["changes"])
+                    self._update(outcome)
+            finally:
+                if executor:
+                    executor.shutdown(cancel_futures=True)
+                if diff_file:
+                    diff_file.close()
+
+        message = ""
+        if self.rolled_back:
+            message = f"Bloques revertidos por errores (filas): {', '.join(self.rolled_back)}"
+        ImportJob.objects.filter(pk=self.job.pk).update(
+            status=ImportJob.DONE,
+            error_report=error_name if errors else None,
+            diff_report=diff_name if self.job.dry_run else None,
+            message=message,
+            date_finished=datetime.now(),
+            **self.counts,
+        )
+
+
+def claim_import_job(job_id):
+    """Marca el trabajo como Procesando si sigue en cola; False si otro proceso lo tomó."""
+    now = datetime.now()
+    return bool(
+        ImportJob.objects
+        .filter(pk=job_id, status=ImportJob.QUEUED)
+        .update(status=ImportJob.RUNNING, date_started=now, date_updated=now)
+    )
+
+
+def reclaim_stale_import_jobs():
+    """
+    Trabajos en Procesando sin latido en LEASE_SECONDS (proceso reiniciado o caído):
+    las simulaciones vuelven a la cola y las importaciones reales quedan Fallidas.
+    Devuelve cuántos trabajos se recuperaron.
+    """
+    now = datetime.now()
+    stale = ImportJob.objects.filter(
+        status=ImportJob.RUNNING, date_updated__lt=now - timedelta(seconds=LEASE_SECONDS)
+    )
+    requeued = stale.filter(dry_run=True).update(
+        status=ImportJob.QUEUED, processed_rows=0, new_rows=0, updated_rows=0,
+        skipped_rows=0, error_rows=0, date_started=None, date_updated=now,
+    )
+    failed = stale.filter(dry_run=False).update(
+        status=ImportJob.FAILED, date_finished=now, date_updated=now,
+        message=Concat(
+            Value("Importación interrumpida (proceso detenido). Filas procesadas antes del corte: "),
+            Cast("processed_rows", CharField()),
+            Value(". Revise los datos antes de reintentar."),
+        ),
+    )
+    return requeued + failed
+
+
+def run_import_job(job_id):
+    """Reclama y procesa un trabajo; los fallos quedan registrados en el propio trabajo."""
+    if not claim_import_job(job_id):
+        return False
+    job = ImportJob.objects.select_related("user_creation").get(pk=job_id)
+    try:
+        target = import_string(job.resource)
+        runner_class = target if isinstance(target, type) and issubclass(target, ImportJobRunner) else ImportJobRunner
+        runner_class(job).run()
+    except Exception as e:
+        logger.exception("Importación %s fallida", job_id)
+        ImportJob.objects.filter(pk=job_id).update(
+            status=ImportJob.FAILED, message=str(e), date_finished=datetime.now()
+        )
+    return True
+
+
+def _run_in_thread(job_id):
+    try:
+        run_import_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def enqueue_import_job(job):
+    """
+    Deja el trabajo en cola para run_import_jobs. Con IMPORT_JOBS_IN_PROCESS se
+    procesa en un hilo de este proceso al confirmar la transacción.
+    """
+    if IN_PROCESS:
+        transaction.on_commit(
+            lambda: threading.Thread(target=_run_in_thread, args=(job.pk,), daemon=True).start()
+        )
+    return job
+
+
+def run_pending_import_jobs(once=False):
+    """Procesa los trabajos en cola en orden de llegada (bucle del comando run_import_jobs)."""
+    processed = 0
+    while True:
+        reclaim_stale_import_jobs()
+        job_id = (
+            ImportJob.objects.filter(status=ImportJob.QUEUED)
+            .order_by("id").values_list("id", flat=True).first()
+        )
+        if job_id is None:
+            if once:
+                return processed
+            time.sleep(POLL_SECONDS)
+            continue
+        if run_import_job(job_id):
+            processed += 1
@@ -0,0 +1,177 @@
+# standard library
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Django
+from django.conf import settings
+from django.db import connections, transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+# Resend
+import resend
+from resend import Emails
+
+# local Django
+from apps.core.models import OutboxEmail
+
+
+"""
+    Cola de correos (outbox).
+
+    queue_email renderiza la plantilla y guarda un OutboxEmail en la transacción
+    en curso: si la operación que origina el correo se revierte, el correo no
+    existe, y la petición no espera al proveedor. El comando send_queued_emails
+    (servicio mail_worker) envía en lotes lo pendiente y los reintentos; con
+    MAIL_OUTBOX_IN_PROCESS, además, un hilo del proceso lo envía al confirmar. Cada
+    fallo reprograma el correo con espera exponencial hasta MAIL_OUTBOX_MAX_ATTEMPTS
+    intentos.
+
+    El envío lo hace el transporte de MAIL_TRANSPORT: una clase con send(email) que
+    devuelve el id del proveedor o lanza una excepción. LocmemTransport guarda los
+    correos en memoria para pruebas y desarrollo.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+IN_PROCESS = getattr(settings, "MAIL_OUTBOX_IN_PROCESS", False)
+BATCH_SIZE = getattr(settings, "MAIL_OUTBOX_BATCH_SIZE", 50)
+MAX_ATTEMPTS = getattr(settings, "MAIL_OUTBOX_MAX_ATTEMPTS", 6)
+RETRY_SECONDS = getattr(settings, "MAIL_OUTBOX_RETRY_SECONDS", 60)
+MAX_RETRY_SECONDS = 6 * 3600
+# Plazo de un correo en Enviando antes de que otro proceso lo retome (proceso caído)
+LEASE_SECONDS = 300
+POLL_SECONDS = 5
+
+
+class ResendTransport:
+    """Envío por la API de Resend (RESEND_API_KEY, remitente EMAIL_HOST_USER)."""
+
+    def __init__(self):
+        resend.api_key = settings.RESEND_API_KEY
+        self.sender = settings.EMAIL_HOST_USER
+
+    def send(self, email):
+        response = Emails.send({
+            "from": self.sender,
+            "to": [email.email_to],
+            "subject": email.subject,
+            "html": email.html,
+        })
+        return response.get("id", "") if isinstance(response, dict) else ""
+
+
+class LocmemTransport:
+    """Guarda los correos en LocmemTransport.outbox en lugar de enviarlos."""
+
+    outbox = []
+
+    def send(self, email):
+        LocmemTransport.outbox.append(email)
+        return f"locmem-{email.pk}"
+
+
+_transports = {}
+
+
+def get_transport():
+    path = getattr(settings, "MAIL_TRANSPORT", "apps.core.mail.ResendTransport")
+    if path not in _transports:
+        _transports[path] = import_string(path)()
+    return _transports[path]
+
+
+def queue_email(email_to, subject, template, context):
+    """Deja en cola un correo con la plantilla renderizada; None si no hay destinatario."""
+    if not email_to:
+        return None
+    email = OutboxEmail.objects.create(
+        email_to=email_to,
+        subject=subject,
+        html=render_to_string(template, context),
+        next_attempt=datetime.now(),
+    )
+    if IN_PROCESS:
+        transaction.on_commit(
+            lambda: threading.Thread(target=_send_in_thread, args=(email.pk,), daemon=True).start()
+        )
+    return email
+
+
+def _claim(batch_size, ids=None):
+    """Marca como Enviando los correos vencidos; sólo devuelve los que este proceso tomó."""
+    now = datetime.now()
+    due = OutboxEmail.objects.filter(
+        status__in=(OutboxEmail.PENDING, OutboxEmail.SENDING), next_attempt__lte=now
+    )
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    candidates = list(due.order_by("next_attempt", "id").values_list("id", flat=True)[:batch_size])
+    lease = now + timedelta(seconds=LEASE_SECONDS)
+    return [
+        pk for pk in candidates
+        if due.filter(pk=pk).update(status=OutboxEmail.SENDING, next_attempt=lease)
+    ]
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_SECONDS * 2 ** (attempts - 1), MAX_RETRY_SECONDS))
+
+
+def send_pending(batch_size=BATCH_SIZE, ids=None):
+    """Envía un lote de correos pendientes; devuelve (enviados, fallidos)."""
+    claimed = _claim(batch_size, ids)
+    if not claimed:
+        return 0, 0
+
+    transport = get_transport()
+    sent = failed = 0
+    for email in OutboxEmail.objects.filter(pk__in=claimed).order_by("id"):
+        attempts = email.attempts + 1
+        try:
+            provider_id = transport.send(email)
+        except Exception as e:
+            failed += 1
+            logger.warning("Correo %s no enviado (intento %s): %s", email.pk, attempts, e)
+            exhausted = attempts >= MAX_ATTEMPTS
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                status=OutboxEmail.FAILED if exhausted else OutboxEmail.PENDING,
+                attempts=attempts,
+                next_attempt=datetime.now() + _retry_delay(attempts),
+                last_error=str(e),
+            )
+            continue
+        sent += 1
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            status=OutboxEmail.SENT,
+            attempts=attempts,
+            provider_id=provider_id or "",
+            last_error="",
+            date_sent=datetime.now(),
+        )
+    return sent, failed
+
+
+def _send_in_thread(email_id):
+    try:
+        send_pending(batch_size=1, ids=[email_id])
+    except Exception:
+        logger.exception("Envío del correo %s", email_id)
+    finally:
+        connections.close_all()
+
+
+def run_outbox(once=False, batch_size=BATCH_SIZE):
+    """Envía la cola por lotes (bucle del comando send_queued_emails); devuelve (enviados, fallidos)."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = send_pending(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            if once:
+                return total_sent, total_failed
+            time.sleep(POLL_SECONDS)
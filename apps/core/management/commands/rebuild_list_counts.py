@@ -0,0 +1,18 @@
+# Django
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.core.counts import rebuild_list_counts
+
+
+class Command(BaseCommand):
+    help = "Recalcula los conteos por estado (y área) de los listados de PQRs y órdenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Modelos a recalcular (app.Modelo); por defecto todos")
+
+    def handle(self, *args, **options):
+        models = [apps.get_model(label) for label in options["models"]]
+        rebuilt = rebuild_list_counts(*models)
+        self.stdout.write(self.style.SUCCESS(f"{rebuilt} conteos recalculados."))
@@ -0,0 +1,26 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.core.imports import run_import_job, run_pending_import_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa las importaciones en cola del admin (ImportJob) y recupera las "
+        "interrumpidas; queda escuchando la cola salvo con --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Procesa lo que haya en cola y termina.")
+        parser.add_argument("--job", type=int, help="Procesa sólo el trabajo indicado.")
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            if not run_import_job(options["job"]):
+                self.stdout.write(self.style.WARNING(f"El trabajo {options['job']} no está en cola."))
+                return
+            processed = 1
+        else:
+            processed = run_pending_import_jobs(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Importaciones procesadas: {processed}."))
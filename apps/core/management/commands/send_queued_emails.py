@@ -0,0 +1,21 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.core.mail import BATCH_SIZE, run_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos en cola (OutboxEmail) por lotes, con reintentos. Necesario "
+        "cuando MAIL_OUTBOX_IN_PROCESS=False y para los reintentos; queda escuchando "
+        "la cola salvo con --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Envía lo que haya vencido y termina.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Correos por lote")
+
+    def handle(self, *args, **options):
+        sent, failed = run_outbox(once=options["once"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Correos enviados: {sent}; fallidos: {failed}."))
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Fecha Creación')),
+                ('date_updated', models.DateTimeField(auto_now=True, null=True, verbose_name='Fecha Actualización')),
+                ('resource', models.CharField(max_length=255, verbose_name='Recurso')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='Archivo')),
+                ('input_format', models.CharField(max_length=16, verbose_name='Formato')),
+                ('dry_run', models.BooleanField(default=True, verbose_name='Simulación')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'En cola'), (2, 'Procesando'), (3, 'Terminada'), (4, 'Fallida')], default=1, verbose_name='Estado')),
+                ('total_rows', models.PositiveIntegerField(default=0, verbose_name='Filas')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='Filas procesadas')),
+                ('new_rows', models.PositiveIntegerField(default=0, verbose_name='Nuevas')),
+                ('updated_rows', models.PositiveIntegerField(default=0, verbose_name='Actualizadas')),
+                ('skipped_rows', models.PositiveIntegerField(default=0, verbose_name='Omitidas')),
+                ('error_rows', models.PositiveIntegerField(default=0, verbose_name='Con error')),
+                ('error_report', models.FileField(blank=True, null=True, upload_to='imports/reports/', verbose_name='Reporte de errores')),
+                ('diff_report', models.FileField(blank=True, null=True, upload_to='imports/reports/', verbose_name='Reporte de cambios')),
+                ('message', models.TextField(blank=True, default='', verbose_name='Mensaje')),
+                ('date_started', models.DateTimeField(blank=True, null=True, verbose_name='Fecha inicio')),
+                ('date_finished', models.DateTimeField(blank=True, null=True, verbose_name='Fecha fin')),
+                ('user_creation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(app_label)s_%(class)s_creation', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Creación')),
+                ('user_updated', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='%(app_label)s_%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Usuario Actualización')),
+            ],
+            options={
+                'verbose_name': 'Importación',
+                'verbose_name_plural': 'Importaciones',
+                'db_table': 'IMPORT_JOB',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['status'], name='IMPORT_JOB_status_c827ef_idx')],
+            },
+        ),
+    ]
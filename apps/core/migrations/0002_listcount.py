@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('status', models.SmallIntegerField(verbose_name='Estado')),
+                ('area_id', models.BigIntegerField(default=0, verbose_name='Área')),
+                ('count', models.BigIntegerField(default=0, verbose_name='Cantidad')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Fecha Actualización')),
+            ],
+            options={
+                'verbose_name': 'Conteo de listado',
+                'verbose_name_plural': 'Conteos de listados',
+                'db_table': 'LIST_COUNT',
+                'ordering': ['model_label', 'status', 'area_id'],
+                'constraints': [models.UniqueConstraint(fields=('model_label', 'status', 'area_id'), name='LIST_COUNT_unique_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_listcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email_to', models.CharField(max_length=254, verbose_name='Destinatario')),
+                ('subject', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('html', models.TextField(verbose_name='Contenido')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Pendiente'), (2, 'Enviando'), (3, 'Enviado'), (4, 'Fallido')], default=1, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt', models.DateTimeField(verbose_name='Próximo intento')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último error')),
+                ('provider_id', models.CharField(blank=True, default='', max_length=255, verbose_name='Id en el proveedor')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Fecha Creación')),
+                ('date_sent', models.DateTimeField(blank=True, null=True, verbose_name='Fecha envío')),
+            ],
+            options={
+                'verbose_name': 'Correo en cola',
+                'verbose_name_plural': 'Correos en cola',
+                'db_table': 'EMAIL_OUTBOX',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt'], name='EMAIL_OUTBO_status_efb32d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_trafo_load_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='chunk_size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Registros por bloque'),
+        ),
+    ]
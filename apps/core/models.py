@@ -1,3 +1,128 @@
 from django.db import models
 
-# Create your models here.
+from apps.models import BaseModel
+
+
+IMPORT_JOB_STATUS = (
+    (1, 'En cola'),
+    (2, 'Procesando'),
+    (3, 'Terminada'),
+    (4, 'Fallida'),
+)
+
+
+class ImportJob(BaseModel):
+    """
+    Importación masiva que se procesa en segundo plano por bloques. resource es un
+    recurso de django-import-export o una subclase de ImportJobRunner con su propio
+    procesamiento (p.ej. levantamientos de nodos). user_creation es quien cargó el archivo.
+    """
+    QUEUED, RUNNING, DONE, FAILED = 1, 2, 3, 4
+
+    resource = models.CharField(max_length=255, verbose_name='Recurso')
+    model_label = models.CharField(max_length=100, verbose_name='Modelo')
+    file = models.FileField(upload_to='imports/', verbose_name='Archivo')
+    input_format = models.CharField(max_length=16, verbose_name='Formato')
+    dry_run = models.BooleanField(default=True, verbose_name='Simulación')
+    chunk_size = models.PositiveIntegerField(null=True, blank=True, verbose_name='Registros por bloque')
+    status = models.PositiveSmallIntegerField(choices=IMPORT_JOB_STATUS, default=QUEUED, verbose_name='Estado')
+    total_rows = models.PositiveIntegerField(default=0, verbose_name='Filas')
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name='Filas procesadas')
+    new_rows = models.PositiveIntegerField(default=0, verbose_name='Nuevas')
+    updated_rows = models.PositiveIntegerField(default=0, verbose_name='Actualizadas')
+    skipped_rows = models.PositiveIntegerField(default=0, verbose_name='Omitidas')
+    error_rows = models.PositiveIntegerField(default=0, verbose_name='Con error')
+    error_report = models.FileField(upload_to='imports/reports/', null=True, blank=True, verbose_name='Reporte de errores')
+    diff_report = models.FileField(upload_to='imports/reports/', null=True, blank=True, verbose_name='Reporte de cambios')
+    message = models.TextField(blank=True, default='', verbose_name='Mensaje')
+    date_started = models.DateTimeField(null=True, blank=True, verbose_name='Fecha inicio')
+    date_finished = models.DateTimeField(null=True, blank=True, verbose_name='Fecha fin')
+
+    class Meta:
+        db_table = 'IMPORT_JOB'
+        verbose_name = 'Importación'
+        verbose_name_plural = 'Importaciones'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.model_label} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """Porcentaje de filas procesadas."""
+        if not self.total_rows:
+            return 100 if self.status == self.DONE else 0
+        return min(100, round(self.processed_rows * 100 / self.total_rows))
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+class ListCount(models.Model):
+    """
+    Cantidad de registros por modelo, estado y área que muestran los listados
+    paginados. Se mantiene con señales en apps.core.counts; area_id es 0 en los
+    modelos sin área.
+    """
+    model_label = models.CharField(max_length=100, verbose_name='Modelo')
+    status = models.SmallIntegerField(verbose_name='Estado')
+    area_id = models.BigIntegerField(default=0, verbose_name='Área')
+    count = models.BigIntegerField(default=0, verbose_name='Cantidad')
+    date_updated = models.DateTimeField(auto_now=True, verbose_name='Fecha Actualización')
+
+    class Meta:
+        db_table = 'LIST_COUNT'
+        verbose_name = 'Conteo de listado'
+        verbose_name_plural = 'Conteos de listados'
+        ordering = ['model_label', 'status', 'area_id']
+        constraints = [
+            models.UniqueConstraint(fields=['model_label', 'status', 'area_id'], name='LIST_COUNT_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label} estado {self.status}: {self.count}"
+
+
+OUTBOX_EMAIL_STATUS = (
+    (1, 'Pendiente'),
+    (2, 'Enviando'),
+    (3, 'Enviado'),
+    (4, 'Fallido'),
+)
+
+
+class OutboxEmail(models.Model):
+    """
+    Correo por enviar, escrito en la misma transacción que lo origina; lo envía
+    apps.core.mail (hilo al confirmar o comando send_queued_emails).
+    next_attempt es el próximo reintento y, mientras se envía, el fin del plazo
+    tras el cual otro proceso puede retomarlo.
+    """
+    PENDING, SENDING, SENT, FAILED = 1, 2, 3, 4
+
+    email_to = models.CharField(max_length=254, verbose_name='Destinatario')
+    subject = models.CharField(max_length=255, verbose_name='Asunto')
+    html = models.TextField(verbose_name='Contenido')
+    status = models.PositiveSmallIntegerField(choices=OUTBOX_EMAIL_STATUS, default=PENDING, verbose_name='Estado')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')
+    next_attempt = models.DateTimeField(verbose_name='Próximo intento')
+    last_error = models.TextField(blank=True, default='', verbose_name='Último error')
+    provider_id = models.CharField(max_length=255, blank=True, default='', verbose_name='Id en el proveedor')
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name='Fecha Creación')
+    date_sent = models.DateTimeField(null=True, blank=True, verbose_name='Fecha envío')
+
+    class Meta:
+        db_table = 'EMAIL_OUTBOX'
+        verbose_name = 'Correo en cola'
+        verbose_name_plural = 'Correos en cola'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.email_to}: {self.subject}"
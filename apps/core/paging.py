@@ -0,0 +1,134 @@
+# standard library
+import base64
+import json
+
+# Django
+from django.db.models import F, Q
+
+
+"""
+    Paginación por cursor (keyset) para los listados de PQRs y órdenes.
+
+    En lugar de OFFSET, cada página pide las filas posteriores (o anteriores) a la
+    última fila vista según la columna de orden más el id como desempate, así que
+    la página 500 cuesta lo mismo que la primera. Los nulos de la columna van
+    siempre al final. El cursor es opaco para el navegador: JSON en base64 con el
+    orden, el valor de la columna y el id de la fila límite.
+"""
+
+
+def _sort_field(model, path):
+    field = None
+    for part in path.split("__"):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _plain(value):
+    # isoformat conserva los microsegundos (DjangoJSONEncoder los recorta y el
+    # desempate por igualdad fallaría)
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_cursor(order, row, before):
+    data = {"o": order, "v": _plain(row.get(order.lstrip("-"))), "id": row["id"], "b": before}
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return data["o"], data["v"], int(data["id"]), bool(data["b"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Cursor de paginación inválido")
+
+
+def _ordering(name, ascending, reverse):
+    """Orden canónico (nulos al final) o su inverso exacto."""
+    if name == "pk":
+        return ["pk" if ascending != reverse else "-pk"]
+    if not reverse:
+        column = F(name).asc(nulls_last=True) if ascending else F(name).desc(nulls_last=True)
+    else:
+        column = F(name).desc(nulls_first=True) if ascending else F(name).asc(nulls_first=True)
+    return [column, "pk" if ascending != reverse else "-pk"]
+
+
+def _beyond(name, value, pk, ascending, after):
+    """Filas posteriores (after) o anteriores al cursor en el orden canónico."""
+    op = "gt" if ascending == after else "lt"
+    if name == "pk":
+        return Q(**{f"pk__{op}": pk})
+    if value is None:
+        tail = Q(**{f"{name}__isnull": True, f"pk__{op}": pk})
+        return tail if after else Q(**{f"{name}__isnull": False}) | tail
+    condition = Q(**{f"{name}__{op}": value}) | Q(**{name: value, f"pk__{op}": pk})
+    return condition | Q(**{f"{name}__isnull": True}) if after else condition
+
+
+def _sort_key(queryset):
+    """(orden tal como vino, nombre del campo, ascendente) del queryset."""
+    order = queryset.query.order_by[0] if queryset.query.order_by else "id"
+    name = order.lstrip("-")
+    return order, "pk" if name == "id" else name, not order.startswith("-")
+
+
+def keyset_page(queryset, limit, cursor=None, last=False):
+    """
+    Una página de un queryset .values() ordenado por un solo campo (con "-" si es
+    descendente) que incluya "id". Sin cursor devuelve la primera página, con
+    last=True la última. Devuelve (filas, cursor siguiente, cursor anterior); un
+    cursor es None si no hay más filas en esa dirección.
+    """
+    order, name, ascending = _sort_key(queryset)
+    field = _sort_field(queryset.model, name) if name != "pk" else None
+
+    reverse = last
+    if cursor:
+        cursor_order, value, pk, reverse = decode_cursor(cursor)
+        if cursor_order != order:
+            raise ValueError("El cursor no corresponde al orden de la lista")
+        if field is not None and value is not None:
+            value = field.to_python(value)
+        queryset = queryset.filter(_beyond(name, value, pk, ascending, after=not reverse))
+
+    rows = list(queryset.order_by(*_ordering(name, ascending, reverse))[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if reverse:
+        rows.reverse()
+    if not rows:
+        return rows, None, None
+
+    # Hacia adelante quedan filas si sobró una; hacia atrás, si se vino desde una
+    # página posterior (la última página no tiene siguiente)
+    has_next = more if not reverse else bool(cursor)
+    has_prev = bool(cursor) if not reverse else more
+    next_cursor = encode_cursor(order, rows[-1], before=False) if has_next else None
+    prev_cursor = encode_cursor(order, rows[0], before=True) if has_prev else None
+    return rows, next_cursor, prev_cursor
+
+
+def paginate(queryset, params):
+    """
+    Página según los parámetros del listado: cursor (siguiente/anterior), ultima
+    (última página) o inicio (salto a una página cualquiera, por OFFSET). Las filas
+    de un salto también traen cursores, así que desde ahí se sigue por keyset.
+    """
+    limit = int(params.get("limite", 50))
+    cursor = params.get("cursor") or None
+    last = params.get("ultima") == "true"
+    start = int(params.get("inicio", 0))
+    if cursor or last or not start:
+        return keyset_page(queryset, limit, cursor, last=last)
+
+    order, name, ascending = _sort_key(queryset)
+    rows = list(queryset.order_by(*_ordering(name, ascending, False))[start:start + limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return rows, None, None
+    next_cursor = encode_cursor(order, rows[-1], before=False) if more else None
+    return rows, next_cursor, encode_cursor(order, rows[0], before=True)
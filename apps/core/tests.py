@@ -1,3 +1,208 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from apps.core import mail
+from apps.core.models import ListCount, OutboxEmail
+from apps.core.paging import decode_cursor, encode_cursor, keyset_page, paginate
+from apps.core.versions import VersionedIndex, table_version
+
+
+class FailingTransport:
+    """Transporte que siempre falla, para probar los reintentos."""
+
+    def send(self, email):
+        raise ConnectionError("proveedor no disponible")
+
+
+def _email(**kwargs):
+    values = {"email_to": "a@b.co", "subject": "Asunto", "html": "<p></p>", "next_attempt": datetime.now()}
+    values.update(kwargs)
+    return OutboxEmail.objects.create(**values)
+
+
+class KeysetPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2024, 1, 1)
+        # Fechas repetidas (desempate por id) y nulas (siempre al final)
+        for i in range(23):
+            date_sent = None if i % 5 == 0 else base + timedelta(days=i % 4)
+            _email(subject=f"Correo {i}", date_sent=date_sent)
+
+    def _queryset(self, order):
+        return OutboxEmail.objects.values("id", "date_sent").order_by(order)
+
+    def _expected(self, order):
+        rows = list(OutboxEmail.objects.values("id", "date_sent"))
+        if order.lstrip("-") == "id":
+            return sorted((row["id"] for row in rows), reverse=order.startswith("-"))
+        dated = [row for row in rows if row["date_sent"] is not None]
+        undated = [row for row in rows if row["date_sent"] is None]
+        descending = order.startswith("-")
+        dated.sort(key=lambda row: (row["date_sent"], row["id"]), reverse=descending)
+        undated.sort(key=lambda row: row["id"], reverse=descending)
+        return [row["id"] for row in dated + undated]
+
+    def test_forward_pages_follow_the_full_ordering(self):
+        for order in ("date_sent", "-date_sent", "id", "-id"):
+            seen, cursor = [], None
+            while True:
+                rows, cursor, _ = keyset_page(self._queryset(order), 4, cursor)
+                seen.extend(row["id"] for row in rows)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, self._expected(order), order)
+
+    def test_backward_pages_from_the_last_page(self):
+        for order in ("date_sent", "-date_sent"):
+            pages, cursor = [], None
+            rows, _, cursor = keyset_page(self._queryset(order), 4, last=True)
+            pages.insert(0, [row["id"] for row in rows])
+            while cursor is not None:
+                rows, _, cursor = keyset_page(self._queryset(order), 4, cursor)
+                pages.insert(0, [row["id"] for row in rows])
+            self.assertEqual([pk for page in pages for pk in page], self._expected(order), order)
+
+    def test_first_page_has_no_previous_and_last_page_no_next(self):
+        _, next_cursor, prev_cursor = keyset_page(self._queryset("date_sent"), 4)
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(prev_cursor)
+        _, next_cursor, prev_cursor = keyset_page(self._queryset("date_sent"), 4, last=True)
+        self.assertIsNone(next_cursor)
+        self.assertIsNotNone(prev_cursor)
+
+    def test_jump_by_offset_continues_by_cursor(self):
+        expected = self._expected("-date_sent")
+        rows, next_cursor, _ = paginate(self._queryset("-date_sent"), {"limite": "5", "inicio": "10"})
+        self.assertEqual([row["id"] for row in rows], expected[10:15])
+        rows, _, _ = paginate(self._queryset("-date_sent"), {"limite": "5", "cursor": next_cursor})
+        self.assertEqual([row["id"] for row in rows], expected[15:20])
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        value = datetime(2024, 5, 6, 7, 8, 9, 123456)
+        token = encode_cursor("-date_sent", {"id": 7, "date_sent": value}, before=True)
+        self.assertEqual(decode_cursor(token), ("-date_sent", value.isoformat(), 7, True))
+
+    def test_invalid_cursors_are_rejected(self):
+        with self.assertRaises(ValueError):
+            keyset_page(self._queryset("date_sent"), 4, "no-es-un-cursor")
+        token = encode_cursor("-id", {"id": 1}, before=False)
+        with self.assertRaises(ValueError):
+            keyset_page(self._queryset("date_sent"), 4, token)
+
+
+@override_settings(MAIL_TRANSPORT="apps.core.mail.LocmemTransport")
+class OutboxTests(TestCase):
+    def setUp(self):
+        mail.LocmemTransport.outbox.clear()
+
+    def test_pending_email_is_sent(self):
+        email = _email()
+        self.assertEqual(mail.send_pending(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.provider_id, f"locmem-{email.pk}")
+        self.assertIsNotNone(email.date_sent)
+        self.assertEqual([e.pk for e in mail.LocmemTransport.outbox], [email.pk])
+
+    def test_future_and_sent_emails_are_not_claimed(self):
+        _email(next_attempt=datetime.now() + timedelta(hours=1))
+        _email(status=OutboxEmail.SENT)
+        self.assertEqual(mail.send_pending(), (0, 0))
+        self.assertEqual(mail.LocmemTransport.outbox, [])
+
+    def test_expired_lease_is_taken_again(self):
+        email = _email(status=OutboxEmail.SENDING, next_attempt=datetime.now() - timedelta(seconds=1))
+        self.assertEqual(mail.send_pending(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.SENT)
+
+    @override_settings(MAIL_TRANSPORT="apps.core.tests.FailingTransport")
+    def test_failure_is_retried_with_backoff(self):
+        email = _email()
+        before = datetime.now()
+        self.assertEqual(mail.send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, "proveedor no disponible")
+        self.assertGreaterEqual(email.next_attempt, before + timedelta(seconds=mail.RETRY_SECONDS))
+        # Aún no vence el reintento
+        self.assertEqual(mail.send_pending(), (0, 0))
+
+    @override_settings(MAIL_TRANSPORT="apps.core.tests.FailingTransport")
+    def test_last_attempt_marks_the_email_failed(self):
+        email = _email(attempts=mail.MAX_ATTEMPTS - 1)
+        self.assertEqual(mail.send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.FAILED)
+        self.assertEqual(email.attempts, mail.MAX_ATTEMPTS)
+
+    def test_retry_delay_doubles_up_to_the_limit(self):
+        self.assertEqual(mail._retry_delay(1), timedelta(seconds=mail.RETRY_SECONDS))
+        self.assertEqual(mail._retry_delay(3), timedelta(seconds=4 * mail.RETRY_SECONDS))
+        self.assertEqual(mail._retry_delay(50), timedelta(seconds=mail.MAX_RETRY_SECONDS))
+
+    def test_retried_email_is_sent_when_due(self):
+        email = _email(attempts=2, last_error="timeout")
+        self.assertEqual(mail.send_pending(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.SENT)
+        self.assertEqual(email.attempts, 3)
+        self.assertEqual(email.last_error, "")
+
+
+class RecordingIndex(VersionedIndex):
+    """Índice que sólo registra cuándo se construye y cuándo aplica cambios."""
+
+    models = (ListCount,)
+
+    def __init__(self):
+        super().__init__()
+        self.builds, self.refreshes = [], []
+
+    def _build(self, version):
+        self.builds.append(version)
+        self._version = version
+        self._built = True
+
+    def _refresh(self, version):
+        self.refreshes.append(version)
+        self._version = version
+
+
+class VersionedIndexTests(TestCase):
+    def _expire(self, index):
+        index._checked_at = float("-inf")
+
+    def test_table_version_is_count_and_last_update(self):
+        self.assertEqual(table_version(ListCount), (0, None))
+        row = ListCount.objects.create(model_label="pqrs.PqrActive", status=0)
+        self.assertEqual(table_version(ListCount, ListCount), (1, row.date_updated, 1, row.date_updated))
+
+    def test_version_is_checked_at_most_every_check_seconds(self):
+        index = RecordingIndex()
+        index._ensure()
+        ListCount.objects.create(model_label="pqrs.PqrActive", status=0)
+        with self.assertNumQueries(0):
+            index._ensure()
+        self.assertEqual((len(index.builds), index.refreshes), (1, []))
+
+    def test_changes_are_refreshed_and_invalidate_rebuilds(self):
+        index = RecordingIndex()
+        index._ensure()
+        row = ListCount.objects.create(model_label="pqrs.PqrActive", status=0)
+        self._expire(index)
+        index._ensure()
+        self.assertEqual(index.refreshes, [(1, row.date_updated)])
+
+        # Sin cambios no se vuelve a aplicar nada
+        self._expire(index)
+        index._ensure()
+        self.assertEqual(len(index.refreshes), 1)
+
+        index.invalidate()
+        index._ensure()
+        self.assertEqual(index.builds, [(0, None), (1, row.date_updated)])
@@ -0,0 +1,68 @@
+# standard library
+import threading
+import time
+
+# Django
+from django.db.models import Count, Max
+
+
+"""
+    Índices y cachés en memoria del proceso que siguen los cambios de otras tablas.
+
+    Cada proceso (worker de gunicorn, comando) mantiene su propia copia. Los cambios
+    hechos en el mismo proceso se aplican en el acto (señales); los de los demás se
+    detectan comparando la versión de las tablas (conteo + última fecha de
+    actualización de cada modelo), consultada como máximo cada CHECK_SECONDS.
+"""
+
+
+def table_version(*models):
+    """(conteo, última date_updated) de cada modelo, en una sola tupla."""
+    version = ()
+    for model in models:
+        stats = model.objects.aggregate(total=Count("id"), last=Max("date_updated"))
+        version += (stats["total"], stats["last"])
+    return version
+
+
+class VersionedIndex:
+    """
+    Base de los índices en memoria. Las subclases definen models (tablas cuya versión
+    se sigue), CHECK_SECONDS y _build(version); _refresh(version) se llama cuando el
+    índice ya existe y otro proceso cambió las tablas (por defecto, reconstruye).
+    """
+
+    CHECK_SECONDS = 30
+    models = ()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._version = None
+        self._checked_at = 0.0
+
+    def _current_version(self):
+        return table_version(*self.models)
+
+    def _build(self, version):
+        raise NotImplementedError
+
+    def _refresh(self, version):
+        self._build(version)
+
+    def _ensure(self):
+        now = time.monotonic()
+        if self._built and now - self._checked_at < self.CHECK_SECONDS:
+            return
+        with self._lock:
+            if not self._built or now - self._checked_at >= self.CHECK_SECONDS:
+                version = self._current_version()
+                if not self._built:
+                    self._build(version)
+                elif version != self._version:
+                    self._refresh(version)
+                self._checked_at = now
+
+    def invalidate(self):
+        with self._lock:
+            self._built = False
@@ -1,7 +1,25 @@
-from django.contrib import admin
+import os
+
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.text import get_valid_filename
 from leaflet.admin import LeafletGeoAdmin
 
+from apps.core.admin import BackgroundImportAdminMixin
+from apps.core.imports import BulkImportResource, enqueue_import_job
+from apps.core.models import ImportJob
+from apps.infrastructure.boundaries import simplify_boundaries
 from apps.infrastructure.models import *
+from apps.infrastructure.importers import DEFAULT_CHUNK_SIZE, LINE_DELIMITED, MAX_CHUNK_SIZE, NodeSurveyJobRunner
+from apps.infrastructure.loads import invalidate_trafo_loads
+from apps.infrastructure.merge import NodeMergeError, merge_nodes
+from apps.infrastructure.reassignment import changed_area, locations_imported, reassign_node_districts
+from apps.infrastructure.rollups import mark_districts_dirty
+from apps.infrastructure.spatial import district_resolver
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
@@ -81,24 +99,82 @@ class BreakingCapacityAdmin(admin.ModelAdmin):
     list_display = ('id','value')
 
 # MODELOS UBICACION
-class ComunaResource(resources.ModelResource):
+class ComunaResource(BulkImportResource):
     class Meta:
         model = Comuna
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._saved_ids = set()
+        self._updated_ids = set()
+
+    def after_bulk_save(self, instances, created):
+        super().after_bulk_save(instances, created)
+        self._saved_ids.update(comuna.pk for comuna in instances)
+        if not created:
+            self._updated_ids.update(comuna.pk for comuna in instances)
+
+    def after_job(self):
+        if self._saved_ids:
+            simplify_boundaries(comuna_ids=sorted(self._saved_ids), district_ids=[])
+        if self._updated_ids:
+            # Sin post_save: los documentos de búsqueda de PQRs llevan el nombre de la comuna
+            locations_imported.send(sender=Comuna, ids=sorted(self._updated_ids))
+        self._saved_ids = set()
+        self._updated_ids = set()
+
 @admin.register(Comuna)
-class ComunaAdmin(ImportExportModelAdmin, LeafletGeoAdmin):
+class ComunaAdmin(BackgroundImportAdminMixin, ImportExportModelAdmin, LeafletGeoAdmin):
     resource_class= ComunaResource
     search_fields = ('id','name','type')
     list_display = ('id','name','type')
     list_filter = ['type']
     readonly_fields = ['user_creation', 'user_updated','date_creation','date_updated']
 
-class DistrictResource(resources.ModelResource):
+class DistrictResource(BulkImportResource):
     class Meta:
         model = District
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._areas = []
+        self._redrawn_ids = set()
+        self._updated_ids = set()
+
+    def import_instance(self, instance, row, **kwargs):
+        # Sin señales de District: acumular el área redibujada para reasignar nodos al final
+        previous = instance.poly
+        super().import_instance(instance, row, **kwargs)
+        area = changed_area(previous, instance.poly)
+        if area is not None:
+            self._areas.append(area)
+            instance._redrawn = True
+
+    def after_bulk_save(self, instances, created):
+        super().after_bulk_save(instances, created)
+        self._redrawn_ids.update(d.pk for d in instances if getattr(d, '_redrawn', False))
+        if not created:
+            mark_districts_dirty({district.pk for district in instances})
+            self._updated_ids.update(district.pk for district in instances)
+
+    def after_job(self):
+        district_resolver.invalidate()
+        if self._areas:
+            area = self._areas[0]
+            for other in self._areas[1:]:
+                area = area.union(other)
+            reassign_node_districts(area)
+        if self._redrawn_ids:
+            simplify_boundaries(comuna_ids=[], district_ids=sorted(self._redrawn_ids))
+        if self._updated_ids:
+            # Sin post_save: los documentos de búsqueda de PQRs llevan el nombre del barrio
+            locations_imported.send(sender=District, ids=sorted(self._updated_ids))
+        self._areas = []
+        self._redrawn_ids = set()
+        self._updated_ids = set()
+
 @admin.register(District)
-class DistrictAdmin(ImportExportModelAdmin, LeafletGeoAdmin):
+class DistrictAdmin(BackgroundImportAdminMixin, ImportExportModelAdmin, LeafletGeoAdmin):
     resource_class= DistrictResource
     search_fields = ('id','name','estrato','cod_unico','fk_comuna')
     list_display = ('id','name','estrato','cod_unico','fk_comuna')
@@ -111,18 +187,87 @@ class NodeAdmin(LeafletGeoAdmin):
     list_display = ('id','painting_code','fk_district')
     list_filter = ['fk_district__fk_comuna']
     readonly_fields = ['user_creation', 'user_updated','date_creation','date_updated']
+    change_list_template = 'admin/infrastructure/node/change_list.html'
+    actions = ['merge_selected_nodes']
+
+    @admin.action(description='Fusionar nodos seleccionados (conserva el de menor id)', permissions=['change', 'delete'])
+    def merge_selected_nodes(self, request, queryset):
+        ids = sorted(queryset.values_list('id', flat=True))
+        if len(ids) < 2:
+            messages.warning(request, 'Seleccione al menos dos nodos para fusionar.')
+            return
+        try:
+            result = merge_nodes(ids[0], ids[1:], user=request.user)
+        except NodeMergeError as e:
+            messages.error(request, str(e))
+            return
+        messages.success(request, f"{result['deleted']} nodo(s) fusionados en el nodo {ids[0]}.")
+
+    def get_urls(self):
+        urls = [
+            path('import-survey/', self.admin_site.admin_view(self.import_survey_view), name='infrastructure_node_import_survey'),
+        ]
+        return urls + super().get_urls()
+
+    def import_survey_view(self, request):
+        """Carga de un levantamiento (CSV/GeoJSON); se encola como ImportJob para run_import_jobs."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        if request.method == 'POST' and request.FILES.get('file'):
+            upload = request.FILES['file']
+            extension = os.path.splitext(upload.name)[1].lower()
+            if extension not in ('.csv', '.geojson', '.json') + LINE_DELIMITED:
+                messages.error(request, 'Formato no soportado: use CSV, GeoJSON o GeoJSON por líneas.')
+                return redirect('admin:infrastructure_node_import_survey')
+            try:
+                chunk_size = int(request.POST.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+            except ValueError:
+                messages.error(request, 'El tamaño de bloque debe ser un número entero.')
+                return redirect('admin:infrastructure_node_import_survey')
+            if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+                messages.error(request, f'El tamaño de bloque debe estar entre 1 y {MAX_CHUNK_SIZE}.')
+                return redirect('admin:infrastructure_node_import_survey')
+
+            job = ImportJob(
+                resource=f'{NodeSurveyJobRunner.__module__}.{NodeSurveyJobRunner.__qualname__}',
+                model_label=self.model._meta.label,
+                input_format=extension.lstrip('.').upper(),
+                dry_run=False,
+                chunk_size=chunk_size,
+                user_creation=request.user,
+            )
+            job.file.save(get_valid_filename(upload.name), upload, save=False)
+            job.save()
+            enqueue_import_job(job)
+            messages.success(request, 'Levantamiento en cola; el progreso y los rechazos se muestran en esta página.')
+            return redirect('admin:core_importjob_change', job.pk)
+
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Importar levantamiento de nodos',
+            chunk_size=DEFAULT_CHUNK_SIZE,
+            jobs=ImportJob.objects.filter(model_label=self.model._meta.label)[:10],
+        )
+        return TemplateResponse(request, 'admin/infrastructure/node/import_survey.html', context)
 
 @admin.register(Brand)
 class BrandAdmin(admin.ModelAdmin):
     search_fields = ('id','name')
     list_display = ('id','name')
 
-class TrafoResource(resources.ModelResource):
+class TrafoResource(BulkImportResource):
     class Meta:
         model = Trafo
 
+    def after_bulk_save(self, instances, created):
+        super().after_bulk_save(instances, created)
+        trafo_ids = {trafo.pk for trafo in instances}
+        transaction.on_commit(lambda: invalidate_trafo_loads(trafo_ids))
+
 @admin.register(Trafo)
-class TrafoAdmin(ImportExportModelAdmin):
+class TrafoAdmin(BackgroundImportAdminMixin, ImportExportModelAdmin):
     resource_class= TrafoResource
     search_fields = ('id','code','fk_node','owner','type','installationtype','using','power')
     list_display = ('id','code','fk_node','owner','type','installationtype','using','power','status')
@@ -192,3 +337,17 @@ class SupportAdmin(ImportExportModelAdmin):
     list_display = ('id','fk_setting','fk_node','fk_trafo','fk_cimentation','status','financing','owner')
     list_filter = ['fk_node__fk_district__fk_comuna','fk_setting','fk_cimentation','owner','financing','status']
     readonly_fields = ['user_creation', 'user_updated','date_creation','date_updated']
+
+@admin.register(SimplifiedBoundary)
+class SimplifiedBoundaryAdmin(LeafletGeoAdmin):
+    search_fields = ('fk_comuna__name','fk_district__name')
+    list_display = ('id','fk_comuna','fk_district','zoom','tolerance','date_updated')
+    list_filter = ['zoom']
+    readonly_fields = ['date_updated']
+
+@admin.register(InventoryRollup)
+class InventoryRollupAdmin(admin.ModelAdmin):
+    search_fields = ('label',)
+    list_display = ('id','fk_district','fk_comuna','dimension','label','count','watts','date_updated')
+    list_filter = ['dimension','fk_comuna']
+    readonly_fields = ['date_updated']
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InfrastructureConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.infrastructure'
+
+    def ready(self):
+        import apps.infrastructure.signals
@@ -0,0 +1,461 @@
+# standard library
+import gzip
+import hashlib
+import json
+from collections import OrderedDict, defaultdict
+
+# Django
+from django.conf import settings
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# third-party
+try:
+    import brotli
+except ImportError:  # sin brotli se sirve sólo gzip
+    brotli = None
+
+# local Django
+from apps.core.versions import VersionedIndex
+from apps.infrastructure.models import Comuna, District, SimplifiedBoundary
+from apps.infrastructure.topojson import encode_topology, simplify_layers
+
+
+"""
+    Caché versionada de las geometrías de Comunas y Barrios para el mapa.
+
+    Los límites cambian muy pocas veces al año: cada comuna/barrio se serializa una
+    sola vez a JSON y cada respuesta (todas las comunas, barrios de una comuna, ...)
+    se guarda ya armada junto con sus variantes gzip/brotli y un ETag derivado del
+    contenido. Las vistas responden 304 a If-None-Match/If-Modified-Since.
+
+    Para los zooms bajos se sirven versiones simplificadas precalculadas por banda de
+    zoom (SimplifiedBoundary), que se regeneran al cambiar el límite original. La
+    simplificación se hace sobre los arcos compartidos de toda la capa
+    (apps.infrastructure.topojson), así los barrios vecinos no se separan ni se traslapan.
+    Con format=topojson las capas se codifican como TopoJSON (apps.infrastructure.topojson).
+"""
+
+
+# Zoom máximo de cada banda simplificada; por encima de la última, polígono original
+ZOOM_BANDS = tuple(sorted(getattr(settings, "BOUNDARY_ZOOM_BANDS", (10, 12, 14))))
+
+
+def band_tolerance(zoom):
+    """Medio píxel, en grados, de una tesela de 256 px en ese zoom."""
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+
+def band_for(zoom=None, tolerance=None):
+    """
+    Banda a servir para un zoom (la primera que lo cubre) o para una tolerancia en
+    grados (la más simplificada que no la supera). None = geometría original.
+    """
+    if zoom is not None:
+        return next((band for band in ZOOM_BANDS if zoom <= band), None)
+    if tolerance is not None:
+        return next((band for band in ZOOM_BANDS if band_tolerance(band) <= tolerance), None)
+    return None
+
+
+FORMATS = ("json", "topojson")
+
+
+def layer_params(request):
+    """
+    (banda, formato) según ?zoom= o ?tolerance= y ?format=json|topojson.
+    ValueError si algún parámetro es inválido.
+    """
+    fmt = request.GET.get("format") or "json"
+    if fmt not in FORMATS:
+        raise ValueError(fmt)
+    zoom = request.GET.get("zoom")
+    if zoom not in (None, ""):
+        return band_for(zoom=int(zoom)), fmt
+    tolerance = request.GET.get("tolerance")
+    if tolerance not in (None, ""):
+        return band_for(tolerance=float(tolerance)), fmt
+    return None, fmt
+
+
+def _polygons(geometry):
+    return [geometry] if geometry.geom_type == "Polygon" else list(geometry)
+
+
+def _rings(poly):
+    """Polígonos -> anillos [(x, y), ...] en EPSG:4326 (entrada de apps.infrastructure.topojson)."""
+    if poly.srid and poly.srid != 4326:
+        poly = poly.transform(4326, clone=True)
+    return [[ring.coords for ring in polygon] for polygon in _polygons(poly)]
+
+
+def simplify_layer(objects, tolerance):
+    """
+    {id: geometría simplificada} de una capa completa (objetos con poly). Se
+    simplifican los arcos de la capa, así dos vecinos conservan el mismo borde; un
+    polígono que colapsa por completo se conserva sin simplificar.
+    """
+    shapes = {obj.pk: obj.poly for obj in objects if obj.poly}
+    simplified = simplify_layers({"layer": [(pk, None, _rings(poly)) for pk, poly in shapes.items()]}, tolerance)
+    geometries = {}
+    for pk, polygons in simplified["layer"].items():
+        if not polygons:
+            geometries[pk] = shapes[pk]
+            continue
+        parts = [Polygon(*rings, srid=4326) for rings in polygons]
+        if len(parts) == 1 and shapes[pk].geom_type == "Polygon":
+            geometries[pk] = parts[0]
+        else:
+            geometries[pk] = MultiPolygon(*parts, srid=4326)
+    return geometries
+
+
+def simplify_boundaries(comuna_ids=None, district_ids=None):
+    """
+    Regenera las geometrías simplificadas de las capas de las comunas/barrios
+    indicados (None = la capa, lista vacía = ninguna). Se regenera la capa completa:
+    los vecinos del polígono que cambió comparten bordes con él. Devuelve las filas creadas.
+    """
+    created = 0
+    with transaction.atomic():
+        for model, ids, fk in ((Comuna, comuna_ids, "fk_comuna"), (District, district_ids, "fk_district")):
+            if ids is not None and not ids:
+                continue
+            objects = list(model.objects.filter(poly__isnull=False).only("id", "poly"))
+            SimplifiedBoundary.objects.filter(**{f"{fk}__isnull": False}).delete()
+
+            rows = []
+            for band in ZOOM_BANDS:
+                tolerance = band_tolerance(band)
+                for pk, poly in simplify_layer(objects, tolerance).items():
+                    rows.append(SimplifiedBoundary(**{f"{fk}_id": pk}, zoom=band, tolerance=tolerance, poly=poly))
+            created += len(SimplifiedBoundary.objects.bulk_create(rows, batch_size=500))
+    return created
+
+
+def serialize_comuna(comuna, poly=None):
+    poly = comuna.poly if poly is None else poly
+    if not poly:
+        return None
+    inverted_coords = [{"lat": lat, "lng": lon} for lon, lat in _polygons(poly)[0].coords[0]]
+    center = comuna.centerPoint
+    return {
+        "pk": comuna.pk,
+        "name": comuna.name,
+        "type": comuna.type,
+        "center": {"lat": center.y, "lng": center.x} if center else None,
+        "polygon": inverted_coords,
+    }
+
+
+def serialize_district(district, poly=None):
+    poly = district.poly if poly is None else poly
+    if not poly:
+        return None
+    polygons = []
+    for polygon in _polygons(poly):
+        inverted_coords = [{"lat": lat, "lng": lon} for lon, lat in polygon[0].coords]
+        polygons.append(inverted_coords)
+    return {
+        "pk": district.pk,
+        "name": district.name,
+        "estrato": district.estrato,
+        "cod_unico": district.cod_unico,
+        "polygon": polygons,
+        "fk_comuna": district.fk_comuna_id,
+    }
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+# Compresión de las respuestas armadas a pedido (subconjuntos de comunas): niveles
+# rápidos, sólo la codificación que pidió el cliente
+GZIP_ON_DEMAND_LEVEL = 6
+BROTLI_ON_DEMAND_QUALITY = 5
+
+
+def accepted_encodings(header):
+    """{codificación: q} de un Accept-Encoding; q=0 significa que no se acepta."""
+    accepted = {}
+    for item in (header or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+class Payload:
+    """
+    Respuesta JSON ya serializada con sus variantes comprimidas y validadores HTTP.
+    Las respuestas compartidas (precompress) se comprimen una vez al máximo nivel;
+    las armadas a pedido comprimen sólo la variante solicitada, con niveles rápidos.
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "_variants")
+
+    def __init__(self, body, last_modified, precompress=True):
+        self.body = body
+        self.etag = hashlib.md5(body).hexdigest()
+        self.last_modified = last_modified
+        self._variants = {}
+        if precompress:
+            self._variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli:
+                self._variants["br"] = brotli.compress(body)
+
+    def _compressed(self, encoding):
+        variant = self._variants.get(encoding)
+        if variant is None:
+            if encoding == "br":
+                variant = brotli.compress(self.body, quality=BROTLI_ON_DEMAND_QUALITY)
+            else:
+                variant = gzip.compress(self.body, compresslevel=GZIP_ON_DEMAND_LEVEL, mtime=0)
+            self._variants[encoding] = variant
+        return variant
+
+    def _variant(self, request):
+        """(cuerpo, Content-Encoding) de la codificación aceptada con mayor q (brotli si empatan)."""
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING"))
+        default = accepted.get("*", 0)
+        candidates = [("br", accepted.get("br", default))] if brotli else []
+        candidates.append(("gzip", accepted.get("gzip", default)))
+        encoding, q = max(candidates, key=lambda candidate: candidate[1])
+        if q <= 0:
+            return self.body, None
+        return self._compressed(encoding), encoding
+
+    def response(self, request):
+        """304 si el cliente ya tiene esta versión; si no, el cuerpo en la mejor codificación aceptada."""
+        body, encoding = self._variant(request)
+        # ETag fuerte por representación: cada codificación tiene bytes distintos
+        etag = f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+        last_modified = self.last_modified.timestamp() if self.last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            patch_vary_headers(not_modified, ("Accept-Encoding",))
+            return not_modified
+
+        response = HttpResponse(body, content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # El navegador guarda la copia pero la revalida siempre (ETag -> 304)
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class BoundaryCache(VersionedIndex):
+    """
+    Fragmentos JSON por comuna y por barrio, por banda de zoom, más las respuestas
+    armadas (LRU de MAX_PAYLOADS). La versión es (conteo, última fecha de
+    actualización) de comunas, barrios y geometrías simplificadas: se invalida en el
+    acto al guardar/eliminar en este proceso (señales) y los demás procesos la
+    verifican cada GEOMETRY_CACHE_CHECK_SECONDS.
+
+    Cada reconstrucción incrementa la generación: una respuesta armada con los
+    fragmentos de una generación anterior se entrega pero no se guarda en la LRU.
+    """
+
+    CHECK_SECONDS = getattr(settings, "GEOMETRY_CACHE_CHECK_SECONDS", 30)
+    MAX_PAYLOADS = 256
+    BANDS = (None,) + ZOOM_BANDS
+
+    models = (Comuna, District, SimplifiedBoundary)
+
+    def __init__(self):
+        super().__init__()
+        self._generation = 0
+        self.comunas = {}
+        self.districts = {}
+        self.comuna_shapes = {}
+        self.district_shapes = {}
+        self.comuna_districts = {}
+        self.last_modified = None
+        self._payloads = OrderedDict()
+
+    @staticmethod
+    def _band_geometries(objects, stored):
+        """
+        {banda: {id: polígono}}; lo que falte en SimplifiedBoundary (aún sin generar)
+        se simplifica aquí sobre la capa completa.
+        """
+        geometries = {None: {obj.pk: obj.poly for obj in objects if obj.poly}}
+        for band in ZOOM_BANDS:
+            saved = stored[band]
+            missing = [pk for pk in geometries[None] if pk not in saved]
+            computed = simplify_layer(objects, band_tolerance(band)) if missing else {}
+            geometries[band] = {pk: saved.get(pk) or computed[pk] for pk in geometries[None]}
+        return geometries
+
+    def _build(self, version):
+        simplified = {"comuna": defaultdict(dict), "district": defaultdict(dict)}
+        rows = SimplifiedBoundary.objects.values_list("fk_comuna_id", "fk_district_id", "zoom", "poly")
+        for comuna_id, district_id, zoom, poly in rows.iterator(chunk_size=500):
+            if comuna_id:
+                simplified["comuna"][zoom][comuna_id] = poly
+            else:
+                simplified["district"][zoom][district_id] = poly
+
+        # Por banda: fragmento JSON y (id, propiedades, anillos) para TopoJSON
+        comunas = {band: {} for band in self.BANDS}
+        comuna_shapes = {band: {} for band in self.BANDS}
+        comuna_list = list(Comuna.objects.only("id", "name", "type", "centerPoint", "poly").order_by("id"))
+        geometries = self._band_geometries(comuna_list, simplified["comuna"])
+        for comuna in comuna_list:
+            center = comuna.centerPoint
+            properties = {
+                "name": comuna.name,
+                "type": comuna.type,
+                "center": {"lat": center.y, "lng": center.x} if center else None,
+            }
+            for band in self.BANDS:
+                poly = geometries[band].get(comuna.pk)
+                data = serialize_comuna(comuna, poly) if poly else None
+                comunas[band][comuna.pk] = _dumps(data) if data else None
+                if data:
+                    comuna_shapes[band][comuna.pk] = (comuna.pk, properties, _rings(poly))
+
+        districts = {band: {} for band in self.BANDS}
+        district_shapes = {band: {} for band in self.BANDS}
+        comuna_districts = {comuna_id: [] for comuna_id in comunas[None]}
+        district_list = list(
+            District.objects
+            .only("id", "name", "estrato", "cod_unico", "poly", "fk_comuna_id")
+            .order_by("id")
+        )
+        geometries = self._band_geometries(district_list, simplified["district"])
+        for district in district_list:
+            if not district.poly:
+                continue
+            properties = {
+                "name": district.name,
+                "estrato": district.estrato,
+                "cod_unico": district.cod_unico,
+                "fk_comuna": district.fk_comuna_id,
+            }
+            for band in self.BANDS:
+                poly = geometries[band][district.pk]
+                districts[band][district.pk] = _dumps(serialize_district(district, poly))
+                district_shapes[band][district.pk] = (district.pk, properties, _rings(poly))
+            comuna_districts.setdefault(district.fk_comuna_id, []).append(district.pk)
+
+        self.comunas = comunas
+        self.districts = districts
+        self.comuna_shapes = comuna_shapes
+        self.district_shapes = district_shapes
+        self.comuna_districts = comuna_districts
+        self.last_modified = max((d for d in version[1::2] if d), default=None)
+        self._payloads = OrderedDict()
+        self._version = version
+        self._generation += 1
+        self._built = True
+
+    def _ensure(self):
+        """Reconstruye si la versión cambió; devuelve la generación vigente."""
+        super()._ensure()
+        return self._generation
+
+    def _payload(self, key, build, generation):
+        """
+        Respuesta armada de la LRU; build() devuelve el cuerpo si no está. generation
+        es la de los fragmentos que usa build (leída antes que ellos).
+        """
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+            last_modified = self.last_modified
+            current = generation == self._generation
+        payload = Payload(build(), last_modified)
+        if not current:
+            return payload
+        with self._lock:
+            if generation != self._generation:
+                # Se reconstruyó mientras se armaba: el cuerpo puede ser de la versión anterior
+                return payload
+            self._payloads[key] = payload
+            while len(self._payloads) > self.MAX_PAYLOADS:
+                self._payloads.popitem(last=False)
+        return payload
+
+    @staticmethod
+    def _json_body(fragments):
+        return b"[" + b",".join(f for f in fragments if f) + b"]"
+
+    @staticmethod
+    def _topojson_body(name, shapes):
+        return _dumps(encode_topology({name: [shape for shape in shapes if shape]}))
+
+    def comunas_payload(self, ids=None, band=None, fmt="json"):
+        """
+        Comunas con polígono; ids=None para todas. band: banda de zoom (None =
+        original). fmt: "json" (lista de comunas) o "topojson" (objeto "comunas").
+
+        Un subconjunto de ids (ComunaSearchView, sin autenticación) no entra en la
+        LRU: se arma a pedido con los fragmentos ya serializados de cada comuna y se
+        comprime sólo en la codificación solicitada. Los ids desconocidos se descartan
+        y un subconjunto con todas las comunas usa la respuesta completa.
+        """
+        generation = self._ensure()
+        comunas, shapes = self.comunas[band], self.comuna_shapes[band]
+        if ids is not None:
+            ids = sorted({i for i in ids if i in comunas})
+            if len(ids) == len(comunas):
+                ids = None
+
+        def build(selected):
+            if fmt == "topojson":
+                return self._topojson_body("comunas", (shapes.get(i) for i in selected))
+            return self._json_body(comunas[i] for i in selected)
+
+        if ids is None:
+            return self._payload(("comunas", fmt, band), lambda: build(list(comunas)), generation)
+        return Payload(build(ids), self.last_modified, precompress=False)
+
+    def districts_payload(self, comuna_id=None, band=None, fmt="json"):
+        """
+        Barrios con polígono, de una comuna o de todas (comuna_id=None), en la banda
+        de zoom indicada y en formato "json" o "topojson" (objeto "districts", con los
+        bordes compartidos entre barrios vecinos codificados una sola vez).
+        None si la comuna no existe.
+        """
+        generation = self._ensure()
+        if comuna_id is None:
+            ids = list(self.districts[band])
+        elif comuna_id in self.comuna_districts:
+            ids = self.comuna_districts[comuna_id]
+        else:
+            return None
+        if fmt == "topojson":
+            shapes = self.district_shapes[band]
+            return self._payload(
+                ("districts", fmt, band, comuna_id),
+                lambda: self._topojson_body("districts", (shapes[i] for i in ids)),
+                generation,
+            )
+        districts = self.districts[band]
+        return self._payload(
+            ("districts", fmt, band, comuna_id), lambda: self._json_body(districts[i] for i in ids), generation
+        )
+
+
+boundary_cache = BoundaryCache()
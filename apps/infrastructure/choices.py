@@ -76,4 +76,14 @@ SUPPORT_PROPERTY = (
 TYPE_AREA = (
     (1, 'Municipal'),
     (2, 'Rural'),
-)
\ No newline at end of file
+)
+# RESUMEN DE INVENTARIO
+ROLLUP_DIMENSION = (
+    ('luminaire_tech', 'Luminarias por tecnología'),
+    ('luminaire_power', 'Luminarias por potencia'),
+    ('luminaire_type', 'Luminarias por tipo'),
+    ('luminaire_brand', 'Luminarias por fabricante'),
+    ('luminaire_status', 'Luminarias por estado'),
+    ('support_material', 'Apoyos por material'),
+    ('support_status', 'Apoyos por estado'),
+)
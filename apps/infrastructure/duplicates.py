@@ -0,0 +1,170 @@
+# standard library
+import math
+from collections import defaultdict
+
+# Django
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db import transaction
+from django.db.models import Q
+
+# local Django
+from apps.infrastructure.models import Node
+from apps.infrastructure.tiles import invalidate_node_tiles
+
+
+"""
+    Detección de nodos duplicados (postes levantados dos veces).
+
+    Los puntos se proyectan a metros (equirectangular local) y se agrupan en una
+    grilla hash con celdas del tamaño del radio: cada punto sólo se compara con los
+    de su celda y las 8 vecinas, por lo que el recorrido de toda la tabla es lineal
+    en la práctica. La distancia final se mide con haversine.
+"""
+
+
+DEFAULT_RADIUS = getattr(settings, "NODE_DUPLICATE_RADIUS", 3.0)
+EARTH_RADIUS = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180.0
+
+
+def haversine(lng1, lat1, lng2, lat2):
+    """Distancia en metros entre dos puntos WGS84."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+class SpatialHash:
+    """
+    Grilla hash de puntos (id, lng, lat, payload) para búsquedas por radio en metros.
+    ref_lat fija la escala este-oeste; en el área de una ciudad el error es despreciable.
+    """
+
+    def __init__(self, radius, ref_lat=0.0):
+        self.radius = float(radius)
+        self.kx = METERS_PER_DEGREE * math.cos(math.radians(ref_lat)) / self.radius
+        self.ky = METERS_PER_DEGREE / self.radius
+        self.cells = defaultdict(list)
+
+    def _cell(self, lng, lat):
+        return int(math.floor(lng * self.kx)), int(math.floor(lat * self.ky))
+
+    def add(self, item_id, lng, lat, payload=None):
+        self.cells[self._cell(lng, lat)].append((item_id, lng, lat, payload))
+
+    def nearby(self, lng, lat, radius=None):
+        """Elementos a menos de `radius` metros (por defecto el de la grilla) con su distancia."""
+        radius = self.radius if radius is None else radius
+        cx, cy = self._cell(lng, lat)
+        reach = max(1, int(math.ceil(radius / self.radius)))
+        found = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for item in self.cells.get((cx + dx, cy + dy), ()):
+                    distance = haversine(lng, lat, item[1], item[2])
+                    if distance <= radius:
+                        found.append((item, distance))
+        return found
+
+
+def find_duplicate_pairs(points, radius=DEFAULT_RADIUS, same_code=False):
+    """
+    points: iterable de (id, lng, lat, painting_code).
+    Devuelve la lista de pares (id_a, id_b, distancia) con id_a < id_b.
+    Se inserta y consulta en la misma pasada, así cada par se evalúa una sola vez.
+    """
+    grid = None
+    pairs = []
+    for node_id, lng, lat, painting_code in points:
+        if grid is None:
+            grid = SpatialHash(radius, ref_lat=lat)
+        for (other_id, _, _, other_code), distance in grid.nearby(lng, lat):
+            if same_code and other_code != painting_code:
+                continue
+            pairs.append((min(node_id, other_id), max(node_id, other_id), distance))
+        grid.add(node_id, lng, lat, painting_code)
+    return pairs
+
+
+def _node_points(queryset):
+    for node_id, location, painting_code in queryset.values_list("id", "location", "painting_code").iterator(chunk_size=5000):
+        if location is not None:
+            yield node_id, location.x, location.y, painting_code
+
+
+def detect_duplicate_nodes(radius=DEFAULT_RADIUS, same_code=False, batch_size=1000):
+    """
+    Recorre todos los nodos y deja is_duplicated=True en los que tienen otro nodo a
+    menos de `radius` metros (con el mismo painting_code si same_code), False en el
+    resto. Sólo actualiza las filas cuyo valor cambia.
+    """
+    locations = {}
+    flagged = set()
+
+    def points():
+        queryset = Node.objects.values_list("id", "location", "painting_code", "is_duplicated")
+        for node_id, location, painting_code, is_duplicated in queryset.iterator(chunk_size=5000):
+            if is_duplicated:
+                flagged.add(node_id)
+            if location is None:
+                continue
+            locations[node_id] = (location.x, location.y)
+            yield node_id, location.x, location.y, painting_code
+
+    pairs = find_duplicate_pairs(points(), radius=radius, same_code=same_code)
+    duplicated = {node_id for a, b, _ in pairs for node_id in (a, b)}
+
+    to_set = sorted(duplicated - flagged)
+    to_clear = sorted(flagged - duplicated)
+    with transaction.atomic():
+        for ids, value in ((to_set, True), (to_clear, False)):
+            for i in range(0, len(ids), batch_size):
+                Node.objects.filter(id__in=ids[i:i + batch_size]).update(is_duplicated=value)
+
+    # is_duplicated va en los tiles
+    changed = [locations[node_id] for node_id in to_set + to_clear if node_id in locations]
+    if changed:
+        transaction.on_commit(lambda: invalidate_node_tiles(changed))
+
+    return {
+        "pairs": len(pairs),
+        "duplicated": len(duplicated),
+        "flagged": len(to_set),
+        "cleared": len(to_clear),
+    }
+
+
+def _envelope(lng, lat, radius):
+    dy = radius / METERS_PER_DEGREE
+    dx = dy / max(math.cos(math.radians(lat)), 1e-6)
+    return Polygon.from_bbox((lng - dx, lat - dy, lng + dx, lat + dy))
+
+
+def find_nearby_nodes(points, radius=DEFAULT_RADIUS, exclude_ids=()):
+    """
+    Vecinos a menos de `radius` metros de cada punto (lng, lat).
+    Consulta la base con el bbox de cada punto (índice espacial) y filtra con la grilla.
+    Devuelve una lista (en el orden de points) de listas [(id, painting_code, distancia)].
+    """
+    points = list(points)
+    if not points:
+        return []
+
+    condition = Q()
+    for lng, lat in points:
+        condition |= Q(location__intersects=_envelope(lng, lat, radius))
+
+    grid = SpatialHash(radius, ref_lat=points[0][1])
+    for node_id, lng, lat, painting_code in _node_points(Node.objects.filter(condition).exclude(id__in=exclude_ids)):
+        grid.add(node_id, lng, lat, painting_code)
+
+    return [
+        sorted(
+            ((item[0], item[3], round(distance, 2)) for item, distance in grid.nearby(lng, lat)),
+            key=lambda n: n[2],
+        )
+        for lng, lat in points
+    ]
@@ -0,0 +1,208 @@
+# standard library
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+# local Django
+from apps.infrastructure.models import ApBox, Luminaire, Net, Node, Support, Trafo
+
+
+"""
+    Exportación del inventario en flujo (CSV, GeoJSON y GeoJSON por líneas).
+
+    Las filas se leen con values_list() sobre un cursor del lado del servidor
+    (iterator(chunk_size=...)) y se escriben en bloques, de modo que la memoria se
+    mantiene constante y el primer byte sale de inmediato.
+"""
+
+
+CHUNK_SIZE = 2000
+FLUSH_ROWS = 500
+
+
+def _choices(model, field):
+    return dict(model._meta.get_field(field).flatchoices)
+
+
+# nombre -> (modelo, lookup de la geometría, [(columna, lookup, choices o None)])
+EXPORTS = {
+    "nodes": (Node, "location", [
+        ("id", "id", None),
+        ("painting_code", "painting_code", None),
+        ("address", "address", None),
+        ("observation", "observation", None),
+        ("is_duplicated", "is_duplicated", None),
+        ("district", "fk_district__name", None),
+        ("comuna", "fk_district__fk_comuna__name", None),
+        ("date_creation", "date_creation", None),
+    ]),
+    "trafos": (Trafo, "fk_node__location", [
+        ("id", "id", None),
+        ("code", "code", None),
+        ("fk_node", "fk_node_id", None),
+        ("painting_code", "fk_node__painting_code", None),
+        ("owner", "owner", _choices(Trafo, "owner")),
+        ("type", "type", _choices(Trafo, "type")),
+        ("installationtype", "installationtype", _choices(Trafo, "installationtype")),
+        ("using", "using", _choices(Trafo, "using")),
+        ("power", "power__power", None),
+        ("status", "status", _choices(Trafo, "status")),
+        ("district", "fk_node__fk_district__name", None),
+        ("comuna", "fk_node__fk_district__fk_comuna__name", None),
+    ]),
+    "luminaires": (Luminaire, "fk_node__location", [
+        ("id", "id", None),
+        ("code", "code", None),
+        ("fk_node", "fk_node_id", None),
+        ("painting_code", "fk_node__painting_code", None),
+        ("setting", "fk_setting__name", None),
+        ("power", "fk_setting__power", None),
+        ("opticprotection", "fk_opticprotection__name", None),
+        ("photocell", "fk_photocell__name", None),
+        ("lightedspace", "fk_lightedspace__name", None),
+        ("armtype", "fk_armtype__name", None),
+        ("support", "fk_support__name", None),
+        ("trafo", "fk_trafo__code", None),
+        ("brand", "fk_brand__name", None),
+        ("height", "height", None),
+        ("financing", "financing", None),
+        ("date_installation", "date_installation", None),
+        ("status", "status", _choices(Luminaire, "status")),
+        ("district", "fk_node__fk_district__name", None),
+        ("comuna", "fk_node__fk_district__fk_comuna__name", None),
+    ]),
+    "supports": (Support, "fk_node__location", [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("painting_code", "fk_node__painting_code", None),
+        ("setting", "fk_setting__name", None),
+        ("trafo", "fk_trafo__code", None),
+        ("cimentation", "fk_cimentation__name", None),
+        ("owner", "owner", _choices(Support, "owner")),
+        ("financing", "financing", None),
+        ("status", "status", _choices(Support, "status")),
+        ("district", "fk_node__fk_district__name", None),
+        ("comuna", "fk_node__fk_district__fk_comuna__name", None),
+    ]),
+    "apboxes": (ApBox, "fk_node__location", [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("painting_code", "fk_node__painting_code", None),
+        ("trafo", "fk_trafo__code", None),
+        ("type", "type", _choices(ApBox, "type")),
+        ("owner", "owner", _choices(ApBox, "owner")),
+        ("status", "status", _choices(ApBox, "status")),
+        ("district", "fk_node__fk_district__name", None),
+        ("comuna", "fk_node__fk_district__fk_comuna__name", None),
+    ]),
+    "nets": (Net, "current_node__location", [
+        ("id", "id", None),
+        ("trafo", "fk_trafo__code", None),
+        ("last_node", "last_node_id", None),
+        ("current_node", "current_node_id", None),
+        ("typeinstallation", "typeinstallation", _choices(Net, "typeinstallation")),
+        ("conductor", "conductor", _choices(Net, "conductor")),
+        ("material", "fk_material__name", None),
+        ("caliber", "caliber__name", None),
+        ("length", "length", None),
+        ("setting", "setting", _choices(Net, "setting")),
+        ("surface", "surface", _choices(Net, "surface")),
+        ("status", "status", _choices(Net, "status")),
+    ]),
+}
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "geojson": "application/geo+json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _rows(name, queryset=None):
+    """(propiedades como lista, lng, lat) leídos con values_list sobre un cursor del servidor."""
+    model, geometry, columns = EXPORTS[name]
+    queryset = model.objects.all() if queryset is None else queryset
+    lookups = [lookup for _, lookup, _ in columns] + [geometry]
+    displays = [choices for _, _, choices in columns]
+    for row in queryset.order_by("id").values_list(*lookups).iterator(chunk_size=CHUNK_SIZE):
+        point = row[-1]
+        values = [
+            choices.get(value, value) if choices else _plain(value)
+            for value, choices in zip(row[:-1], displays)
+        ]
+        yield values, (point.x if point else None), (point.y if point else None)
+
+
+def stream_csv(name, queryset=None):
+    columns = [column for column, _, _ in EXPORTS[name][2]] + ["lng", "lat"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("﻿")
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+    pending = 0
+    for values, lng, lat in _rows(name, queryset):
+        writer.writerow(["" if v is None else v for v in values] + [lng, lat])
+        pending += 1
+        if pending >= FLUSH_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def _feature(columns, values, lng, lat):
+    return json.dumps({
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lng, lat]} if lng is not None else None,
+        "properties": dict(zip(columns, values)),
+    }, ensure_ascii=False, default=str)
+
+
+def stream_geojson(name, queryset=None):
+    columns = [column for column, _, _ in EXPORTS[name][2]]
+    yield '{"type": "FeatureCollection", "features": [\n'
+    chunk = []
+    first = True
+    for values, lng, lat in _rows(name, queryset):
+        chunk.append(_feature(columns, values, lng, lat))
+        if len(chunk) >= FLUSH_ROWS:
+            yield ("" if first else ",\n") + ",\n".join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ("" if first else ",\n") + ",\n".join(chunk)
+    yield "\n]}\n"
+
+
+def stream_ndjson(name, queryset=None):
+    columns = [column for column, _, _ in EXPORTS[name][2]]
+    chunk = []
+    for values, lng, lat in _rows(name, queryset):
+        chunk.append(_feature(columns, values, lng, lat))
+        if len(chunk) >= FLUSH_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+STREAMS = {
+    "csv": stream_csv,
+    "geojson": stream_geojson,
+    "ndjson": stream_ndjson,
+}
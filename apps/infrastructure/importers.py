@@ -0,0 +1,540 @@
+# standard library
+import csv
+import io
+import json
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+# Django
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.db import connection, transaction
+from django.db.models import ForeignKey
+
+# local Django
+from apps.core.imports import ImportJobRunner
+from apps.core.models import ImportJob
+from apps.infrastructure.loads import invalidate_trafo_loads
+from apps.infrastructure.models import PAINTING_CODE_REGEX, ApBox, Luminaire, Node, Support, Trafo
+from apps.infrastructure.rollups import mark_districts_dirty
+from apps.infrastructure.search import address_index, normalize_address, painting_code_index
+from apps.infrastructure.spatial import district_resolver
+from apps.infrastructure.tiles import clear_node_tiles
+from apps.utils.csv_to_dict import csv_iter_rows
+
+
+"""
+    Importación masiva de levantamientos de campo (Nodos con su infraestructura).
+
+    Formatos soportados:
+    - CSV: columnas lat, lng, painting_code, address, observation y, opcionalmente,
+      trafos, luminaires, supports, apboxes con un arreglo JSON por celda.
+    - GeoJSON (FeatureCollection) o GeoJSON por líneas (.geojsonl/.ndjson): geometría
+      Point y las mismas llaves en properties (los arreglos como listas nativas).
+
+    Cada elemento anidado usa los nombres de campo del modelo con ids de catálogo
+    (p.ej. {"fk_setting": 3, "fk_opticprotection": 1, ...}); la llave "trafo" referencia
+    un transformador por código (existente o creado en el mismo archivo).
+
+    El archivo se procesa en bloques: el barrio se asigna en lote con el índice en
+    memoria, cada bloque se inserta en una transacción (COPY en PostgreSQL,
+    bulk_create en los demás motores) y el historial se escribe en bloque. Las filas
+    inválidas se escriben en un archivo de rechazos con el motivo.
+
+    Desde el admin el levantamiento se encola como un ImportJob (NodeSurveyJobRunner)
+    que procesa el servicio run_import_jobs, con el progreso en la página del trabajo.
+"""
+
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_CHUNK_SIZE = 10000
+
+# Modelo, llave en el registro y campos obligatorios de cada elemento anidado
+CHILD_SPECS = (
+    ("trafos", Trafo, ("code", "owner", "type", "installationtype", "using")),
+    ("luminaires", Luminaire, ("fk_setting", "fk_opticprotection", "fk_photocell", "fk_armtype")),
+    ("supports", Support, ("fk_setting", "fk_cimentation")),
+    ("apboxes", ApBox, ("type", "owner")),
+)
+# Campos que nunca se toman del archivo
+EXCLUDED_FIELDS = {
+    "id", "fk_node", "fk_trafo", "fk_photocell_smart",
+    "user_creation", "user_updated", "date_creation", "date_updated",
+}
+
+
+LINE_DELIMITED = (".geojsonl", ".geojsons", ".ndjson", ".jsonl")
+
+
+class RejectedRow(Exception):
+    pass
+
+
+def iter_geojson_features(path, buffer_size=1 << 16):
+    """
+    Recorre las features de una FeatureCollection sin cargar el documento completo:
+    se decodifica una feature a la vez sobre un buffer de lectura.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer = ""
+        eof = False
+        while '"features"' not in buffer or "[" not in buffer[buffer.find('"features"'):]:
+            chunk = f.read(buffer_size)
+            if not chunk:
+                raise ValueError("El archivo no es una FeatureCollection válida.")
+            buffer += chunk
+        position = buffer.index("[", buffer.index('"features"')) + 1
+
+        index = 0
+        while True:
+            # Saltar separadores entre features, leyendo más si el buffer se agota
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                if eof:
+                    return
+                chunk = f.read(buffer_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            if buffer[position] == "]":
+                return
+
+            try:
+                feature, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(buffer_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+
+            index += 1
+            yield index, feature
+            buffer, position = buffer[end:], 0
+
+
+def iter_geojson_lines(path):
+    """GeoJSON por líneas (.geojsonl/.ndjson): una feature por línea."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if line:
+                yield line_number, json.loads(line)
+
+
+def iter_survey_records(path):
+    """Normaliza CSV/GeoJSON a tuplas (línea, registro) con lat, lng y listas anidadas."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        for line, row in csv_iter_rows(path):
+            yield line, dict(row)
+        return
+
+    features = iter_geojson_lines(path) if extension in LINE_DELIMITED else iter_geojson_features(path)
+    for index, feature in features:
+        properties = dict(feature.get("properties") or {})
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Point" and len(geometry.get("coordinates") or []) >= 2:
+            properties["lng"], properties["lat"] = geometry["coordinates"][:2]
+        yield index, properties
+
+
+class NodeSurveyImporter:
+    """
+    Importa un levantamiento de campo por bloques.
+
+    Uso:
+        importer = NodeSurveyImporter(user=user, chunk_size=2000, progress=callback)
+        stats = importer.run("/ruta/levantamiento.csv", reject_path="/ruta/rechazos.csv")
+    """
+
+    def __init__(self, user=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, use_copy=None):
+        self.user = user
+        self.chunk_size = max(1, int(chunk_size))
+        self.progress = progress
+        self.use_copy = connection.vendor == "postgresql" if use_copy is None else use_copy
+        self._catalogs = {}
+        self._luminaire_codes = set()
+        self.stats = {"read": 0, "nodes": 0, "rejected": 0, "children": {}, "elapsed": 0.0}
+
+    # ------------------------------------------------------------------
+    # Validación
+    # ------------------------------------------------------------------
+    def _catalog(self, model):
+        """Ids válidos de una tabla de catálogo (se cargan una sola vez)."""
+        if model not in self._catalogs:
+            self._catalogs[model] = set(model.objects.values_list("pk", flat=True))
+        return self._catalogs[model]
+
+    @staticmethod
+    def _parse_list(value, key):
+        if value in (None, ""):
+            return []
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                raise RejectedRow(f"'{key}' no es un arreglo JSON válido.")
+        if isinstance(value, dict):
+            value = [value]
+        if not isinstance(value, list) or not all(isinstance(v, dict) for v in value):
+            raise RejectedRow(f"'{key}' debe ser una lista de objetos.")
+        return value
+
+    def _build_child(self, model, data, required):
+        values = {}
+        trafo_code = data.get("trafo")
+        for key, raw in data.items():
+            if key == "trafo":
+                continue
+            name = key[:-3] if key.endswith("_id") else key
+            if name in EXCLUDED_FIELDS:
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except Exception:
+                raise RejectedRow(f"{model._meta.verbose_name}: campo desconocido '{key}'.")
+
+            if raw in (None, ""):
+                values[field.attname] = None
+                continue
+            if isinstance(field, ForeignKey):
+                try:
+                    pk = int(raw)
+                except (TypeError, ValueError):
+                    raise RejectedRow(f"{model._meta.verbose_name}: '{key}' debe ser un id numérico.")
+                if pk not in self._catalog(field.related_model):
+                    raise RejectedRow(f"{model._meta.verbose_name}: {field.verbose_name} #{pk} no existe.")
+                values[field.attname] = pk
+                continue
+            try:
+                value = field.to_python(raw)
+            except Exception:
+                raise RejectedRow(f"{model._meta.verbose_name}: valor inválido para '{key}'.")
+            if field.choices and value not in {c[0] for c in field.choices}:
+                raise RejectedRow(f"{model._meta.verbose_name}: opción inválida '{raw}' para '{key}'.")
+            values[field.attname] = value
+
+        missing = [name for name in required if values.get(model._meta.get_field(name).attname) is None]
+        if missing:
+            raise RejectedRow(f"{model._meta.verbose_name}: faltan campos obligatorios {', '.join(missing)}.")
+        return values, (str(trafo_code).strip() if trafo_code not in (None, "") else None)
+
+    def _parse_record(self, record):
+        try:
+            lat = float(record.get("lat"))
+            lng = float(record.get("lng"))
+        except (TypeError, ValueError):
+            raise RejectedRow("Coordenadas inválidas (lat/lng).")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise RejectedRow("Coordenadas fuera de rango.")
+
+        painting_code = str(record.get("painting_code") or "").strip()
+        if not PAINTING_CODE_REGEX.match(painting_code):
+            raise RejectedRow("El código pintado debe tener exactamente 7 dígitos numéricos.")
+
+        parsed = {
+            "lng": lng,
+            "lat": lat,
+            "painting_code": int(painting_code),
+            "address": (str(record.get("address") or "").strip() or None),
+            "observation": (str(record.get("observation") or "").strip() or None),
+            "children": {},
+        }
+        for key, model, required in CHILD_SPECS:
+            parsed["children"][key] = [
+                self._build_child(model, item, required)
+                for item in self._parse_list(record.get(key), key)
+            ]
+        return parsed
+
+    # ------------------------------------------------------------------
+    # Inserción
+    # ------------------------------------------------------------------
+    def _stamp(self, obj):
+        # Las fechas las asigna auto_now/auto_now_add (pre_save) al insertar
+        if self.user is not None:
+            obj.user_creation = self.user
+
+    @staticmethod
+    def _copy_text(value):
+        if value is None:
+            return "\\N"
+        if isinstance(value, GEOSGeometry):
+            return value.ewkt
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return format(value, "f")
+        return str(value)
+
+    def _copy_insert(self, model, objs):
+        """INSERT vía COPY con ids tomados por adelantado de la secuencia de la tabla."""
+        meta = model._meta
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                [quote(meta.db_table), meta.pk.column, len(objs)],
+            )
+            for obj, (pk,) in zip(objs, cursor.fetchall()):
+                obj.pk = pk
+
+            fields = meta.concrete_fields
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for obj in objs:
+                writer.writerow([self._copy_text(f.pre_save(obj, True)) for f in fields])
+            buffer.seek(0)
+
+            columns = ", ".join(quote(f.column) for f in fields)
+            sql = f"COPY {quote(meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            if hasattr(cursor, "copy_expert"):
+                cursor.copy_expert(sql, buffer)  # psycopg2
+            else:
+                with cursor.copy(sql) as copy:  # psycopg 3
+                    copy.write(buffer.getvalue())
+
+        for obj in objs:
+            obj._state.adding = False
+            obj._state.db = connection.alias
+
+    def _insert(self, model, objs):
+        if not objs:
+            return
+        if self.use_copy:
+            self._copy_insert(model, objs)
+        else:
+            if not connection.features.can_return_rows_from_bulk_insert:
+                raise NotImplementedError("El motor de base de datos no devuelve ids en bulk_create.")
+            model.objects.bulk_create(objs, batch_size=1000)
+        model.historical.bulk_history_create(objs, default_user=self.user)
+
+    def _existing_codes(self, model, codes):
+        if not codes:
+            return {}
+        return dict(model.objects.filter(code__in=codes).values_list("code", "id"))
+
+    @transaction.atomic
+    def _write_chunk(self, records):
+        """Inserta un bloque ya validado. records: lista de (línea, raw, parsed)."""
+        # Barrios en lote con el índice en memoria
+        districts = district_resolver.resolve_many([(p["lng"], p["lat"]) for _, _, p in records])
+
+        nodes = []
+        for (_, _, parsed), district_id in zip(records, districts):
+            node = Node(
+                painting_code=parsed["painting_code"],
+                location=Point(parsed["lng"], parsed["lat"], srid=4326),
+                fk_district_id=district_id,
+                address=parsed["address"],
+                address_search=normalize_address(parsed["address"]) or None,
+                observation=parsed["observation"],
+            )
+            self._stamp(node)
+            nodes.append(node)
+        self._insert(Node, nodes)
+        # bulk_create/COPY no disparan señales: el resumen de inventario se marca a mano
+        mark_districts_dirty({node.fk_district_id for node in nodes})
+
+        # Transformadores: se reutilizan por código; los nuevos se crean antes que sus dependientes
+        trafo_ids = self._existing_codes(
+            Trafo, {v["code"] for _, _, p in records for v, _ in p["children"]["trafos"]}
+        )
+        new_trafos = []
+        for node, (_, _, parsed) in zip(nodes, records):
+            for values, _ in parsed["children"]["trafos"]:
+                if values["code"] in trafo_ids:
+                    continue
+                trafo = Trafo(**values, fk_node_id=node.pk)
+                self._stamp(trafo)
+                trafo_ids[values["code"]] = None
+                new_trafos.append(trafo)
+        self._insert(Trafo, new_trafos)
+        trafo_ids.update({t.code: t.pk for t in new_trafos})
+
+        referenced = {
+            code for _, _, p in records for key in ("luminaires", "supports", "apboxes")
+            for _, code in p["children"][key] if code and code not in trafo_ids
+        }
+        trafo_ids.update(self._existing_codes(Trafo, referenced))
+
+        for key, model, _ in CHILD_SPECS[1:]:
+            objs = []
+            for node, (line, _, parsed) in zip(nodes, records):
+                for values, trafo_code in parsed["children"][key]:
+                    if trafo_code and trafo_ids.get(trafo_code) is None:
+                        raise RejectedRow(f"Línea {line}: el transformador '{trafo_code}' no existe.")
+                    obj = model(**values, fk_node_id=node.pk, fk_trafo_id=trafo_ids.get(trafo_code))
+                    self._stamp(obj)
+                    objs.append(obj)
+            self._insert(model, objs)
+            if model is Luminaire:
+                loaded = {obj.fk_trafo_id for obj in objs if obj.fk_trafo_id}
+                transaction.on_commit(lambda: invalidate_trafo_loads(loaded))
+            self.stats["children"][key] = self.stats["children"].get(key, 0) + len(objs)
+        self.stats["children"]["trafos"] = self.stats["children"].get("trafos", 0) + len(new_trafos)
+        return nodes
+
+    def _check_trafo_codes(self, valid, reject_writer):
+        """
+        Rechaza las filas cuyos elementos referencian un transformador que no existe
+        ni se crea en el bloque, antes de abrir su transacción. Se repite porque una
+        fila rechazada puede llevarse un trafo del que dependían otras.
+        """
+        while valid:
+            defined = {v["code"] for _, _, p in valid for v, _ in p["children"]["trafos"]}
+            referenced = {
+                code for _, _, p in valid for key in ("luminaires", "supports", "apboxes")
+                for _, code in p["children"][key] if code and code not in defined
+            }
+            known = defined | set(self._existing_codes(Trafo, referenced))
+            kept = []
+            for line, raw, parsed in valid:
+                missing = [
+                    code for key in ("luminaires", "supports", "apboxes")
+                    for _, code in parsed["children"][key] if code and code not in known
+                ]
+                if missing:
+                    self._reject(reject_writer, line, raw, f"El transformador '{missing[0]}' no existe.")
+                else:
+                    kept.append((line, raw, parsed))
+            if len(kept) == len(valid):
+                return kept
+            valid = kept
+        return valid
+
+    def _process_chunk(self, chunk, reject_writer):
+        valid = []
+        chunk_codes = set()
+        for line, raw in chunk:
+            try:
+                parsed = self._parse_record(raw)
+                # Códigos de luminaria únicos en todo el archivo (bloques ya confirmados y este)
+                codes = [v["code"] for v, _ in parsed["children"]["luminaires"] if v.get("code") is not None]
+                repeated = [
+                    c for c in codes if c in self._luminaire_codes or c in chunk_codes or codes.count(c) > 1
+                ]
+                if repeated:
+                    raise RejectedRow(f"Código de luminaria {repeated[0]} repetido en el archivo.")
+                chunk_codes.update(codes)
+                valid.append((line, raw, parsed))
+            except RejectedRow as e:
+                self._reject(reject_writer, line, raw, str(e))
+
+        taken = set(Luminaire.objects.filter(code__in=chunk_codes).values_list("code", flat=True)) if chunk_codes else set()
+        if taken:
+            kept = []
+            for line, raw, parsed in valid:
+                duplicated = [v["code"] for v, _ in parsed["children"]["luminaires"] if v.get("code") in taken]
+                if duplicated:
+                    self._reject(reject_writer, line, raw, f"Código de luminaria {duplicated[0]} ya existe.")
+                else:
+                    kept.append((line, raw, parsed))
+            valid = kept
+
+        valid = self._check_trafo_codes(valid, reject_writer)
+        if not valid:
+            return
+        try:
+            self._write_chunk(valid)
+            self.stats["nodes"] += len(valid)
+            self._luminaire_codes.update(
+                v["code"] for _, _, p in valid for v, _ in p["children"]["luminaires"] if v.get("code") is not None
+            )
+        except Exception as e:
+            # La transacción del bloque se revirtió: todas sus filas quedan rechazadas
+            for line, raw, _ in valid:
+                self._reject(reject_writer, line, raw, f"Bloque revertido: {e}")
+
+    def _reject(self, writer, line, raw, error):
+        self.stats["rejected"] += 1
+        if writer is not None:
+            writer.writerow([line, error, json.dumps(raw, ensure_ascii=False, default=str)])
+
+    def run(self, path, reject_path=None):
+        start_time = time.time()
+        reject_file = open(reject_path, "w", encoding="utf-8", newline="") if reject_path else None
+        reject_writer = csv.writer(reject_file) if reject_file else None
+        if reject_writer:
+            reject_writer.writerow(["linea", "error", "registro"])
+
+        try:
+            chunk = []
+            for line, record in iter_survey_records(path):
+                self.stats["read"] += 1
+                chunk.append((line, record))
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk, reject_writer)
+                    chunk = []
+                    self._report(start_time)
+            if chunk:
+                self._process_chunk(chunk, reject_writer)
+                self._report(start_time)
+        finally:
+            if reject_file:
+                reject_file.close()
+
+        if self.stats["nodes"]:
+            clear_node_tiles()
+            painting_code_index.invalidate()
+            address_index.invalidate()
+        self.stats["elapsed"] = time.time() - start_time
+        return self.stats
+
+    def _report(self, start_time):
+        self.stats["elapsed"] = time.time() - start_time
+        if self.progress:
+            self.progress(dict(self.stats))
+
+
+# Nombre de cada elemento anidado en el resumen del trabajo
+CHILD_LABELS = {"trafos": "trafos", "luminaires": "luminarias", "supports": "apoyos", "apboxes": "cajas AP"}
+
+
+class NodeSurveyJobRunner(ImportJobRunner):
+    """
+    Procesa un ImportJob de levantamiento: filas leídas, nodos creados y filas
+    rechazadas se actualizan tras cada bloque; los rechazos quedan como reporte de errores.
+    """
+
+    def __init__(self, job, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.job = job
+        self.chunk_size = min(job.chunk_size or chunk_size, MAX_CHUNK_SIZE)
+
+    @staticmethod
+    def _counts(stats):
+        return {"processed_rows": stats["read"], "new_rows": stats["nodes"], "error_rows": stats["rejected"]}
+
+    def _progress(self, stats):
+        # date_updated es el latido del trabajo (ver reclaim_stale_import_jobs)
+        ImportJob.objects.filter(pk=self.job.pk).update(date_updated=datetime.now(), **self._counts(stats))
+
+    def run(self):
+        path = self.job.file.path
+        # Una pasada de sólo lectura para conocer el total y mostrar el avance
+        total = sum(1 for _ in iter_survey_records(path))
+        ImportJob.objects.filter(pk=self.job.pk).update(total_rows=total)
+
+        reject_name, reject_path = self._report_path("rechazos")
+        importer = NodeSurveyImporter(user=self.job.user_creation, chunk_size=self.chunk_size, progress=self._progress)
+        stats = importer.run(path, reject_path=reject_path)
+
+        children = ", ".join(
+            f"{CHILD_LABELS[key]}: {count}" for key, count in sorted(stats["children"].items()) if count
+        )
+        message = f"Nodos creados: {stats['nodes']}" + (f"; {children}" if children else "")
+        message += f". Filas rechazadas: {stats['rejected']}. Duración: {stats['elapsed']:.1f} s."
+        ImportJob.objects.filter(pk=self.job.pk).update(
+            status=ImportJob.DONE,
+            error_report=reject_name if stats["rejected"] else None,
+            message=message,
+            date_finished=datetime.now(),
+            **self._counts(stats),
+        )
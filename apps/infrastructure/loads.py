@@ -0,0 +1,112 @@
+# standard library
+import math
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+
+# third-party
+import numpy as np
+
+# local Django
+from apps.infrastructure.models import Luminaire, Trafo
+
+
+"""
+    Carga de alumbrado conectada a cada transformador.
+
+    Las luminarias (fk_trafo, potencia de su configuración, estado) se cargan una vez
+    en arreglos NumPy y se agregan por transformador en una sola pasada vectorizada
+    (np.unique + np.bincount). El resultado de cada trafo se guarda en la caché
+    compartida (CACHES, común a todos los procesos) y sólo se invalida para los
+    trafos cuyas luminarias, potencia nominal o potencia de catálogo cambian.
+    La caché es el alias CACHE_ALIAS (dimensionada para todos los trafos), no default.
+"""
+
+
+CACHE_SECONDS = getattr(settings, "TRAFO_LOAD_CACHE_SECONDS", 86400)
+CACHE_PREFIX = "trafo_load:"
+CACHE_ALIAS = "trafo_loads"
+# Estado "Malo": la luminaria no consume (ver choices.STATUS)
+STATUS_DAMAGED = 1
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _cache_key(trafo_id):
+    return f"{CACHE_PREFIX}{trafo_id}"
+
+
+def compute_trafo_loads(trafo_ids):
+    """
+    Calcula la carga de los trafos indicados. Devuelve {trafo_id: dict} con:
+    luminaires, luminaires_on, connected_kw, operating_kw, capacity_kw, utilization.
+    """
+    trafo_ids = np.fromiter((int(t) for t in trafo_ids), dtype=np.int64)
+    if trafo_ids.size == 0:
+        return {}
+
+    rows = list(
+        Luminaire.objects
+        .filter(fk_trafo_id__in=trafo_ids.tolist())
+        .values_list("fk_trafo_id", "fk_setting__power", "status")
+    )
+    luminaire_trafo = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    power = np.fromiter((float(r[1] or 0) for r in rows), dtype=np.float64, count=len(rows))
+    status = np.fromiter((r[2] or 0 for r in rows), dtype=np.int16, count=len(rows))
+
+    # Posición de cada luminaria en el arreglo de trafos solicitados
+    trafo_ids = np.unique(trafo_ids)
+    index = np.searchsorted(trafo_ids, luminaire_trafo)
+    size = trafo_ids.size
+    on = status != STATUS_DAMAGED
+
+    count = np.bincount(index, minlength=size)
+    count_on = np.bincount(index, weights=on, minlength=size)
+    connected_kw = np.bincount(index, weights=power, minlength=size) / 1000.0
+    operating_kw = np.bincount(index, weights=power * on, minlength=size) / 1000.0
+
+    capacities = dict(Trafo.objects.filter(id__in=trafo_ids.tolist()).values_list("id", "power__power"))
+    capacity_kw = np.array(
+        [float(capacities.get(t) or 0) / 1000.0 for t in trafo_ids.tolist()], dtype=np.float64
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(capacity_kw > 0, operating_kw / capacity_kw, np.nan)
+
+    return {
+        trafo_id: {
+            "trafo": trafo_id,
+            "luminaires": int(count[i]),
+            "luminaires_on": int(count_on[i]),
+            "connected_kw": round(float(connected_kw[i]), 3),
+            "operating_kw": round(float(operating_kw[i]), 3),
+            "capacity_kw": round(float(capacity_kw[i]), 3) if capacity_kw[i] > 0 else None,
+            "utilization": None if math.isnan(utilization[i]) else round(float(utilization[i]), 4),
+        }
+        for i, trafo_id in enumerate(trafo_ids.tolist())
+    }
+
+
+def get_trafo_loads(trafo_ids=None):
+    """Carga por trafo (todos si trafo_ids es None), tomando de caché lo ya calculado."""
+    if trafo_ids is None:
+        trafo_ids = Trafo.objects.values_list("id", flat=True)
+    trafo_ids = sorted({int(t) for t in trafo_ids})
+
+    cached = _cache().get_many([_cache_key(t) for t in trafo_ids])
+    loads = {t: cached[_cache_key(t)] for t in trafo_ids if _cache_key(t) in cached}
+
+    missing = [t for t in trafo_ids if t not in loads]
+    if missing:
+        computed = compute_trafo_loads(missing)
+        _cache().set_many({_cache_key(t): v for t, v in computed.items()}, CACHE_SECONDS)
+        loads.update(computed)
+    return [loads[t] for t in trafo_ids if t in loads]
+
+
+def invalidate_trafo_loads(trafo_ids):
+    keys = [_cache_key(t) for t in trafo_ids if t is not None]
+    if keys:
+        _cache().delete_many(keys)
@@ -0,0 +1,40 @@
+# standard library
+from datetime import datetime
+
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.infrastructure.models import Node
+from apps.infrastructure.search import address_index, normalize_address
+
+
+class Command(BaseCommand):
+    help = "Calcula Node.address_search (dirección normalizada para la búsqueda por trigramas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="Nodos por actualización")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = []
+        updated = 0
+        queryset = Node.objects.only("id", "address", "address_search", "date_updated").order_by("id")
+        for node in queryset.iterator(chunk_size=batch_size):
+            value = normalize_address(node.address) or None
+            if value != node.address_search:
+                node.address_search = value
+                # bulk_update no aplica auto_now: sin la fecha los procesos web no
+                # reconstruirían su índice de direcciones
+                node.date_updated = datetime.now()
+                pending.append(node)
+            if len(pending) >= batch_size:
+                Node.objects.bulk_update(pending, ["address_search", "date_updated"])
+                updated += len(pending)
+                pending = []
+        if pending:
+            Node.objects.bulk_update(pending, ["address_search", "date_updated"])
+            updated += len(pending)
+
+        address_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"{updated} direcciones normalizadas."))
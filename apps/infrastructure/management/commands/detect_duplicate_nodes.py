@@ -0,0 +1,20 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.infrastructure.duplicates import DEFAULT_RADIUS, detect_duplicate_nodes
+
+
+class Command(BaseCommand):
+    help = "Marca Node.is_duplicated en los nodos que tienen otro nodo a menos de N metros."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS, help="Distancia máxima en metros")
+        parser.add_argument("--same-code", action="store_true", help="Exigir además el mismo código pintado")
+
+    def handle(self, *args, **options):
+        stats = detect_duplicate_nodes(radius=options["radius"], same_code=options["same_code"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['pairs']} pares encontrados, {stats['duplicated']} nodos duplicados "
+            f"({stats['flagged']} nuevos, {stats['cleared']} desmarcados)."
+        ))
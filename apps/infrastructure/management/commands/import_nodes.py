@@ -0,0 +1,49 @@
+# standard library
+import os
+
+# Django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+# local Django
+from apps.infrastructure.importers import DEFAULT_CHUNK_SIZE, NodeSurveyImporter
+
+
+class Command(BaseCommand):
+    help = "Importa un levantamiento de Nodos con su infraestructura (CSV, GeoJSON o GeoJSON por líneas)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Ruta del archivo a importar")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Registros por transacción")
+        parser.add_argument("--user", help="Usuario (username) que figura como creador")
+        parser.add_argument("--rejects", help="Ruta del CSV de filas rechazadas (por defecto <archivo>.rechazos.csv)")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        if not os.path.isfile(path):
+            raise CommandError(f"No existe el archivo {path}")
+
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"No existe el usuario {options['user']}")
+
+        reject_path = options["rejects"] or f"{os.path.splitext(path)[0]}.rechazos.csv"
+
+        def progress(stats):
+            self.stdout.write(
+                f"Leídos {stats['read']} | importados {stats['nodes']} | rechazados {stats['rejected']} "
+                f"| {stats['elapsed']:.1f}s"
+            )
+
+        importer = NodeSurveyImporter(user=user, chunk_size=options["chunk_size"], progress=progress)
+        stats = importer.run(path, reject_path=reject_path)
+
+        children = ", ".join(f"{k}: {v}" for k, v in sorted(stats["children"].items())) or "ninguno"
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada: {stats['nodes']} nodos ({children}) en {stats['elapsed']:.1f}s."
+        ))
+        if stats["rejected"]:
+            self.stdout.write(self.style.WARNING(f"{stats['rejected']} registros rechazados, ver {reject_path}"))
@@ -0,0 +1,28 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# local Django
+from apps.infrastructure.models import District
+from apps.infrastructure.reassignment import reassign_node_districts
+
+
+class Command(BaseCommand):
+    help = "Recalcula el Barrio de los nodos sin barrio y, opcionalmente, de los nodos dentro de ciertos barrios."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--district", type=int, action="append", default=[],
+            help="Id de un barrio cuyo polígono se debe re-evaluar (se puede repetir)",
+        )
+        parser.add_argument("--all", action="store_true", help="Recalcular todos los nodos")
+
+    def handle(self, *args, **options):
+        area = None
+        for district_id in options["district"]:
+            poly = District.objects.filter(pk=district_id).values_list("poly", flat=True).first()
+            if poly is None:
+                raise CommandError(f"No existe el barrio {district_id} o no tiene polígono.")
+            area = poly if area is None else area.union(poly)
+
+        updated = reassign_node_districts(area=area, include_orphans=True, full=options["all"])
+        self.stdout.write(self.style.SUCCESS(f"{updated} nodos reasignados."))
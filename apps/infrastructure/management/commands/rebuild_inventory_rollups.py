@@ -0,0 +1,19 @@
+# standard library
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.infrastructure.rollups import rebuild_inventory_rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero el resumen de inventario por barrio (InventoryRollup)."
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        rows = rebuild_inventory_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Resumen de inventario reconstruido: {rows} filas en {time.time() - start_time:.1f}s."
+        ))
@@ -0,0 +1,32 @@
+# standard library
+import time
+
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.infrastructure.boundaries import ZOOM_BANDS, simplify_boundaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera las geometrías simplificadas por banda de zoom (SimplifiedBoundary) "
+        "de comunas y barrios, o sólo de la capa de los indicados (la capa completa, "
+        "porque los vecinos comparten bordes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comuna", type=int, action="append", help="Id de comuna (repetible).")
+        parser.add_argument("--district", type=int, action="append", help="Id de barrio (repetible).")
+
+    def handle(self, *args, **options):
+        comuna_ids, district_ids = options["comuna"], options["district"]
+        if comuna_ids or district_ids:
+            comuna_ids, district_ids = comuna_ids or [], district_ids or []
+
+        start_time = time.time()
+        created = simplify_boundaries(comuna_ids=comuna_ids, district_ids=district_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} geometrías simplificadas (bandas de zoom {', '.join(map(str, ZOOM_BANDS))}) "
+            f"en {time.time() - start_time:.1f}s."
+        ))
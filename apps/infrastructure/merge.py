@@ -0,0 +1,147 @@
+# standard library
+from datetime import datetime
+
+# Django
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+
+# django-simple-history
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.utils import get_history_manager_for_model
+
+# local Django
+from apps.infrastructure.models import Net, Node
+from apps.infrastructure.reassignment import nodes_reassigned
+from apps.infrastructure.rollups import mark_districts_dirty
+from apps.infrastructure.search import painting_code_index
+from apps.infrastructure.tiles import invalidate_node_tiles
+from apps.infrastructure.topology import network_graph
+
+
+"""
+    Fusión de nodos duplicados.
+
+    Todas las filas que apuntan a los nodos víctima (luminarias, apoyos, trafos,
+    cajas AP, redes, PQRs, ...) se re-apuntan al nodo sobreviviente con un UPDATE
+    por llave foránea dentro de una sola transacción; luego se eliminan las víctimas.
+    Las llaves foráneas se descubren desde Node._meta, así que cualquier modelo
+    nuevo que referencie a Node queda cubierto. Los tramos de red entre nodos del
+    grupo se eliminan (serían un lazo del sobreviviente consigo mismo).
+
+    Al confirmar se invalidan los tiles, el grafo de la red y el índice de códigos,
+    y se avisa (nodes_reassigned) para reconstruir los documentos de búsqueda de
+    las PQRs que ahora reportan al sobreviviente.
+"""
+
+
+BATCH_SIZE = 1000
+CHANGE_REASON = "Fusión de nodos"
+
+
+class NodeMergeError(ValueError):
+    pass
+
+
+def _node_relations():
+    """(modelo, campo) de cada llave foránea concreta que apunta a Node."""
+    for relation in Node._meta.related_objects:
+        if relation.many_to_many or not relation.concrete:
+            continue
+        yield relation.related_model, relation.field
+
+
+def _has_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _batches(ids):
+    for i in range(0, len(ids), BATCH_SIZE):
+        yield ids[i:i + BATCH_SIZE]
+
+
+@transaction.atomic
+def merge_nodes(survivor_id, victim_ids, user=None):
+    """
+    Fusiona victim_ids en survivor_id. Devuelve {"<app>.<modelo>.<campo>": filas, ..., "deleted": n}.
+    Lanza NodeMergeError si los ids no son válidos.
+    """
+    survivor_id = int(survivor_id)
+    victim_ids = sorted({int(v) for v in victim_ids} - {survivor_id})
+    if not victim_ids:
+        raise NodeMergeError("Debe indicar al menos un nodo a fusionar distinto del sobreviviente.")
+
+    # Bloquear sobreviviente y víctimas para que nadie les cuelgue infraestructura mientras tanto
+    locked = set(
+        Node.objects.select_for_update()
+        .filter(id__in=[survivor_id] + victim_ids)
+        .values_list("id", flat=True)
+    )
+    if survivor_id not in locked:
+        raise NodeMergeError(f"No existe el nodo sobreviviente #{survivor_id}.")
+    missing = [v for v in victim_ids if v not in locked]
+    if missing:
+        raise NodeMergeError(f"No existen los nodos: {', '.join(map(str, missing[:20]))}.")
+
+    # La infraestructura de las víctimas pasa al barrio del sobreviviente
+    mark_districts_dirty(
+        Node.objects.filter(id__in=[survivor_id] + victim_ids).values_list("fk_district_id", flat=True).distinct()
+    )
+
+    group = [survivor_id] + victim_ids
+    points = [
+        (location.x, location.y)
+        for location in Node.objects.filter(id__in=group).values_list("location", flat=True)
+        if location is not None
+    ]
+
+    result = {}
+    loops = Net.objects.filter(last_node_id__in=group, current_node_id__in=group)
+    if loops.exists():
+        result["infrastructure.Net.deleted"] = loops.delete()[1].get(Net._meta.label, 0)
+
+    for model, field in _node_relations():
+        lookup = {f"{field.attname}__in": victim_ids}
+        affected = list(model._default_manager.filter(**lookup).values_list("pk", flat=True))
+        if not affected:
+            continue
+
+        changes = {field.attname: survivor_id}
+        if _has_field(model, "date_updated"):
+            # update() no aplica auto_now; sin la fecha los índices en memoria de otros
+            # procesos (grafo de la red, ...) no verían el cambio
+            changes["date_updated"] = datetime.now()
+        for batch in _batches(victim_ids):
+            model._default_manager.filter(**{f"{field.attname}__in": batch}).update(**changes)
+        result[f"{model._meta.label}.{field.name}"] = len(affected)
+
+        # Historial en bloque: un registro por fila re-apuntada, en un solo INSERT por modelo
+        try:
+            history = get_history_manager_for_model(model)
+        except NotHistoricalModelError:
+            continue
+        for batch in _batches(affected):
+            history.bulk_history_create(
+                list(model._default_manager.filter(pk__in=batch)),
+                update=True,
+                default_user=user,
+                default_change_reason=CHANGE_REASON,
+            )
+
+    # Ya sin dependencias: las víctimas se eliminan (señales de historial y tiles incluidas)
+    deleted = 0
+    for batch in _batches(victim_ids):
+        deleted += Node.objects.filter(id__in=batch).delete()[1].get(Node._meta.label, 0)
+    result["deleted"] = deleted
+
+    # El sobreviviente deja de estar marcado como duplicado (el flag va en los tiles)
+    Node.objects.filter(id=survivor_id).update(is_duplicated=False, date_updated=datetime.now())
+
+    transaction.on_commit(lambda: invalidate_node_tiles(points))
+    transaction.on_commit(network_graph.invalidate)
+    transaction.on_commit(painting_code_index.invalidate)
+    transaction.on_commit(lambda: nodes_reassigned.send(sender=Node, node_ids=[survivor_id]))
+    return result
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0002_historicalluminaire_fk_photocell_smart_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('luminaire_tech', 'Luminarias por tecnología'), ('luminaire_power', 'Luminarias por potencia'), ('luminaire_type', 'Luminarias por tipo'), ('luminaire_brand', 'Luminarias por fabricante'), ('luminaire_status', 'Luminarias por estado'), ('support_material', 'Apoyos por material'), ('support_status', 'Apoyos por estado')], max_length=32, verbose_name='Dimensión')),
+                ('key', models.CharField(blank=True, default='', max_length=64, verbose_name='Categoría')),
+                ('label', models.CharField(blank=True, default='', max_length=255, verbose_name='Nombre categoría')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Cantidad')),
+                ('watts', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Potencia instalada (W)')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Fecha Actualización')),
+                ('fk_comuna', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='infrastructure.comuna', verbose_name='Comuna')),
+                ('fk_district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='infrastructure.district', verbose_name='Barrio')),
+            ],
+            options={
+                'verbose_name': 'Resumen de inventario',
+                'verbose_name_plural': 'Resúmenes de inventario',
+                'db_table': 'INVENTORY_ROLLUP',
+                'ordering': ['dimension', 'key'],
+                'indexes': [models.Index(fields=['dimension', 'fk_comuna'], name='INVENTORY_R_dimensi_b3090f_idx'), models.Index(fields=['dimension', 'fk_district'], name='INVENTORY_R_dimensi_090a5c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm y el índice GIN sólo existen en PostgreSQL; en otros motores la
+    # búsqueda usa el índice en memoria (apps.infrastructure.search)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "NODE_address_search_trgm_idx" '
+        'ON "NODE" USING gin ("address_search" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "NODE_address_search_trgm_idx"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0003_inventoryrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalnode',
+            name='address_search',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True, verbose_name='Dirección de búsqueda'),
+        ),
+        migrations.AddField(
+            model_name='node',
+            name='address_search',
+            field=models.CharField(blank=True, editable=False, max_length=300, null=True, verbose_name='Dirección de búsqueda'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
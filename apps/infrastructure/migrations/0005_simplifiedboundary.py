@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 18:05
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0004_node_address_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimplifiedBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='Zoom máximo')),
+                ('tolerance', models.FloatField(verbose_name='Tolerancia (grados)')),
+                ('poly', django.contrib.gis.db.models.fields.GeometryField(spatial_index=False, srid=4326, verbose_name='Área simplificada')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Fecha Actualización')),
+                ('fk_comuna', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='infrastructure.comuna', verbose_name='Comuna')),
+                ('fk_district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='infrastructure.district', verbose_name='Barrio')),
+            ],
+            options={
+                'verbose_name': 'Límite simplificado',
+                'verbose_name_plural': 'Límites simplificados',
+                'db_table': 'SIMPLIFIED_BOUNDARY',
+                'ordering': ['zoom', 'id'],
+                'indexes': [models.Index(fields=['zoom', 'fk_comuna'], name='SIMPLIFIED__zoom_42adce_idx'), models.Index(fields=['zoom', 'fk_district'], name='SIMPLIFIED__zoom_ff9b8f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+def drop_duplicates(apps, schema_editor):
+    # Dos recálculos simultáneos del mismo barrio pudieron dejar filas repetidas; cada
+    # copia tiene el conteo completo, así que basta conservar la más reciente
+    InventoryRollup = apps.get_model('infrastructure', 'InventoryRollup')
+    seen = set()
+    duplicated = []
+    rows = InventoryRollup.objects.order_by('-id').values_list('id', 'fk_district_id', 'dimension', 'key')
+    for pk, district_id, dimension, key in rows.iterator(chunk_size=5000):
+        if (district_id, dimension, key) in seen:
+            duplicated.append(pk)
+        else:
+            seen.add((district_id, dimension, key))
+    for i in range(0, len(duplicated), 1000):
+        InventoryRollup.objects.filter(id__in=duplicated[i:i + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('infrastructure', '0005_simplifiedboundary'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventoryrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('fk_district__isnull', False)), fields=('fk_district', 'dimension', 'key'), name='INVENTORY_ROLLUP_unique_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('fk_district__isnull', True)), fields=('dimension', 'key'), name='INVENTORY_ROLLUP_unique_key_no_district'),
+        ),
+    ]
@@ -375,6 +375,10 @@ class District(BaseModel):
         super(District, self).save()
 
 
+# Código pintado de un nodo: exactamente 7 dígitos (formularios e importaciones)
+PAINTING_CODE_REGEX = re.compile(r"^\d{7}$")
+
+
 class Node(BaseModel):
     painting_code = models.PositiveIntegerField(
         unique=False,
@@ -413,6 +417,10 @@ class Node(BaseModel):
         null=True,
         verbose_name="Direccion Normalizada",
     )
+    # Dirección en forma canónica para la búsqueda por trigramas (ver search.normalize_address)
+    address_search = models.CharField(
+        max_length=300, blank=True, null=True, editable=False, verbose_name="Dirección de búsqueda"
+    )
     historical = HistoricalRecords()
 
     class Meta:
@@ -434,10 +442,15 @@ class Node(BaseModel):
         if user is not None:
             setattr(self, "user_creation" if not self.pk else "user_updated", user)
 
-        # Si existe una ubicacion se busca el barrio al que pertenece
+        # Si existe una ubicacion se busca el barrio al que pertenece (índice en memoria)
         if self.location:
-            district = District.objects.filter(poly__contains=self.location).first()
-            self.fk_district = district if district else None
+            from apps.infrastructure.spatial import district_resolver
+
+            self.fk_district_id = district_resolver.resolve_point(self.location)
+
+        from apps.infrastructure.search import normalize_address
+
+        self.address_search = normalize_address(self.address) or None
         super(Node, self).save()
 
     def toJSON(self):
@@ -1017,3 +1030,89 @@ class Support(BaseModel):
 def before_save_support_setting(sender, instance, **kwargs):
     with transaction.atomic():
         instance.name = f"{instance.fk_material.name} {instance.fk_height}M {instance.fk_breaking_capacity}Kgf"
+
+
+""" RESUMEN DE INVENTARIO """
+
+
+class InventoryRollup(models.Model):
+    """
+    Conteos de inventario precalculados por barrio y categoría (tecnología, potencia,
+    tipo, fabricante, material, estado). Se mantiene en apps.infrastructure.rollups.
+    """
+    fk_district = models.ForeignKey(
+        District, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Barrio"
+    )
+    fk_comuna = models.ForeignKey(
+        Comuna, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Comuna"
+    )
+    dimension = models.CharField(
+        max_length=32, choices=ROLLUP_DIMENSION, verbose_name="Dimensión"
+    )
+    key = models.CharField(max_length=64, blank=True, default="", verbose_name="Categoría")
+    label = models.CharField(max_length=255, blank=True, default="", verbose_name="Nombre categoría")
+    count = models.PositiveIntegerField(default=0, verbose_name="Cantidad")
+    watts = models.DecimalField(
+        max_digits=14, decimal_places=2, default=0, verbose_name="Potencia instalada (W)"
+    )
+    date_updated = models.DateTimeField(auto_now=True, verbose_name="Fecha Actualización")
+
+    class Meta:
+        db_table = "INVENTORY_ROLLUP"
+        verbose_name = "Resumen de inventario"
+        verbose_name_plural = "Resúmenes de inventario"
+        indexes = [
+            models.Index(fields=["dimension", "fk_comuna"]),
+            models.Index(fields=["dimension", "fk_district"]),
+        ]
+        constraints = [
+            # Una fila por barrio y categoría (los nodos sin barrio forman su propio grupo)
+            models.UniqueConstraint(
+                fields=["fk_district", "dimension", "key"],
+                condition=models.Q(fk_district__isnull=False),
+                name="INVENTORY_ROLLUP_unique_key",
+            ),
+            models.UniqueConstraint(
+                fields=["dimension", "key"],
+                condition=models.Q(fk_district__isnull=True),
+                name="INVENTORY_ROLLUP_unique_key_no_district",
+            ),
+        ]
+        ordering = ["dimension", "key"]
+
+    def __str__(self):
+        return f"{self.get_dimension_display()} {self.label}: {self.count}"
+
+
+""" GEOMETRÍAS SIMPLIFICADAS """
+
+
+class SimplifiedBoundary(models.Model):
+    """
+    Polígono de una Comuna o un Barrio simplificado, sobre los bordes compartidos de
+    su capa, para una banda de zoom del mapa. Se regenera al modificar un límite de
+    la capa; ver apps.infrastructure.boundaries.
+    """
+    fk_comuna = models.ForeignKey(
+        Comuna, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Comuna"
+    )
+    fk_district = models.ForeignKey(
+        District, on_delete=models.CASCADE, null=True, blank=True, verbose_name="Barrio"
+    )
+    zoom = models.PositiveSmallIntegerField(verbose_name="Zoom máximo")
+    tolerance = models.FloatField(verbose_name="Tolerancia (grados)")
+    poly = models.GeometryField("Área simplificada", srid=4326, spatial_index=False)
+    date_updated = models.DateTimeField(auto_now=True, verbose_name="Fecha Actualización")
+
+    class Meta:
+        db_table = "SIMPLIFIED_BOUNDARY"
+        verbose_name = "Límite simplificado"
+        verbose_name_plural = "Límites simplificados"
+        indexes = [
+            models.Index(fields=["zoom", "fk_comuna"]),
+            models.Index(fields=["zoom", "fk_district"]),
+        ]
+        ordering = ["zoom", "id"]
+
+    def __str__(self):
+        return f"{self.fk_comuna or self.fk_district} (zoom {self.zoom})"
@@ -0,0 +1,95 @@
+"""
+    Codificación Mapbox Vector Tile (protobuf) de capas de puntos.
+
+    Se usa cuando la base de datos no tiene ST_AsMVT (SQLite/SpatiaLite): el tile
+    lleva una capa (versión 2) con un feature POINT por punto y sus propiedades
+    como tags; las claves y los valores se guardan una sola vez en la capa. Los
+    enteros no negativos van como uint_value, los negativos como sint_value y los
+    valores None se omiten, igual que en ST_AsMVT.
+
+    Especificación: https://github.com/mapbox/vector-tile-spec/tree/master/2.1
+"""
+
+# standard library
+import struct
+
+
+# Tipos de campo protobuf
+VARINT = 0
+FIXED64 = 1
+LENGTH_DELIMITED = 2
+
+POINT = 1
+MOVE_TO = 1
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _bytes(field, data):
+    return _key(field, LENGTH_DELIMITED) + _varint(len(data)) + data
+
+
+def _uint(field, value):
+    return _key(field, VARINT) + _varint(value)
+
+
+def _packed(field, values):
+    return _bytes(field, b"".join(_varint(v) for v in values))
+
+
+def _value(value):
+    """Mensaje Value del tile para un valor de propiedad."""
+    if isinstance(value, bool):
+        return _uint(7, int(value))
+    if isinstance(value, int):
+        return _uint(5, value) if value >= 0 else _key(6, VARINT) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, FIXED64) + struct.pack("<d", value)
+    return _bytes(1, str(value).encode())
+
+
+def encode_point_layer(name, features, extent=4096):
+    """
+    Tile con una capa de puntos. features: iterable de (x, y, propiedades) con x, y
+    en coordenadas enteras del tile (0..extent, origen arriba a la izquierda).
+    Devuelve b"" si no hay features, como ST_AsMVT.
+    """
+    keys, values = {}, {}
+    encoded = []
+    for x, y, properties in features:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value), value), len(values)))
+        geometry = (MOVE_TO | (1 << 3), _zigzag(x), _zigzag(y))
+        feature = _packed(2, tags) + _uint(3, POINT) + _packed(4, geometry)
+        encoded.append(_bytes(2, feature))
+    if not encoded:
+        return b""
+
+    layer = [_uint(15, 2), _bytes(1, name.encode())]
+    layer.extend(encoded)
+    layer.extend(_bytes(3, key.encode()) for key in keys)
+    layer.extend(_bytes(4, _value(value)) for _, value in values)
+    layer.append(_uint(5, extent))
+    return _bytes(3, b"".join(layer))
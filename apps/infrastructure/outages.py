@@ -0,0 +1,106 @@
+# Django
+from django.db.models import Q
+
+# local Django
+from apps.infrastructure.models import ApBox, Luminaire, Trafo
+from apps.infrastructure.topology import network_graph
+from apps.pqrs.choices import PQR_OPEN_STATUS
+from apps.pqrs.models import PqrActive
+
+
+"""
+    Análisis de impacto de fallas sobre el grafo de la red.
+
+    - Trafo: todos los nodos de su circuito (recorrido desde su nodo) y todas las
+      luminarias conectadas a él.
+    - Tramo (Net): los nodos del circuito que dejan de ser alcanzables desde el trafo
+      al quitar los tramos fallados.
+    - Caja AP: el nodo de la caja y su subárbol en el circuito del trafo.
+
+    Con los nodos afectados se consultan, en una consulta cada uno, las luminarias
+    (y su potencia) y las PQRs activas reportadas en esos nodos.
+"""
+
+
+def analyze_outage(trafo_ids=(), apbox_ids=(), net_ids=()):
+    trafo_ids = {int(t) for t in trafo_ids}
+    apbox_ids = {int(a) for a in apbox_ids}
+    net_ids = {int(n) for n in net_ids}
+
+    affected = set()
+    # Trafos cuyas luminarias se apagan en los nodos afectados
+    involved_trafos = set(trafo_ids)
+    missing = {"trafos": [], "apboxes": [], "nets": []}
+
+    existing = set(Trafo.objects.filter(id__in=trafo_ids).values_list("id", flat=True))
+    missing["trafos"] = sorted(trafo_ids - existing)
+    for trafo_id in existing:
+        root, tree = network_graph.downstream(trafo_id)
+        affected |= set(tree)
+        if root is not None:
+            affected.add(root)
+
+    # Tramos: agrupados por trafo para cortar todos a la vez
+    nets_by_trafo = {}
+    for net_id in net_ids:
+        edge = network_graph.edge(net_id)
+        if edge is None:
+            missing["nets"].append(net_id)
+            continue
+        nets_by_trafo.setdefault(edge[2], []).append((net_id, edge))
+    for trafo_id, items in nets_by_trafo.items():
+        blocked = {net_id for net_id, _ in items}
+        root = None
+        if trafo_id is not None:
+            involved_trafos.add(trafo_id)
+            root, full = network_graph.downstream(trafo_id)
+        if root is None:
+            # Sin trafo o sin nodo raíz conocido: sólo se puede asegurar el extremo "actual"
+            affected |= {edge[1] for _, edge in items}
+            continue
+        _, remaining = network_graph.downstream(trafo_id, blocked=blocked)
+        affected |= set(full) - set(remaining)
+
+    boxes = ApBox.objects.filter(id__in=apbox_ids).values_list("id", "fk_node_id", "fk_trafo_id")
+    found_boxes = set()
+    for box_id, node_id, trafo_id in boxes:
+        found_boxes.add(box_id)
+        if node_id is None:
+            continue
+        subtree = {node_id}
+        if trafo_id is not None:
+            involved_trafos.add(trafo_id)
+            _, tree = network_graph.downstream(trafo_id)
+            if node_id in tree:
+                subtree = network_graph.descendants(tree, node_id)
+        affected |= subtree
+    missing["apboxes"] = sorted(apbox_ids - found_boxes)
+
+    affected.discard(None)
+
+    # Luminarias apagadas: en los nodos afectados alimentadas por un trafo involucrado
+    # (o sin trafo registrado), más todas las de los trafos fallados
+    luminaires = Luminaire.objects.filter(
+        (Q(fk_node_id__in=affected) & (Q(fk_trafo_id__in=involved_trafos) | Q(fk_trafo__isnull=True)))
+        | Q(fk_trafo_id__in=trafo_ids)
+    )
+    luminaire_rows = list(
+        luminaires.values("id", "code", "fk_node_id", "fk_trafo_id", "fk_setting__name", "fk_setting__power")
+    )
+    affected |= {row["fk_node_id"] for row in luminaire_rows}
+    watts = sum(float(row["fk_setting__power"] or 0) for row in luminaire_rows)
+
+    pqrs = list(
+        PqrActive.objects
+        .filter(fk_node_reported_id__in=affected, status__in=PQR_OPEN_STATUS)
+        .values("id", "file_number", "status", "fk_node_reported_id", "fk_type_damage__name", "date_creation")
+        .order_by("date_creation")
+    )
+
+    return {
+        "nodes": sorted(affected),
+        "luminaires": luminaire_rows,
+        "total_watts": round(watts, 2),
+        "pqrs": pqrs,
+        "missing": missing,
+    }
@@ -0,0 +1,98 @@
+# standard library
+from datetime import datetime
+
+# Django
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.dispatch import Signal
+
+# local Django
+from apps.infrastructure.models import District, Node
+from apps.infrastructure.rollups import mark_districts_dirty
+from apps.infrastructure.search import painting_code_index
+from apps.infrastructure.tiles import invalidate_node_tiles
+
+
+"""
+    Reasignación incremental del Barrio (fk_district) de los Nodos.
+
+    Al redibujar District.poly sólo cambian de barrio los nodos dentro de la
+    diferencia simétrica entre el polígono anterior y el nuevo; se recalculan con
+    un único UPDATE (subconsulta espacial en la base de datos), junto con los nodos
+    que aún no tienen barrio.
+"""
+
+
+# Se envía (al confirmar la transacción) con node_ids: los nodos recalculados por
+# el UPDATE masivo, que no dispara post_save
+nodes_reassigned = Signal()
+
+# Se envía al terminar una importación masiva de Comuna o District con ids: las
+# filas actualizadas, cuyos nombres pudieron cambiar sin post_save
+locations_imported = Signal()
+
+
+def changed_area(old_poly, new_poly):
+    """Diferencia simétrica entre dos polígonos (None si no hubo cambio)."""
+    if old_poly is None and new_poly is None:
+        return None
+    if old_poly is None:
+        return new_poly
+    if new_poly is None:
+        return old_poly
+    if old_poly.srid and new_poly.srid and old_poly.srid != new_poly.srid:
+        old_poly = old_poly.transform(new_poly.srid, clone=True)
+    if old_poly.equals_exact(new_poly):
+        return None
+    area = old_poly.sym_difference(new_poly)
+    return None if area.empty else area
+
+
+def reassign_node_districts(area=None, include_orphans=True, full=False):
+    """
+    Recalcula fk_district de los nodos dentro de `area` y, si include_orphans, de
+    todos los nodos con fk_district nulo (full=True recalcula la tabla completa).
+    Devuelve la cantidad de nodos actualizados.
+    """
+    condition = Q()
+    if area is not None:
+        condition |= Q(location__intersects=area)
+    if include_orphans:
+        condition |= Q(fk_district__isnull=True)
+    if not condition and not full:
+        return 0
+
+    # Mismo desempate que el índice en memoria: el barrio de menor id
+    district = (
+        District.objects
+        .filter(poly__contains=OuterRef("location"))
+        .order_by("id")
+        .values("id")[:1]
+    )
+    queryset = Node.objects.all() if full else Node.objects.filter(condition)
+
+    with transaction.atomic():
+        # Ubicaciones afectadas para invalidar sus tiles (fk_district va en el tile) y
+        # barrios de origen/destino para el resumen de inventario
+        rows = list(queryset.values_list("id", "location", "fk_district_id"))
+        # date_updated: update() no aplica auto_now y sin ella los índices en memoria de
+        # los demás procesos (códigos pintados, direcciones) no verían el nuevo barrio
+        updated = queryset.update(fk_district=Subquery(district), date_updated=datetime.now())
+        if updated:
+            districts = {row[2] for row in rows}
+            for i in range(0, len(rows), 1000):
+                districts.update(
+                    Node.objects.filter(id__in=[row[0] for row in rows[i:i + 1000]])
+                    .values_list("fk_district_id", flat=True).distinct()
+                )
+            mark_districts_dirty(districts)
+    points = [(row[1].x, row[1].y) for row in rows if row[1] is not None]
+
+    if points:
+        transaction.on_commit(lambda: invalidate_node_tiles(points))
+    if updated:
+        # El índice de códigos lleva el barrio de cada nodo
+        transaction.on_commit(painting_code_index.invalidate)
+        node_ids = [row[0] for row in rows]
+        transaction.on_commit(lambda: nodes_reassigned.send(sender=Node, node_ids=node_ids))
+    return updated
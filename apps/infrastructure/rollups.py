@@ -0,0 +1,180 @@
+# standard library
+import threading
+from decimal import Decimal
+
+# Django
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+
+# local Django
+from apps.infrastructure.models import District, InventoryRollup, Luminaire, Support
+
+
+"""
+    Resumen de inventario por barrio (InventoryRollup).
+
+    Cuando cambia una luminaria, un apoyo o el barrio de un nodo, el barrio afectado
+    se marca como pendiente y al confirmar la transacción se recalculan sólo esos
+    barrios: una consulta agrupada por dimensión, acotada a los barrios marcados.
+    Los procesos masivos (importación, reasignación, fusión) marcan los barrios que
+    tocan; rebuild_inventory_rollups recalcula todo.
+
+    Cada recálculo bloquea las filas District de sus barrios (y, en PostgreSQL, un
+    candado consultivo para el grupo sin barrio) antes de borrar e insertar: dos
+    recálculos del mismo barrio se ejecutan uno tras otro y nunca duplican filas.
+"""
+
+
+# dimensión -> (modelo, campo clave, campo nombre, suma de vatios o None)
+DIMENSIONS = {
+    "luminaire_tech": (Luminaire, "fk_setting__fk_tech_id", "fk_setting__fk_tech__name", "fk_setting__power"),
+    "luminaire_power": (Luminaire, "fk_setting__power", "fk_setting__power", "fk_setting__power"),
+    "luminaire_type": (Luminaire, "fk_setting__fk_type_id", "fk_setting__fk_type__name", "fk_setting__power"),
+    "luminaire_brand": (Luminaire, "fk_brand_id", "fk_brand__name", "fk_setting__power"),
+    "luminaire_status": (Luminaire, "status", None, "fk_setting__power"),
+    "support_material": (Support, "fk_setting__fk_material_id", "fk_setting__fk_material__name", None),
+    "support_status": (Support, "status", None, None),
+}
+DISTRICT_LOOKUP = "fk_node__fk_district_id"
+# Candado consultivo (PostgreSQL) del grupo de nodos sin barrio
+NO_DISTRICT_LOCK = 0x524f4c4c
+
+_pending = threading.local()
+
+
+def _key_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
+
+def _compute(district_ids=None):
+    """Filas InventoryRollup (sin guardar) para los barrios dados (None = todos)."""
+    comunas = dict(District.objects.values_list("id", "fk_comuna_id"))
+    rows = []
+    for dimension, (model, key_field, label_field, watts_field) in DIMENSIONS.items():
+        queryset = model.objects.all()
+        if district_ids is not None:
+            ids = [d for d in district_ids if d is not None]
+            condition = {f"{DISTRICT_LOOKUP}__in": ids}
+            queryset = queryset.filter(**condition)
+            if None in district_ids:
+                queryset = queryset | model.objects.filter(**{f"{DISTRICT_LOOKUP}__isnull": True})
+
+        fields = [DISTRICT_LOOKUP, key_field] + ([label_field] if label_field and label_field != key_field else [])
+        queryset = queryset.values(*fields).annotate(
+            total=Count("id"),
+            watts=Coalesce(Sum(watts_field), Value(Decimal(0))) if watts_field else Value(Decimal(0)),
+        ).order_by()
+
+        choices = dict(model._meta.get_field(key_field).flatchoices) if label_field is None else {}
+        for row in queryset:
+            key = row[key_field]
+            if label_field is None:
+                label = choices.get(key, key)
+            elif label_field == key_field:
+                label = _key_text(key) + (" W" if key is not None else "")
+            else:
+                label = row[label_field]
+            district_id = row[DISTRICT_LOOKUP]
+            rows.append(InventoryRollup(
+                fk_district_id=district_id,
+                fk_comuna_id=comunas.get(district_id),
+                dimension=dimension,
+                key=_key_text(key),
+                label=str(label or "Sin definir"),
+                count=row["total"],
+                watts=row["watts"] or 0,
+            ))
+    return rows
+
+
+def _lock(district_ids=None):
+    """Serializa los recálculos de los barrios dados (None = todos) hasta el fin de la transacción."""
+    queryset = District.objects.select_for_update().order_by("id")
+    if district_ids is not None:
+        queryset = queryset.filter(id__in=[d for d in district_ids if d is not None])
+    list(queryset.values_list("id", flat=True))
+    if (district_ids is None or None in district_ids) and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [NO_DISTRICT_LOCK])
+
+
+@transaction.atomic
+def refresh_inventory_rollups(district_ids):
+    """Recalcula el resumen de los barrios indicados (None dentro del conjunto = nodos sin barrio)."""
+    district_ids = set(district_ids)
+    if not district_ids:
+        return 0
+    # El conteo se hace después del bloqueo: así ve lo que confirmó el recálculo anterior
+    _lock(district_ids)
+    rows = _compute(district_ids)
+
+    existing = InventoryRollup.objects.filter(fk_district_id__in=[d for d in district_ids if d is not None])
+    if None in district_ids:
+        existing = existing | InventoryRollup.objects.filter(fk_district__isnull=True)
+    existing.delete()
+    InventoryRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_inventory_rollups():
+    """Recalcula el resumen completo."""
+    _lock()
+    rows = _compute()
+    InventoryRollup.objects.all().delete()
+    InventoryRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _flush_pending():
+    district_ids = getattr(_pending, "districts", set())
+    _pending.districts = set()
+    if district_ids:
+        refresh_inventory_rollups(district_ids)
+
+
+def mark_districts_dirty(district_ids):
+    """
+    Marca barrios para recalcular al confirmar la transacción en curso. Los barrios
+    se acumulan en un conjunto por hilo: el primer callback recalcula todo lo
+    pendiente y los demás no encuentran nada, así varios cambios de la misma
+    transacción producen un solo recálculo.
+    """
+    district_ids = set(district_ids)
+    if not district_ids:
+        return
+    if not hasattr(_pending, "districts"):
+        _pending.districts = set()
+    _pending.districts.update(district_ids)
+    transaction.on_commit(_flush_pending)
+
+
+def inventory_summary(comuna=None, district=None, dimensions=None):
+    """{dimensión: [{key, label, count, watts}]} sumando las filas del resumen."""
+    queryset = InventoryRollup.objects.all()
+    if district is not None:
+        queryset = queryset.filter(fk_district_id=district)
+    elif comuna is not None:
+        queryset = queryset.filter(fk_comuna_id=comuna)
+    if dimensions:
+        queryset = queryset.filter(dimension__in=dimensions)
+
+    summary = {dimension: [] for dimension in (dimensions or DIMENSIONS)}
+    rows = (
+        queryset.values("dimension", "key", "label")
+        .annotate(count=Sum("count"), watts=Sum("watts"))
+        .order_by("dimension", "-count")
+    )
+    for row in rows:
+        summary.setdefault(row["dimension"], []).append({
+            "key": row["key"],
+            "label": row["label"],
+            "count": row["count"],
+            "watts": row["watts"],
+        })
+    return summary
@@ -0,0 +1,317 @@
+# standard library
+import logging
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+
+# Django
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+# local Django
+from apps.core.versions import VersionedIndex
+from apps.infrastructure.models import Node
+from apps.infrastructure.spatial import district_resolver
+
+
+"""
+    Índices de búsqueda de Nodos en memoria del proceso.
+"""
+
+
+logger = logging.getLogger(__name__)
+
+PAINTING_CODE_DIGITS = 7
+
+
+class PaintingCodeIndex(VersionedIndex):
+    """
+    Código pintado -> nodos, en dos arreglos paralelos ordenados por (código, id).
+
+    Un prefijo de código (p.ej. "012") equivale al rango entero
+    [0120000, 0130000), así que la búsqueda es un bisect sobre el arreglo de códigos.
+    Se construye al arrancar el proceso web (warm_up) o en la primera consulta, se
+    parcha al crear/editar/eliminar un Nodo (señales) y, si otro proceso cambió la
+    tabla (verificado cada NODE_CODE_INDEX_CHECK_SECONDS), aplica sólo los nodos
+    actualizados desde la última versión; los eliminados se detectan por el conteo.
+    """
+
+    CHECK_SECONDS = getattr(settings, "NODE_CODE_INDEX_CHECK_SECONDS", 30)
+    models = (Node,)
+
+    def __init__(self):
+        super().__init__()
+        self.codes = array("q")
+        self.ids = array("q")
+        self.nodes = {}
+
+    @staticmethod
+    def _rows(queryset):
+        for pk, code, loc, district_id in queryset.values_list(
+            "id", "painting_code", "location", "fk_district_id"
+        ).iterator(chunk_size=5000):
+            yield (code or 0, pk, loc.x if loc else None, loc.y if loc else None, district_id)
+
+    def _build(self, version):
+        rows = sorted(self._rows(Node.objects.all()))
+        self.codes = array("q", (r[0] for r in rows))
+        self.ids = array("q", (r[1] for r in rows))
+        self.nodes = {r[1]: r for r in rows}
+        self._version = version
+        self._built = True
+
+    def _refresh(self, version):
+        """Aplica los cambios de otros procesos: nodos con date_updated >= la última vista."""
+        total, last = version
+        _, previous = self._version
+        if previous is None:
+            self._build(version)
+            return
+        # >=: otro nodo pudo guardarse en el mismo instante que el último aplicado
+        for row in self._rows(Node.objects.filter(date_updated__gte=previous)):
+            self._insert(*row)
+        if len(self.nodes) != total:
+            existing = set(Node.objects.values_list("id", flat=True).iterator(chunk_size=5000))
+            for node_id in [pk for pk in self.nodes if pk not in existing]:
+                self._remove(node_id)
+        self._version = version
+
+    def warm_up(self):
+        """Construye el índice (p. ej. en un hilo al arrancar el proceso web)."""
+        try:
+            self._ensure()
+        except DatabaseError:
+            # Base aún sin migrar: se construirá en la primera consulta
+            logger.warning("No se pudo precargar el índice de códigos pintados", exc_info=True)
+        finally:
+            connection.close()
+
+    # ------------------------------------------------------------------
+    # Parches incrementales
+    # ------------------------------------------------------------------
+    def _position(self, code, node_id):
+        start = bisect_left(self.codes, code)
+        end = bisect_right(self.codes, code, lo=start)
+        ids = self.ids[start:end]
+        i = bisect_left(ids, node_id)
+        return start + i, i < len(ids) and ids[i] == node_id
+
+    def _remove(self, node_id):
+        row = self.nodes.pop(node_id, None)
+        if row is None:
+            return
+        position, found = self._position(row[0], node_id)
+        if found:
+            del self.codes[position]
+            del self.ids[position]
+
+    def _insert(self, code, node_id, lng, lat, district_id):
+        self._remove(node_id)
+        position, _ = self._position(code, node_id)
+        self.codes.insert(position, code)
+        self.ids.insert(position, node_id)
+        self.nodes[node_id] = (code, node_id, lng, lat, district_id)
+
+    def upsert(self, node_id, painting_code, lng, lat, district_id):
+        """
+        Nodo creado o editado en este proceso. La versión no se toca: el próximo
+        _ensure lo vuelve a leer entre los actualizados, sin reconstruir.
+        """
+        with self._lock:
+            if self._built:
+                self._insert(painting_code or 0, node_id, lng, lat, district_id)
+
+    def remove(self, node_id):
+        with self._lock:
+            if self._built:
+                self._remove(node_id)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def _serialize(self, node_id):
+        code, pk, lng, lat, district_id = self.nodes[node_id]
+        district = district_resolver.get_district(district_id) if district_id else None
+        return {
+            "pk": pk,
+            "id": pk,
+            "painting_code": code,
+            "comuna": district["comuna"] if district else None,
+            "district": district["name"] if district else None,
+            "fk_district": district_id,
+            "lng": lng,
+            "lat": lat,
+        }
+
+    def prefix(self, prefix, k=10):
+        """Hasta k nodos cuyo código pintado (7 dígitos) empieza por prefix."""
+        prefix = str(prefix).strip()
+        if not prefix.isdigit() or len(prefix) > PAINTING_CODE_DIGITS:
+            return []
+        scale = 10 ** (PAINTING_CODE_DIGITS - len(prefix))
+        low, high = int(prefix) * scale, (int(prefix) + 1) * scale
+        self._ensure()
+        with self._lock:
+            start = bisect_left(self.codes, low)
+            end = min(bisect_left(self.codes, high, lo=start), start + k)
+            node_ids = self.ids[start:end].tolist()
+            return [self._serialize(node_id) for node_id in node_ids]
+
+    def exact(self, painting_code):
+        self._ensure()
+        with self._lock:
+            code = int(painting_code)
+            start = bisect_left(self.codes, code)
+            end = bisect_right(self.codes, code, lo=start)
+            return [self._serialize(node_id) for node_id in self.ids[start:end].tolist()]
+
+
+painting_code_index = PaintingCodeIndex()
+
+
+"""
+    Búsqueda aproximada de direcciones (trigramas).
+
+    Las direcciones se normalizan (mayúsculas, sin tildes, abreviaturas de la
+    nomenclatura: CALLE -> CL, CARRERA -> KR, ...) en Node.address_search. En
+    PostgreSQL se busca con pg_trgm (operador %> sobre un índice GIN); en otros
+    motores con un índice de trigramas en memoria con el mismo criterio.
+"""
+
+
+ADDRESS_ABBREVIATIONS = {
+    "CALLE": "CL", "CLL": "CL", "CALL": "CL",
+    "CARRERA": "KR", "CRA": "KR", "CR": "KR", "KRA": "KR", "CARR": "KR", "K": "KR",
+    "AVENIDA": "AV", "AVDA": "AV", "AVE": "AV",
+    "DIAGONAL": "DG", "DIAG": "DG",
+    "TRANSVERSAL": "TV", "TRANSV": "TV", "TR": "TV", "TRV": "TV",
+    "AUTOPISTA": "AU", "AUT": "AU",
+    "CIRCULAR": "CQ", "CIRCUNVALAR": "CV",
+    "NORTE": "N", "SUR": "S", "ESTE": "E", "OESTE": "O",
+}
+# Conectores que no aportan a la búsqueda ("Calle 5 con Carrera 40", "No. 40-12")
+ADDRESS_STOPWORDS = {"CON", "NO", "NRO", "NUM", "NUMERO", "Y", "DE", "LA", "EL"}
+ADDRESS_SEARCH_THRESHOLD = 0.3
+
+if connection.vendor == "postgresql":
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    Node._meta.get_field("address_search").register_lookup(TrigramWordSimilar)
+
+
+def normalize_address(text):
+    """Forma canónica de una dirección para la búsqueda por trigramas."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").upper()
+    # Separar números de letras pegadas: "CL5" -> "CL 5", "40A" -> "40 A"
+    text = re.sub(r"(?<=[A-Z])(?=\d)|(?<=\d)(?=[A-Z])", " ", text)
+    words = re.findall(r"[A-Z0-9]+", text)
+    words = [ADDRESS_ABBREVIATIONS.get(w, w) for w in words if w not in ADDRESS_STOPWORDS]
+    return " ".join(words)
+
+
+def trigrams(text):
+    """Trigramas al estilo pg_trgm: cada palabra se rellena con dos espacios al inicio y uno al final."""
+    grams = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class AddressTrigramIndex(VersionedIndex):
+    """
+    Índice invertido trigrama -> ids de nodo para motores sin pg_trgm.
+    La puntuación es la fracción de trigramas de la consulta presentes en la
+    dirección (aproximación de word_similarity).
+    """
+
+    CHECK_SECONDS = getattr(settings, "NODE_CODE_INDEX_CHECK_SECONDS", 30)
+    models = (Node,)
+
+    def __init__(self):
+        super().__init__()
+        self.postings = {}
+
+    def _build(self, version):
+        postings = defaultdict(list)
+        queryset = Node.objects.exclude(address_search__isnull=True).exclude(address_search="")
+        for node_id, address in queryset.values_list("id", "address_search").iterator(chunk_size=5000):
+            for gram in trigrams(address):
+                postings[gram].append(node_id)
+        self.postings = {gram: array("q", ids) for gram, ids in postings.items()}
+        self._version = version
+        self._built = True
+
+    def search(self, query, k=10, threshold=ADDRESS_SEARCH_THRESHOLD):
+        """Lista de (node_id, puntuación) de mayor a menor."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        self._ensure()
+        with self._lock:
+            scores = Counter()
+            for gram in grams:
+                scores.update(self.postings.get(gram, ()))
+        total = len(grams)
+        ranked = [(node_id, hits / total) for node_id, hits in scores.items() if hits / total >= threshold]
+        ranked.sort(key=lambda r: (-r[1], r[0]))
+        return ranked[:k]
+
+
+address_index = AddressTrigramIndex()
+
+
+def search_addresses(query, k=10, threshold=ADDRESS_SEARCH_THRESHOLD):
+    """
+    Nodos cuya dirección se parece a query, ordenados por similitud.
+    Devuelve lista de dicts con id, painting_code, address, lng, lat y score.
+    """
+    normalized = normalize_address(query)
+    if not normalized:
+        return []
+
+    if connection.vendor == "postgresql":
+        with transaction.atomic(), connection.cursor() as cursor:
+            # %> (el que usa el índice GIN) filtra con pg_trgm.word_similarity_threshold,
+            # 0.6 por defecto: se fija al umbral pedido sólo para esta transacción
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+            rows = list(
+                Node.objects
+                .filter(address_search__trigram_word_similar=normalized)
+                .annotate(score=TrigramWordSimilarity(normalized, "address_search"))
+                .order_by("-score", "id")
+                .values_list("id", "score")[:k]
+            )
+    else:
+        rows = address_index.search(normalized, k=k, threshold=threshold)
+
+    scores = dict(rows)
+    nodes = {
+        pk: (code, address, loc, district_id)
+        for pk, code, address, loc, district_id in Node.objects.filter(id__in=list(scores)).values_list(
+            "id", "painting_code", "address", "location", "fk_district_id"
+        )
+    }
+    result = []
+    for node_id, score in rows:
+        if node_id not in nodes:
+            continue
+        code, address, location, district_id = nodes[node_id]
+        district = district_resolver.get_district(district_id) if district_id else None
+        result.append({
+            "id": node_id,
+            "pk": node_id,
+            "painting_code": code,
+            "address": address,
+            "district": district["name"] if district else None,
+            "comuna": district["comuna"] if district else None,
+            "lng": location.x if location else None,
+            "lat": location.y if location else None,
+            "score": round(float(score), 3),
+        })
+    return result
@@ -0,0 +1,7 @@
+from .districts import *
+from .tiles import *
+from .rollups import *
+from .loads import *
+from .topology import *
+from .search import *
+from .boundaries import *
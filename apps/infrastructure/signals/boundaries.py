@@ -0,0 +1,37 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..boundaries import boundary_cache, simplify_boundaries
+from ..models import Comuna, District
+from ..reassignment import changed_area
+
+
+@receiver(signals.post_save, sender=Comuna)
+@receiver(signals.post_delete, sender=Comuna)
+@receiver(signals.post_save, sender=District)
+@receiver(signals.post_delete, sender=District)
+def invalidate_boundary_cache(sender, instance, **kwargs):
+    # Nueva versión de las geometrías: las respuestas armadas y sus ETag dejan de valer
+    boundary_cache.invalidate()
+    transaction.on_commit(boundary_cache.invalidate)
+
+
+def _resimplify(comuna_ids, district_ids):
+    simplify_boundaries(comuna_ids=comuna_ids, district_ids=district_ids)
+    boundary_cache.invalidate()
+
+
+@receiver(signals.post_save, sender=Comuna)
+def simplify_comuna_boundary(sender, instance, **kwargs):
+    comuna_ids = [instance.pk]
+    transaction.on_commit(lambda: _resimplify(comuna_ids, []))
+
+
+@receiver(signals.post_save, sender=District)
+def simplify_district_boundary(sender, instance, created, **kwargs):
+    # pre_save de districts.py guarda el polígono anterior
+    if not created and changed_area(getattr(instance, "_previous_poly", None), instance.poly) is None:
+        return
+    district_ids = [instance.pk]
+    transaction.on_commit(lambda: _resimplify([], district_ids))
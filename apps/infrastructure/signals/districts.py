@@ -0,0 +1,33 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..models import Comuna, District
+from ..reassignment import changed_area, reassign_node_districts
+from ..spatial import district_resolver
+
+
+@receiver(signals.pre_save, sender=District)
+def remember_district_poly(sender, instance, **kwargs):
+    # Guardar el polígono anterior para reasignar sólo los nodos del área modificada
+    instance._previous_poly = None
+    if instance.pk:
+        instance._previous_poly = (
+            District.objects.filter(pk=instance.pk).values_list("poly", flat=True).first()
+        )
+
+
+@receiver(signals.post_save, sender=District)
+@receiver(signals.post_delete, sender=District)
+@receiver(signals.post_save, sender=Comuna)
+def rebuild_district_index(sender, instance, **kwargs):
+    # Invalidar en el acto y otra vez al confirmar la transacción, por si otro hilo
+    # reconstruyó el índice leyendo el estado previo al commit
+    district_resolver.invalidate()
+    transaction.on_commit(district_resolver.invalidate)
+
+
+@receiver(signals.post_save, sender=District)
+def reassign_districts_changed_area(sender, instance, **kwargs):
+    area = changed_area(getattr(instance, "_previous_poly", None), instance.poly)
+    transaction.on_commit(lambda: reassign_node_districts(area))
@@ -0,0 +1,47 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..loads import invalidate_trafo_loads
+from ..models import Luminaire, LuminaireSetting, Trafo, TrafoPower
+
+
+@receiver(signals.pre_save, sender=Luminaire)
+def remember_luminaire_trafo(sender, instance, **kwargs):
+    # Si la luminaria cambia de trafo hay que invalidar también el anterior
+    instance._previous_trafo_id = None
+    if instance.pk:
+        instance._previous_trafo_id = (
+            Luminaire.objects.filter(pk=instance.pk).values_list("fk_trafo_id", flat=True).first()
+        )
+
+
+@receiver(signals.post_save, sender=Luminaire)
+@receiver(signals.post_delete, sender=Luminaire)
+def invalidate_load_luminaire(sender, instance, **kwargs):
+    trafo_ids = {instance.fk_trafo_id, getattr(instance, "_previous_trafo_id", None)}
+    transaction.on_commit(lambda: invalidate_trafo_loads(trafo_ids))
+
+
+@receiver(signals.post_save, sender=Trafo)
+@receiver(signals.post_delete, sender=Trafo)
+def invalidate_load_trafo(sender, instance, **kwargs):
+    # La potencia nominal del trafo define la utilización
+    trafo_ids = {instance.pk}
+    transaction.on_commit(lambda: invalidate_trafo_loads(trafo_ids))
+
+
+@receiver(signals.post_save, sender=LuminaireSetting)
+def invalidate_load_setting(sender, instance, **kwargs):
+    # La potencia de la configuración define el consumo de todas sus luminarias
+    trafo_ids = set(
+        Luminaire.objects.filter(fk_setting=instance, fk_trafo__isnull=False)
+        .values_list("fk_trafo_id", flat=True).distinct()
+    )
+    transaction.on_commit(lambda: invalidate_trafo_loads(trafo_ids))
+
+
+@receiver(signals.post_save, sender=TrafoPower)
+def invalidate_load_trafo_power(sender, instance, **kwargs):
+    trafo_ids = set(Trafo.objects.filter(power=instance).values_list("id", flat=True))
+    transaction.on_commit(lambda: invalidate_trafo_loads(trafo_ids))
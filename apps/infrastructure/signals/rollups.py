@@ -0,0 +1,92 @@
+from django.dispatch import receiver
+from django.db.models import signals
+
+from ..models import (
+    Brand, District, Luminaire, LuminaireSetting, LuminaireTech, LuminaireType,
+    Material, Node, Support, SupportSetting,
+)
+from ..rollups import mark_districts_dirty
+
+
+def _districts_of(node_ids):
+    node_ids = [n for n in node_ids if n is not None]
+    if not node_ids:
+        return set()
+    return set(Node.objects.filter(id__in=node_ids).values_list("fk_district_id", flat=True))
+
+
+@receiver(signals.pre_save, sender=Luminaire)
+@receiver(signals.pre_save, sender=Support)
+def remember_infrastructure_node(sender, instance, **kwargs):
+    # Si el elemento cambia de nodo, también cambia el barrio que lo contabiliza
+    instance._previous_node_id = None
+    if instance.pk:
+        instance._previous_node_id = (
+            sender.objects.filter(pk=instance.pk).values_list("fk_node_id", flat=True).first()
+        )
+
+
+@receiver(signals.post_save, sender=Luminaire)
+@receiver(signals.post_save, sender=Support)
+def rollup_infrastructure_saved(sender, instance, **kwargs):
+    node_ids = {instance.fk_node_id, getattr(instance, "_previous_node_id", None)}
+    mark_districts_dirty(_districts_of(node_ids))
+
+
+@receiver(signals.post_delete, sender=Luminaire)
+@receiver(signals.post_delete, sender=Support)
+def rollup_infrastructure_deleted(sender, instance, **kwargs):
+    mark_districts_dirty(_districts_of([instance.fk_node_id]))
+
+
+@receiver(signals.pre_save, sender=Node)
+def remember_node_district(sender, instance, **kwargs):
+    instance._previous_district_id = None
+    if instance.pk:
+        instance._previous_district_id = (
+            Node.objects.filter(pk=instance.pk).values_list("fk_district_id", flat=True).first()
+        )
+
+
+@receiver(signals.post_save, sender=Node)
+def rollup_node_saved(sender, instance, created, **kwargs):
+    # Un nodo nuevo no tiene infraestructura todavía; sólo importa el cambio de barrio
+    previous = getattr(instance, "_previous_district_id", None)
+    if not created and previous != instance.fk_district_id:
+        mark_districts_dirty({previous, instance.fk_district_id})
+
+
+@receiver(signals.post_save, sender=District)
+def rollup_district_saved(sender, instance, created, **kwargs):
+    # La comuna del barrio va desnormalizada en el resumen
+    if not created:
+        mark_districts_dirty({instance.pk})
+
+
+# Catálogos: la potencia y los nombres (tecnología, tipo, fabricante, material) van
+# desnormalizados en el resumen de los barrios que los usan
+CATALOG_LOOKUPS = {
+    LuminaireSetting: (Luminaire, "fk_setting"),
+    LuminaireTech: (Luminaire, "fk_setting__fk_tech"),
+    LuminaireType: (Luminaire, "fk_setting__fk_type"),
+    Brand: (Luminaire, "fk_brand"),
+    SupportSetting: (Support, "fk_setting"),
+    Material: (Support, "fk_setting__fk_material"),
+}
+
+
+def rollup_catalog_saved(sender, instance, created, **kwargs):
+    # Un elemento nuevo del catálogo todavía no está en ningún barrio
+    if created:
+        return
+    model, lookup = CATALOG_LOOKUPS[sender]
+    mark_districts_dirty(
+        model.objects.filter(**{lookup: instance})
+        .values_list("fk_node__fk_district_id", flat=True).distinct()
+    )
+
+
+for catalog in CATALOG_LOOKUPS:
+    signals.post_save.connect(
+        rollup_catalog_saved, sender=catalog, dispatch_uid=f"rollup_catalog_{catalog._meta.label_lower}"
+    )
@@ -0,0 +1,25 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..models import Node
+from ..search import painting_code_index
+
+
+@receiver(signals.post_save, sender=Node)
+def patch_code_index_node_saved(sender, instance, created, **kwargs):
+    location = instance.location
+    row = (
+        instance.pk,
+        instance.painting_code,
+        location.x if location else None,
+        location.y if location else None,
+        instance.fk_district_id,
+    )
+    transaction.on_commit(lambda: painting_code_index.upsert(*row))
+
+
+@receiver(signals.post_delete, sender=Node)
+def patch_code_index_node_deleted(sender, instance, **kwargs):
+    node_id = instance.pk
+    transaction.on_commit(lambda: painting_code_index.remove(node_id))
@@ -0,0 +1,32 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..models import Node
+from ..tiles import invalidate_node_tiles
+
+
+@receiver(signals.pre_save, sender=Node)
+def remember_node_location(sender, instance, **kwargs):
+    # Guardar la ubicación anterior para invalidar también los tiles de origen al mover el nodo
+    instance._previous_location = None
+    if instance.pk:
+        instance._previous_location = (
+            Node.objects.filter(pk=instance.pk).values_list("location", flat=True).first()
+        )
+
+
+@receiver(signals.post_save, sender=Node)
+def invalidate_tiles_node_saved(sender, instance, created, **kwargs):
+    # Los tiles llevan painting_code/is_duplicated: se invalida la ubicación actual siempre
+    # y la anterior sólo si el nodo se movió.
+    previous = getattr(instance, "_previous_location", None)
+    points = {(p.x, p.y) for p in (previous, instance.location) if p is not None}
+    transaction.on_commit(lambda: invalidate_node_tiles(points))
+
+
+@receiver(signals.post_delete, sender=Node)
+def invalidate_tiles_node_deleted(sender, instance, **kwargs):
+    if instance.location is not None:
+        point = (instance.location.x, instance.location.y)
+        transaction.on_commit(lambda: invalidate_node_tiles([point]))
@@ -0,0 +1,19 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from ..models import Net
+from ..topology import network_graph
+
+
+@receiver(signals.post_save, sender=Net)
+def update_graph_net_saved(sender, instance, created, **kwargs):
+    edge = (instance.pk, instance.last_node_id, instance.current_node_id, instance.fk_trafo_id, instance.length)
+    change = {'count_delta': 1 if created else 0, 'date_updated': instance.date_updated}
+    transaction.on_commit(lambda: network_graph.apply_net(*edge, **change))
+
+
+@receiver(signals.post_delete, sender=Net)
+def update_graph_net_deleted(sender, instance, **kwargs):
+    net_id = instance.pk
+    transaction.on_commit(lambda: network_graph.remove_net(net_id))
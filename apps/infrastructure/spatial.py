@@ -0,0 +1,161 @@
+# standard library
+import math
+
+# Django
+from django.conf import settings
+from django.contrib.gis.geos import Point
+
+# local Django
+from apps.core.versions import VersionedIndex
+from apps.infrastructure.models import Comuna, District
+
+
+"""
+    Índices espaciales en memoria del proceso.
+"""
+
+
+class STRtree:
+    """
+    Árbol R estático empaquetado con Sort-Tile-Recursive sobre bounding boxes.
+
+    items: iterable de (bbox, payload) con bbox = (xmin, ymin, xmax, ymax).
+    query_point devuelve los payloads cuyo bbox contiene el punto; la verificación
+    exacta contra la geometría queda a cargo del llamador.
+    """
+
+    def __init__(self, items, node_capacity=10):
+        self.node_capacity = max(2, node_capacity)
+        level = [(tuple(bbox), payload, True) for bbox, payload in items]
+        self.size = len(level)
+        while len(level) > self.node_capacity:
+            level = self._pack(level)
+        self.root = (self._union(level), level, False) if level else None
+
+    @staticmethod
+    def _union(entries):
+        return (
+            min(e[0][0] for e in entries),
+            min(e[0][1] for e in entries),
+            max(e[0][2] for e in entries),
+            max(e[0][3] for e in entries),
+        )
+
+    def _pack(self, entries):
+        """Agrupa un nivel en nodos padre: cortes verticales por x y luego por y."""
+        capacity = self.node_capacity
+        parents_count = -(-len(entries) // capacity)
+        slices = max(1, math.ceil(math.sqrt(parents_count)))
+        slice_size = slices * capacity
+
+        by_x = sorted(entries, key=lambda e: e[0][0] + e[0][2])
+        parents = []
+        for i in range(0, len(by_x), slice_size):
+            vertical = sorted(by_x[i:i + slice_size], key=lambda e: e[0][1] + e[0][3])
+            for j in range(0, len(vertical), capacity):
+                children = vertical[j:j + capacity]
+                parents.append((self._union(children), children, False))
+        return parents
+
+    def query_point(self, x, y):
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            bbox, content, is_leaf = stack.pop()
+            if not (bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]):
+                continue
+            if is_leaf:
+                found.append(content)
+            else:
+                stack.extend(content)
+        return found
+
+
+class DistrictResolver(VersionedIndex):
+    """
+    Resuelve a qué Barrio (District) pertenece un punto sin consultar la base de datos.
+
+    Mantiene en memoria un STRtree con el bbox de cada District.poly y su geometría
+    preparada (GEOS). El índice se reconstruye de forma perezosa: inmediatamente
+    tras guardar/eliminar un District en este proceso (señales) y, para los demás
+    workers, cuando cambia la versión (conteo + última fecha de actualización de
+    barrios y comunas), que se verifica como máximo cada DISTRICT_INDEX_CHECK_SECONDS.
+    """
+
+    CHECK_SECONDS = getattr(settings, "DISTRICT_INDEX_CHECK_SECONDS", 30)
+    # El nombre de la comuna va en cada barrio: su última edición también cuenta
+    models = (District, Comuna)
+
+    def __init__(self):
+        super().__init__()
+        self._tree = None
+        self.districts = {}
+
+    def _build(self, version):
+        items = []
+        districts = {}
+        queryset = (
+            District.objects
+            .filter(poly__isnull=False)
+            .select_related("fk_comuna")
+            .only("id", "name", "estrato", "cod_unico", "poly", "fk_comuna__id", "fk_comuna__name")
+            .order_by("id")
+        )
+        for district in queryset:
+            poly = district.poly
+            if poly.srid and poly.srid != 4326:
+                poly = poly.transform(4326, clone=True)
+            items.append((poly.extent, (district.id, poly.prepared)))
+            districts[district.id] = {
+                "pk": district.id,
+                "name": district.name,
+                "estrato": district.estrato,
+                "cod_unico": district.cod_unico,
+                "fk_comuna": district.fk_comuna_id,
+                "comuna": district.fk_comuna.name,
+            }
+        self.districts = districts
+        self._tree = STRtree(items)
+        self._version = version
+        self._built = True
+
+    def _ensure_index(self):
+        self._ensure()
+        return self._tree
+
+    def _resolve(self, tree, x, y):
+        candidates = tree.query_point(x, y)
+        if not candidates:
+            return None
+        point = Point(x, y, srid=4326)
+        # Mismo desempate que filter(poly__contains=...).first(): el de menor id
+        for district_id, prepared in sorted(candidates, key=lambda c: c[0]):
+            if prepared.contains(point):
+                return district_id
+        return None
+
+    def resolve(self, lng, lat):
+        """Id del District que contiene (lng, lat) o None."""
+        return self._resolve(self._ensure_index(), float(lng), float(lat))
+
+    def resolve_point(self, point):
+        if point is None:
+            return None
+        if point.srid and point.srid != 4326:
+            point = point.transform(4326, clone=True)
+        return self.resolve(point.x, point.y)
+
+    def resolve_many(self, points):
+        """Resuelve una lista de (lng, lat); devuelve la lista de ids (o None) en el mismo orden."""
+        tree = self._ensure_index()
+        return [self._resolve(tree, float(lng), float(lat)) for lng, lat in points]
+
+    def get_district(self, district_id):
+        """Metadatos (nombre, comuna, etc.) del District indexado."""
+        self._ensure_index()
+        return self.districts.get(district_id)
+
+
+district_resolver = DistrictResolver()
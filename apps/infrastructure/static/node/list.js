@@ -13,6 +13,7 @@
         clusterer: null,
         markers: [],
         markersById: new Map(),  // pool de marcadores por id para diffs incrementales
+        clusterMarkers: [],      // celdas agregadas por el servidor (zoom bajo)
         comunaPolygons: [],
         districtPolygons: [],
         comunasCache: null,
@@ -26,11 +27,11 @@
         currentDistrictId: null,
     };
 
-    const COMUNAS_CACHE_KEY = "lm:comunas:v1";
+    // La caché de comunas es por zoom: el servidor simplifica los polígonos según la banda
+    const COMUNAS_CACHE_KEY = "lm:comunas:v2";
     const COMUNAS_CACHE_TTL_MS = 24 * 60 * 60 * 1000; // 24h
 
-    // Carga por viewport: por debajo de este zoom no pedimos nodos (el bbox es demasiado grande)
-    const VIEWPORT_MIN_ZOOM = 14;
+    // Carga por viewport: el servidor decide según el zoom si devuelve puntos o celdas agregadas
     const VIEWPORT_DEBOUNCE_MS = 350;
     let viewportTimer = null;
     let viewportRequestId = 0;
@@ -83,6 +84,37 @@
         }).then((r) => r.json());
     }
 
+    /**
+     * Decodifica un objeto de una Topology (TopoJSON cuantizado y con arcos en deltas)
+     * al formato de la API JSON: {pk, ...propiedades, polygon: [[{lat, lng}, ...], ...]}
+     * con el anillo exterior de cada polígono.
+     */
+    function decodeTopology(topology, name) {
+        const [kx, ky] = topology.transform ? topology.transform.scale : [1, 1];
+        const [tx, ty] = topology.transform ? topology.transform.translate : [0, 0];
+        const arcs = (topology.arcs || []).map((arc) => {
+            let x = 0, y = 0;
+            return arc.map(([dx, dy]) => {
+                x += dx;
+                y += dy;
+                return { lat: y * ky + ty, lng: x * kx + tx };
+            });
+        });
+        const ring = (refs) => {
+            const points = [];
+            refs.forEach((ref) => {
+                const arc = ref >= 0 ? arcs[ref] : arcs[~ref].slice().reverse();
+                points.push(...(points.length ? arc.slice(1) : arc));
+            });
+            return points;
+        };
+        const object = topology.objects[name] || { geometries: [] };
+        return object.geometries.map((g) => {
+            const polygons = g.type === "Polygon" ? [g.arcs] : g.arcs;
+            return { pk: g.id, ...g.properties, polygon: polygons.map((rings) => ring(rings[0])) };
+        });
+    }
+
     // ============================================================
     // Carga inicial (override del hook de google_maps.js)
     // ============================================================
@@ -107,8 +139,10 @@
     // Comunas (con caché en localStorage)
     // ============================================================
     async function loadComunas() {
+        const zoom = state.map.getZoom();
+        const cacheKey = `${COMUNAS_CACHE_KEY}:z${zoom}`;
         try {
-            const raw = localStorage.getItem(COMUNAS_CACHE_KEY);
+            const raw = localStorage.getItem(cacheKey);
             if (raw) {
                 const parsed = JSON.parse(raw);
                 if (parsed && parsed.ts && (Date.now() - parsed.ts) < COMUNAS_CACHE_TTL_MS) {
@@ -118,10 +152,10 @@
             }
         } catch (_) { /* corrupt cache → ignore */ }
 
-        const data = await getJson(NODE_URLS.comunas);
+        const data = await getJson(`${NODE_URLS.comunas}?zoom=${zoom}`);
         state.comunasCache = Array.isArray(data) ? data : [];
         try {
-            localStorage.setItem(COMUNAS_CACHE_KEY, JSON.stringify({ ts: Date.now(), data: state.comunasCache }));
+            localStorage.setItem(cacheKey, JSON.stringify({ ts: Date.now(), data: state.comunasCache }));
         } catch (_) { /* quota exceeded → ignore */ }
     }
 
@@ -164,9 +198,12 @@
     // Distritos / Barrios
     // ============================================================
     async function loadDistrictsForComuna(comunaId) {
-        const url = urlWith(NODE_URLS.districtsByComuna, "pk", comunaId);
+        // TopoJSON: los bordes compartidos entre barrios vecinos viajan una sola vez;
+        // con el zoom el servidor entrega la banda simplificada que corresponde
+        const zoom = state.map.getZoom();
+        const url = urlWith(NODE_URLS.districtsByComuna, "pk", comunaId) + `?format=topojson&zoom=${zoom}`;
         const data = await getJson(url);
-        return Array.isArray(data) ? data : [];
+        return data && data.type === "Topology" ? decodeTopology(data, "districts") : [];
     }
 
     function drawDistrictPolygons(districts) {
@@ -227,6 +264,44 @@
         NodeMarkers.clearMarkers(state.markers);
         state.markers = [];
         state.markersById.clear();
+        clearClusterMarkers();
+    }
+
+    function clearClusterMarkers() {
+        NodeMarkers.clearMarkers(state.clusterMarkers);
+        state.clusterMarkers = [];
+    }
+
+    /**
+     * Render de celdas pre-agregadas por el servidor. Las celdas con un único nodo
+     * se pintan como marcadores normales; el resto como un círculo con el conteo que
+     * al hacer click hace zoom a la extensión real de sus nodos.
+     */
+    function renderClusters(cells) {
+        clearClusterMarkers();
+        const singles = [];
+
+        for (const cell of cells) {
+            if (cell.count === 1 && cell.id != null) {
+                singles.push(cell);
+                continue;
+            }
+            const marker = NodeMarkers.createClusterMarker({
+                map: state.map,
+                position: { lat: cell.lat, lng: cell.lng },
+                count: cell.count,
+            });
+            NodeMarkers.addClickListener(marker, () => {
+                const b = cell.bounds;
+                state.map.fitBounds(new google.maps.LatLngBounds(
+                    { lat: b.south, lng: b.west },
+                    { lat: b.north, lng: b.east },
+                ));
+            });
+            state.clusterMarkers.push(marker);
+        }
+
+        renderNodes(singles);
     }
 
     /**
@@ -292,18 +367,6 @@
     }
 
     async function loadNodesInViewport() {
-        const filterActive = hasActiveFilter();
-
-        // Sin filtro activo: exigir zoom mínimo para no traer toda la ciudad de golpe.
-        // Con filtro: el bbox ya está acotado por la comuna/barrio, sin importar el zoom.
-        if (!filterActive) {
-            const zoom = state.map.getZoom();
-            if (zoom == null || zoom < VIEWPORT_MIN_ZOOM) {
-                clearAllMarkers();
-                return;
-            }
-        }
-
         const bounds = state.map.getBounds();
         if (!bounds) return;
 
@@ -315,6 +378,8 @@
             east: ne.lng(),
             north: ne.lat(),
         });
+        const zoom = state.map.getZoom();
+        if (zoom != null) params.set("zoom", zoom);
 
         const requestId = ++viewportRequestId;
         try {
@@ -323,7 +388,12 @@
             if (requestId !== viewportRequestId) return;
 
             if (response.type === "success") {
-                renderNodes(response.data || []);
+                if (response.mode === "clusters") {
+                    renderClusters(response.data || []);
+                } else {
+                    clearClusterMarkers();
+                    renderNodes(response.data || []);
+                }
             }
         } catch (_) { /* errores transitorios de red → silenciar */ }
     }
@@ -603,7 +673,11 @@
         if (response.type === "success") {
             closeModal("nodeFormModal");
             clearCreatingMarker();
-            showSuccess(response.msg || (isCreate ? "Nodo creado." : "Nodo actualizado."));
+            if (response.warning) {
+                Swal.fire({ title: "Nodo creado", text: response.warning, icon: "warning", confirmButtonColor: "#3b82f6" });
+            } else {
+                showSuccess(response.msg || (isCreate ? "Nodo creado." : "Nodo actualizado."));
+            }
             if (state.dataTable) state.dataTable.ajax.reload(null, false);
             // Reaplicar filtro vigente para refrescar los marcadores en el mapa
             reapplyCurrentFilter();
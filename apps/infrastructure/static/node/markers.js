@@ -88,6 +88,31 @@
         return m;
     }
 
+    /**
+     * Marcador para una celda agregada por el servidor: círculo con el conteo de nodos.
+     * El radio crece con el logaritmo del conteo para que las celdas densas destaquen.
+     */
+    function createClusterMarker({ map, position, count }) {
+        const m = new google.maps.Marker({
+            map,
+            position,
+            title: `${count} nodos`,
+            label: { text: String(count), color: "#ffffff", fontSize: "11px", fontWeight: "600" },
+            icon: {
+                path: google.maps.SymbolPath.CIRCLE,
+                scale: 12 + Math.min(18, Math.log10(count) * 6),
+                fillColor: "#1d4ed8",
+                fillOpacity: 0.85,
+                strokeColor: "#ffffff",
+                strokeWeight: 2,
+            },
+            optimized: true,
+        });
+        m._isAdvanced = false;
+        m._cluster = true;
+        return m;
+    }
+
     function removeMarker(marker) {
         if (!marker) return;
         if (marker._isAdvanced) marker.map = null;
@@ -114,6 +139,7 @@
 
     window.NodeMarkers = {
         createMarker,
+        createClusterMarker,
         removeMarker,
         clearMarkers,
         setMarkerPosition,
@@ -1,3 +1,868 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import random
+import struct
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from apps.core.imports import run_import_job
+from apps.core.models import ImportJob
+from apps.infrastructure.boundaries import BoundaryCache, Payload, accepted_encodings, brotli
+from apps.infrastructure.importers import NodeSurveyImporter, NodeSurveyJobRunner
+from apps.infrastructure.loads import compute_trafo_loads, get_trafo_loads
+from apps.infrastructure.merge import NodeMergeError, merge_nodes
+from apps.infrastructure.models import (
+    ApBox, ArmType, Comuna, District, InventoryRollup, Luminaire, LuminaireSetting, LuminaireTech, LuminaireType,
+    Material, Net, Node, OpticProtection, PhotoCellType, Trafo, TrafoPower,
+)
+from apps.infrastructure.mvt import encode_point_layer
+from apps.infrastructure.outages import analyze_outage
+from apps.infrastructure.rollups import inventory_summary, rebuild_inventory_rollups
+from apps.infrastructure.search import AddressTrigramIndex, PaintingCodeIndex, normalize_address
+from apps.infrastructure.spatial import STRtree, district_resolver
+from apps.infrastructure.tiles import TILE_EXTENT, _tile_fraction, render_node_tile
+from apps.infrastructure.topojson import encode_topology, simplify_layers
+from apps.infrastructure.topology import NetworkGraph, network_graph
+from apps.pqrs.models import GeneralTypeDamage, PqrActive
+
+
+def _square(x, y, size=1.0):
+    return Polygon(((x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)), srid=4326)
+
+
+def _district(comuna, name, x, y, size=1.0, **kwargs):
+    return District.objects.create(
+        name=name, fk_comuna=comuna, poly=MultiPolygon(_square(x, y, size), srid=4326), **kwargs
+    )
+
+
+def _node(x=-76.5, y=3.5, **kwargs):
+    return Node.objects.create(location=Point(x, y, srid=4326), **kwargs)
+
+
+def _trafo(code, node=None, **kwargs):
+    values = {"owner": 1, "type": 1, "installationtype": "OH", "using": 2, "fk_node": node}
+    values.update(kwargs)
+    return Trafo.objects.create(code=code, **values)
+
+
+def _net(material, last_node, current_node, trafo=None, length=10):
+    return Net.objects.create(
+        fk_trafo=trafo, typeinstallation=1, conductor=1, setting=1, fk_material=material,
+        length=length, last_node=last_node, current_node=current_node,
+    )
+
+
+def _luminaire_setting(tech="LED", power=70):
+    return LuminaireSetting.objects.create(
+        fk_tech=LuminaireTech.objects.get_or_create(code=tech[:3], name=tech)[0],
+        fk_type=LuminaireType.objects.get_or_create(code="VIA", name="Vial")[0],
+        power=power,
+    )
+
+
+def _luminaire(node, setting, **kwargs):
+    values = {
+        "fk_opticprotection": OpticProtection.objects.get_or_create(code="IP6", name="IP66")[0],
+        "fk_photocell": PhotoCellType.objects.get_or_create(code="FOT", name="Fotocelda")[0],
+        "fk_armtype": ArmType.objects.get_or_create(code="BRZ", name="Brazo")[0],
+    }
+    values.update(kwargs)
+    return Luminaire.objects.create(fk_node=node, fk_setting=setting, **values)
+
+
+def _read_varint(data, i):
+    value = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, i
+
+
+def _fields(data):
+    """(campo, valor) de un mensaje protobuf (varint, fixed64 y length-delimited)."""
+    i = 0
+    while i < len(data):
+        key, i = _read_varint(data, i)
+        wire_type = key & 7
+        if wire_type == 0:
+            value, i = _read_varint(data, i)
+        elif wire_type == 1:
+            value, i = struct.unpack("<d", data[i:i + 8])[0], i + 8
+        else:
+            length, i = _read_varint(data, i)
+            value, i = data[i:i + length], i + length
+        yield key >> 3, value
+
+
+def _unpack(data):
+    values, i = [], 0
+    while i < len(data):
+        value, i = _read_varint(data, i)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_mvt(data):
+    """{capa: [(x, y, propiedades)]} de un tile de puntos."""
+    decoders = {1: bytes.decode, 3: float, 5: int, 6: _unzigzag, 7: bool}
+    layers = {}
+    for _, layer in _fields(data):
+        fields = list(_fields(layer))
+        keys = [value.decode() for field, value in fields if field == 3]
+        values = []
+        for field, value in fields:
+            if field == 4:
+                ((kind, raw),) = _fields(value)
+                values.append(decoders[kind](raw))
+        features = []
+        for field, value in fields:
+            if field == 2:
+                feature = dict(_fields(value))
+                tags = _unpack(feature[2])
+                command, dx, dy = _unpack(feature[4])
+                properties = {keys[tags[i]]: values[tags[i + 1]] for i in range(0, len(tags), 2)}
+                features.append((command, feature[3], _unzigzag(dx), _unzigzag(dy), properties))
+        name = next(value for field, value in fields if field == 1).decode()
+        layers[name] = {"version": fields[0][1], "extent": fields[-1][1], "features": features}
+    return layers
+
+
+class MVTTests(SimpleTestCase):
+    def test_points_and_properties_round_trip(self):
+        data = encode_point_layer("nodes", [
+            (10, 20, {"id": 1, "painting_code": 1234567, "is_duplicated": False, "fk_district_id": None}),
+            (-5, 4100, {"id": 2, "painting_code": 1234567, "is_duplicated": True, "delta": -3, "name": "a"}),
+        ])
+        layer = _decode_mvt(data)["nodes"]
+        self.assertEqual((layer["version"], layer["extent"]), (2, 4096))
+        # MoveTo de un punto (9), tipo POINT; los None no se codifican
+        self.assertEqual(layer["features"], [
+            (9, 1, 10, 20, {"id": 1, "painting_code": 1234567, "is_duplicated": False}),
+            (9, 1, -5, 4100, {"id": 2, "painting_code": 1234567, "is_duplicated": True, "delta": -3, "name": "a"}),
+        ])
+
+    def test_empty_layer_is_an_empty_tile(self):
+        self.assertEqual(encode_point_layer("nodes", []), b"")
+
+
+class NodeTileTests(TestCase):
+    Z = 16
+
+    def _tile_of(self, lng, lat):
+        fx, fy = _tile_fraction(lng, lat, self.Z)
+        return self.Z, int(fx), int(fy), (fx % 1, fy % 1)
+
+    def test_tile_has_the_nodes_inside_its_buffer(self):
+        node = _node(-76.53, 3.42, painting_code=1234567)
+        z, x, y, (dx, dy) = self._tile_of(-76.53, 3.42)
+        features = _decode_mvt(render_node_tile(z, x, y))["nodes"]["features"]
+        self.assertEqual(len(features), 1)
+        _, _, px, py, properties = features[0]
+        self.assertEqual((px, py), (round(dx * TILE_EXTENT), round(dy * TILE_EXTENT)))
+        self.assertEqual(properties, {"id": node.pk, "painting_code": 1234567, "is_duplicated": False})
+
+    def test_tile_without_nodes_is_empty(self):
+        _node(-76.53, 3.42)
+        z, x, y, _ = self._tile_of(-76.53, 3.42)
+        self.assertEqual(render_node_tile(z, x + 3, y), b"")
+
+
+class STRtreeTests(SimpleTestCase):
+    def test_query_matches_brute_force(self):
+        rng = random.Random(7)
+        items = []
+        for i in range(500):
+            x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+            items.append(((x, y, x + rng.uniform(0, 8), y + rng.uniform(0, 8)), i))
+        tree = STRtree(items, node_capacity=6)
+        self.assertEqual(tree.size, 500)
+        for _ in range(300):
+            x, y = rng.uniform(-5, 110), rng.uniform(-5, 110)
+            expected = {i for (x0, y0, x1, y1), i in items if x0 <= x <= x1 and y0 <= y <= y1}
+            self.assertEqual(set(tree.query_point(x, y)), expected)
+
+    def test_boundary_points_are_included(self):
+        tree = STRtree([((0, 0, 1, 1), "a"), ((1, 0, 2, 1), "b")])
+        self.assertEqual(sorted(tree.query_point(1, 0.5)), ["a", "b"])
+        self.assertEqual(tree.query_point(2.5, 0.5), [])
+
+    def test_empty_tree(self):
+        tree = STRtree([])
+        self.assertIsNone(tree.root)
+        self.assertEqual(tree.query_point(0, 0), [])
+
+
+class DistrictResolverTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.comuna = Comuna.objects.create(name="Comuna 1", poly=_square(-77, 3, 2))
+        cls.west = _district(cls.comuna, "Oeste", -77, 3)
+        cls.east = _district(cls.comuna, "Este", -76, 3)
+
+    def setUp(self):
+        district_resolver.invalidate()
+
+    def test_resolves_points_inside_each_district(self):
+        self.assertEqual(district_resolver.resolve(-76.5, 3.5), self.west.pk)
+        self.assertEqual(district_resolver.resolve(-75.5, 3.5), self.east.pk)
+        self.assertIsNone(district_resolver.resolve(-70, 3.5))
+        self.assertEqual(
+            district_resolver.resolve_many([(-76.5, 3.2), (-75.2, 3.8), (0, 0)]), [self.west.pk, self.east.pk, None]
+        )
+
+    def test_shared_border_goes_to_the_lowest_id(self):
+        # Igual que filter(poly__contains=...).order_by("id").first() sobre el borde común
+        expected = District.objects.filter(poly__contains=Point(-76, 3.5, srid=4326)).order_by("id").first()
+        self.assertEqual(district_resolver.resolve(-76, 3.5), expected.pk if expected else None)
+
+    def test_node_save_uses_the_index(self):
+        node = Node.objects.create(painting_code=1234567, location=Point(-75.5, 3.5, srid=4326))
+        self.assertEqual(node.fk_district_id, self.east.pk)
+        node.location = Point(-76.5, 3.5, srid=4326)
+        node.save()
+        self.assertEqual(Node.objects.get(pk=node.pk).fk_district_id, self.west.pk)
+
+    def test_district_metadata_includes_the_comuna(self):
+        data = district_resolver.get_district(self.west.pk)
+        self.assertEqual(data["name"], "Oeste")
+        self.assertEqual(data["comuna"], "Comuna 1")
+
+
+class PaintingCodeIndexTests(TestCase):
+    def setUp(self):
+        self.index = PaintingCodeIndex()
+        self.first = _node(painting_code=120001)
+        self.second = _node(painting_code=120002)
+        self.other = _node(painting_code=1300000)
+
+    def _codes(self, prefix):
+        return [node["painting_code"] for node in self.index.prefix(prefix)]
+
+    def _expire(self):
+        # Fuerza la verificación de versión en la próxima consulta
+        self.index._checked_at = float("-inf")
+
+    def test_prefix_is_a_code_range(self):
+        self.assertEqual(self._codes("012"), [120001, 120002])
+        self.assertEqual(self._codes("13"), [1300000])
+        self.assertEqual(self._codes("0120002"), [120002])
+        self.assertEqual(self.index.prefix("12345678"), [])
+        self.assertEqual(self.index.prefix("x1"), [])
+        self.assertEqual([node["pk"] for node in self.index.exact(1300000)], [self.other.pk])
+
+    def test_changes_from_other_processes_are_applied_without_rebuilding(self):
+        self._codes("0")
+        with mock.patch.object(self.index, "_build", wraps=self.index._build) as build:
+            self.second.painting_code = 1300001
+            self.second.save()
+            _node(painting_code=120003)
+            self._expire()
+            self.assertEqual(self._codes("012"), [120001, 120003])
+            self.assertEqual(self._codes("13"), [1300000, 1300001])
+            build.assert_not_called()
+
+    def test_deleted_nodes_are_detected_by_the_count(self):
+        self._codes("0")
+        with mock.patch.object(self.index, "_build", wraps=self.index._build) as build:
+            Node.objects.filter(pk=self.first.pk).delete()
+            self._expire()
+            self.assertEqual(self._codes("012"), [120002])
+            build.assert_not_called()
+
+    def test_local_patches_do_not_query_the_table(self):
+        self._codes("0")
+        with self.assertNumQueries(0):
+            self.index.upsert(self.first.pk, 1400000, -76.5, 3.5, None)
+            self.index.remove(self.other.pk)
+            self.assertEqual(self._codes("14"), [1400000])
+            self.assertEqual(self._codes("13"), [])
+            self.assertEqual(self._codes("012"), [120002])
+
+
+class AddressTrigramIndexTests(TestCase):
+    def test_normalize_address(self):
+        self.assertEqual(normalize_address("Calle 5 No. 40-12"), "CL 5 40 12")
+        self.assertEqual(normalize_address("Cra40A # 5"), "KR 40 A 5")
+        self.assertEqual(normalize_address(None), "")
+
+    def test_search_ranks_by_shared_trigrams(self):
+        calle = _node(address="Calle 5 # 40-12")
+        carrera = _node(address="Carrera 40 # 5-10")
+        _node(address="Avenida 6N # 2-30")
+        ranked = AddressTrigramIndex().search(normalize_address("cll 5 no 40 12"))
+        self.assertEqual([node_id for node_id, _ in ranked], [calle.pk, carrera.pk])
+        self.assertEqual(ranked[0][1], 1.0)
+
+
+class MergeNodesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.material = Material.objects.create(code="CU", name="Cobre")
+
+    def test_relations_are_repointed_and_victims_deleted(self):
+        survivor = _node(painting_code=1000001, is_duplicated=True)
+        victim = _node(painting_code=1000001, is_duplicated=True)
+        other = _node(-76.4, 3.5)
+        trafo = _trafo("T1", node=victim)
+        net = _net(self.material, victim, other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = merge_nodes(survivor.pk, [victim.pk])
+
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(result["infrastructure.Trafo.fk_node"], 1)
+        self.assertEqual(result["infrastructure.Net.last_node"], 1)
+        self.assertFalse(Node.objects.filter(pk=victim.pk).exists())
+        self.assertEqual(Trafo.objects.get(pk=trafo.pk).fk_node_id, survivor.pk)
+        net.refresh_from_db()
+        self.assertEqual((net.last_node_id, net.current_node_id), (survivor.pk, other.pk))
+        self.assertFalse(Node.objects.get(pk=survivor.pk).is_duplicated)
+        # El historial registra el re-apuntado
+        self.assertTrue(Trafo.historical.filter(id=trafo.pk, history_change_reason="Fusión de nodos").exists())
+
+    def test_nets_inside_the_group_are_deleted(self):
+        survivor, victim, other = _node(), _node(), _node(-76.4, 3.5)
+        loop = _net(self.material, survivor, victim)
+        kept = _net(self.material, other, victim)
+
+        result = merge_nodes(survivor.pk, [victim.pk])
+
+        self.assertEqual(result["infrastructure.Net.deleted"], 1)
+        self.assertFalse(Net.objects.filter(pk=loop.pk).exists())
+        self.assertEqual(Net.objects.get(pk=kept.pk).current_node_id, survivor.pk)
+
+    def test_invalid_ids_raise(self):
+        survivor = _node()
+        with self.assertRaises(NodeMergeError):
+            merge_nodes(survivor.pk, [survivor.pk])
+        with self.assertRaises(NodeMergeError):
+            merge_nodes(survivor.pk + 1000, [survivor.pk])
+        with self.assertRaises(NodeMergeError):
+            merge_nodes(survivor.pk, [survivor.pk + 1000])
+        self.assertTrue(Node.objects.filter(pk=survivor.pk).exists())
+
+
+class InventoryRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.comuna = Comuna.objects.create(name="Comuna 1", poly=_square(-77, 3, 2))
+        cls.west = _district(cls.comuna, "Oeste", -77, 3)
+        cls.east = _district(cls.comuna, "Este", -76, 3)
+        cls.led = _luminaire_setting("LED", 70)
+        cls.sodium = _luminaire_setting("Sodio", 150)
+
+    def setUp(self):
+        district_resolver.invalidate()
+
+    def _rows(self, district, dimension):
+        return {
+            row.key: (row.label, row.count, row.watts)
+            for row in InventoryRollup.objects.filter(fk_district=district, dimension=dimension)
+        }
+
+    def test_saving_luminaires_updates_their_district(self):
+        west_node, east_node = _node(-76.5, 3.5), _node(-75.5, 3.5)
+        with self.captureOnCommitCallbacks(execute=True):
+            _luminaire(west_node, self.led)
+            _luminaire(west_node, self.led)
+            _luminaire(east_node, self.sodium, status=1)
+
+        self.assertEqual(self._rows(self.west, "luminaire_power"), {"70": ("70 W", 2, 140)})
+        self.assertEqual(self._rows(self.east, "luminaire_tech"), {str(self.sodium.fk_tech_id): ("Sodio", 1, 150)})
+        self.assertEqual(self._rows(self.east, "luminaire_status"), {"1": ("Malo", 1, 150)})
+
+    def test_moving_a_node_moves_its_counts(self):
+        node = _node(-76.5, 3.5)
+        with self.captureOnCommitCallbacks(execute=True):
+            _luminaire(node, self.led)
+        with self.captureOnCommitCallbacks(execute=True):
+            node.location = Point(-75.5, 3.5, srid=4326)
+            node.save()
+
+        self.assertEqual(self._rows(self.west, "luminaire_power"), {})
+        self.assertEqual(self._rows(self.east, "luminaire_power"), {"70": ("70 W", 1, 70)})
+
+    def test_deleting_a_luminaire_clears_the_row(self):
+        node = _node(-76.5, 3.5)
+        with self.captureOnCommitCallbacks(execute=True):
+            luminaire = _luminaire(node, self.led)
+        with self.captureOnCommitCallbacks(execute=True):
+            luminaire.delete()
+        self.assertEqual(self._rows(self.west, "luminaire_power"), {})
+
+    def test_summary_adds_the_districts_of_a_comuna(self):
+        _luminaire(_node(-76.5, 3.5), self.led)
+        _luminaire(_node(-75.5, 3.5), self.led)
+        _luminaire(_node(-75.5, 3.6), self.sodium)
+        rebuild_inventory_rollups()
+
+        summary = inventory_summary(comuna=self.comuna.pk, dimensions=["luminaire_power"])
+        self.assertEqual(
+            [(row["key"], row["count"], row["watts"]) for row in summary["luminaire_power"]],
+            [("70", 2, 140), ("150", 1, 150)],
+        )
+        by_district = inventory_summary(district=self.west.pk, dimensions=["luminaire_power"])
+        self.assertEqual([row["count"] for row in by_district["luminaire_power"]], [1])
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "trafo_loads": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "trafo-loads"},
+})
+class TrafoLoadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.node = _node()
+        cls.led = _luminaire_setting("LED", 100)
+        cls.trafo = _trafo("T1", power=TrafoPower.objects.create(power=1000))
+        cls.empty = _trafo("T2")
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["trafo_loads"].clear()
+
+    def test_load_counts_only_working_luminaires(self):
+        for status in (2, 2, 1):
+            _luminaire(self.node, self.led, fk_trafo=self.trafo, status=status)
+
+        loads = compute_trafo_loads([self.trafo.pk, self.empty.pk])
+        self.assertEqual(loads[self.trafo.pk]["luminaires"], 3)
+        self.assertEqual(loads[self.trafo.pk]["luminaires_on"], 2)
+        self.assertEqual(loads[self.trafo.pk]["connected_kw"], 0.3)
+        self.assertEqual(loads[self.trafo.pk]["operating_kw"], 0.2)
+        self.assertEqual(loads[self.trafo.pk]["capacity_kw"], 1.0)
+        self.assertEqual(loads[self.trafo.pk]["utilization"], 0.2)
+        # Sin luminarias ni potencia nominal
+        self.assertEqual(loads[self.empty.pk]["luminaires"], 0)
+        self.assertIsNone(loads[self.empty.pk]["capacity_kw"])
+        self.assertIsNone(loads[self.empty.pk]["utilization"])
+
+    def test_loads_are_cached_in_their_own_alias(self):
+        _luminaire(self.node, self.led, fk_trafo=self.trafo)
+        self.assertEqual(get_trafo_loads([self.trafo.pk])[0]["luminaires"], 1)
+        self.assertIsNotNone(caches["trafo_loads"].get(f"trafo_load:{self.trafo.pk}"))
+        self.assertIsNone(caches["default"].get(f"trafo_load:{self.trafo.pk}"))
+        with self.assertNumQueries(0):
+            get_trafo_loads([self.trafo.pk])
+
+    def test_saving_a_luminaire_invalidates_its_trafos(self):
+        luminaire = _luminaire(self.node, self.led, fk_trafo=self.trafo)
+        get_trafo_loads([self.trafo.pk, self.empty.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            luminaire.fk_trafo = self.empty
+            luminaire.save()
+
+        loads = {load["trafo"]: load for load in get_trafo_loads([self.trafo.pk, self.empty.pk])}
+        self.assertEqual(loads[self.trafo.pk]["luminaires"], 0)
+        self.assertEqual(loads[self.empty.pk]["luminaires"], 1)
+
+    def test_catalog_power_change_invalidates_the_load(self):
+        _luminaire(self.node, self.led, fk_trafo=self.trafo)
+        get_trafo_loads([self.trafo.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.led.power = 250
+            self.led.save()
+
+        self.assertEqual(get_trafo_loads([self.trafo.pk])[0]["connected_kw"], 0.25)
+
+
+class NetworkGraphTests(SimpleTestCase):
+    # (tramo, nodo anterior, nodo actual, trafo, longitud): 10-11-12-13 con rama 11-14,
+    # y una componente aparte 20-21
+    ROWS = [
+        (1, 10, 11, 5, 30),
+        (2, 11, 12, 5, 25),
+        (3, 12, 13, 5, 40),
+        (4, 11, 14, 6, 10),
+        (5, 20, 21, None, 15),
+    ]
+
+    def setUp(self):
+        net = mock.patch("apps.infrastructure.topology.Net").start()
+        net.objects.filter.return_value.values_list.return_value = self.ROWS
+        mock.patch.object(NetworkGraph, "_current_version", return_value=(len(self.ROWS), None)).start()
+        self.addCleanup(mock.patch.stopall)
+        self.graph = NetworkGraph()
+
+    def test_csr_layout(self):
+        self.graph._ensure()
+        graph = self.graph
+        self.assertEqual(len(graph.node_ids), 7)
+        self.assertEqual(len(graph.indptr), 8)
+        # Cada tramo aparece una vez por extremo
+        self.assertEqual(len(graph.indices), 2 * len(self.ROWS))
+        degree = {node_id: graph.indptr[i + 1] - graph.indptr[i] for node_id, i in graph.index.items()}
+        self.assertEqual(degree, {10: 1, 11: 3, 12: 2, 13: 1, 14: 1, 20: 1, 21: 1})
+
+    def test_neighbours(self):
+        self.graph._ensure()
+        self.assertEqual(sorted(self.graph.neighbours(11)), [(10, 1, 5), (12, 2, 5), (14, 4, 6)])
+        self.assertEqual(list(self.graph.neighbours(99)), [])
+
+    def test_path_and_components(self):
+        self.assertEqual(self.graph.path(10, 13), [(10, None), (11, 1), (12, 2), (13, 3)])
+        self.assertIsNone(self.graph.path(10, 20))
+        self.assertEqual(self.graph.component(13), {10, 11, 12, 13, 14})
+        self.assertEqual(self.graph.components(), [{10, 11, 12, 13, 14}, {20, 21}])
+        self.assertEqual(self.graph.edge(4), (11, 14, 6, 10))
+
+    def test_incremental_changes(self):
+        self.graph._ensure()
+        # Un tramo nuevo une 13 con 20 y se elimina el tramo 11-12
+        self.graph.apply_net(6, 13, 20, 5, 12, count_delta=1)
+        self.graph.remove_net(2)
+        self.assertIsNone(self.graph.path(10, 21))
+        self.assertEqual(self.graph.path(12, 21), [(12, None), (13, 3), (20, 6), (21, 5)])
+        self.assertEqual(self.graph.components(), [{12, 13, 20, 21}, {10, 11, 14}])
+        self.assertIsNone(self.graph.edge(2))
+
+    def test_descendants(self):
+        self.graph._ensure()
+        tree = self.graph._bfs(10, trafo_id=5)
+        self.assertEqual(set(tree), {10, 11, 12, 13})
+        self.assertEqual(NetworkGraph.descendants(tree, 12), {12, 13})
+
+
+class OutageTests(TestCase):
+    # El trafo está en n0; tramos n0-n1, n1-n2 y la rama n1-n3
+    databases = {"default", "file_numbers"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.material = Material.objects.create(code="CU", name="Cobre")
+        cls.nodes = [_node(-76.5 + i * 0.01, 3.5) for i in range(4)]
+        n0, n1, n2, n3 = cls.nodes
+        cls.trafo = _trafo("T1", node=n0)
+        cls.nets = [
+            _net(cls.material, n0, n1, trafo=cls.trafo),
+            _net(cls.material, n1, n2, trafo=cls.trafo),
+            _net(cls.material, n1, n3, trafo=cls.trafo),
+        ]
+        setting = _luminaire_setting("LED", 50)
+        cls.luminaires = [_luminaire(node, setting, fk_trafo=cls.trafo) for node in (n1, n2, n3)]
+        damage = GeneralTypeDamage.objects.create(name="Luminaria apagada")
+        cls.open_pqr = PqrActive.objects.create(
+            fk_type_damage=damage, fk_node_reported=n2, name="ana", observation="Sin luz", file_number=31000001
+        )
+        PqrActive.objects.create(
+            fk_type_damage=damage, fk_node_reported=n2, name="ana", observation="Sin luz", file_number=31000002,
+            status=3,
+        )
+
+    def setUp(self):
+        network_graph.invalidate()
+
+    def test_failed_net_cuts_only_the_nodes_behind_it(self):
+        n0, n1, n2, n3 = self.nodes
+        result = analyze_outage(net_ids=[self.nets[1].pk])
+        self.assertEqual(result["nodes"], [n2.pk])
+        self.assertEqual([row["id"] for row in result["luminaires"]], [self.luminaires[1].pk])
+        self.assertEqual(result["total_watts"], 50)
+        self.assertEqual([row["id"] for row in result["pqrs"]], [self.open_pqr.pk])
+
+    def test_failed_trafo_cuts_its_whole_circuit(self):
+        result = analyze_outage(trafo_ids=[self.trafo.pk])
+        self.assertEqual(result["nodes"], sorted(node.pk for node in self.nodes))
+        self.assertEqual(len(result["luminaires"]), 3)
+        self.assertEqual(result["total_watts"], 150)
+
+    def test_failed_box_cuts_its_subtree(self):
+        n0, n1, n2, n3 = self.nodes
+        box = ApBox.objects.create(fk_node=n1, fk_trafo=self.trafo, type=1, owner=1)
+        result = analyze_outage(apbox_ids=[box.pk])
+        self.assertEqual(result["nodes"], sorted([n1.pk, n2.pk, n3.pk]))
+
+    def test_unknown_ids_are_reported(self):
+        result = analyze_outage(trafo_ids=[999999], apbox_ids=[999999], net_ids=[999999])
+        self.assertEqual(result["nodes"], [])
+        self.assertEqual(result["missing"], {"trafos": [999999], "apboxes": [999999], "nets": [999999]})
+
+
+def _decode_arcs(topology):
+    arcs = []
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append((x, y))
+        arcs.append(points)
+    return arcs
+
+
+def _decode_ring(arcs, refs):
+    points = []
+    for ref in refs:
+        arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def _cyclic(ring):
+    """Anillo abierto (sin repetir el punto inicial) rotado a su punto mínimo."""
+    if ring[0] == ring[-1]:
+        ring = ring[:-1]
+    start = ring.index(min(ring))
+    return ring[start:] + ring[:start]
+
+
+class TopoJSONTests(SimpleTestCase):
+    LEFT = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0), (0.0, 0.0)]
+    RIGHT = [(1.0, 0.0), (2.0, 0.0), (2.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
+    ISLANDS = [
+        [[(3.0, 0.0), (4.0, 0.0), (4.0, 1.0), (3.0, 0.0)]],
+        [[(5.0, 0.0), (6.0, 0.0), (6.0, 1.0), (5.0, 0.0)]],
+    ]
+
+    def _layers(self):
+        return {
+            "districts": [
+                (1, {"name": "Izquierda"}, [[self.LEFT]]),
+                (2, {"name": "Derecha"}, [[self.RIGHT]]),
+                (3, {"name": "Islas"}, self.ISLANDS),
+            ]
+        }
+
+    def _decoded(self, topology):
+        arcs = _decode_arcs(topology)
+        (sx, sy), (tx, ty) = topology["transform"]["scale"], topology["transform"]["translate"]
+        features = {}
+        for geometry in topology["objects"]["districts"]["geometries"]:
+            polygons = [geometry["arcs"]] if geometry["type"] == "Polygon" else geometry["arcs"]
+            features[geometry["id"]] = [
+                [[(x * sx + tx, y * sy + ty) for x, y in _decode_ring(arcs, refs)] for refs in polygon]
+                for polygon in polygons
+            ]
+        return features
+
+    def test_round_trip_restores_the_rings(self):
+        topology = encode_topology(self._layers())
+        decoded = self._decoded(topology)
+        # Una celda de la grilla de cuantización
+        tolerance = max(topology["transform"]["scale"])
+        for pk, _, polygons in self._layers()["districts"]:
+            self.assertEqual(len(decoded[pk]), len(polygons))
+            for original, restored in zip(polygons, decoded[pk]):
+                for ring, restored_ring in zip(original, restored):
+                    expected, actual = _cyclic(ring), _cyclic(restored_ring)
+                    self.assertEqual(len(expected), len(actual))
+                    for (ex, ey), (ax, ay) in zip(expected, actual):
+                        self.assertAlmostEqual(ex, ax, delta=tolerance)
+                        self.assertAlmostEqual(ey, ay, delta=tolerance)
+
+    def test_shared_border_is_stored_once(self):
+        topology = encode_topology(self._layers())
+        geometries = {g["id"]: g for g in topology["objects"]["districts"]["geometries"]}
+        left = set(geometries[1]["arcs"][0])
+        right = set(geometries[2]["arcs"][0])
+        shared = [ref for ref in left if ~ref in right]
+        self.assertEqual(len(shared), 1)
+        # Izquierda: borde compartido + resto; Derecha: resto + borde invertido; islas: uno cada una
+        self.assertEqual(len(topology["arcs"]), 5)
+
+    def test_geometry_types_and_properties(self):
+        topology = encode_topology(self._layers())
+        geometries = {g["id"]: g for g in topology["objects"]["districts"]["geometries"]}
+        self.assertEqual(geometries[1]["type"], "Polygon")
+        self.assertEqual(geometries[3]["type"], "MultiPolygon")
+        self.assertEqual(geometries[2]["properties"], {"name": "Derecha"})
+        self.assertEqual(topology["bbox"], [0.0, 0.0, 6.0, 1.0])
+
+    def _wiggly_neighbours(self):
+        # Borde compartido con 101 vértices que se desvían menos de 0.01 de x = 1
+        rng = random.Random(3)
+        border = [(1.0, 0.0)] + [(1.0 + rng.uniform(-0.01, 0.01), i / 100) for i in range(1, 100)] + [(1.0, 1.0)]
+        left = [(0.0, 0.0)] + border + [(0.0, 1.0), (0.0, 0.0)]
+        right = [(2.0, 0.0), (2.0, 1.0)] + border[::-1] + [(2.0, 0.0)]
+        return {"districts": [(1, {}, [[left]]), (2, {}, [[right]])]}
+
+    def test_simplified_neighbours_keep_the_same_border(self):
+        layers = self._wiggly_neighbours()
+        simplified = simplify_layers(layers, 0.02)["districts"]
+        left, right = simplified[1][0][0], simplified[2][0][0]
+        self.assertLess(len(left), 20)
+        self.assertEqual(left[0], left[-1])
+        # Los dos barrios comparten exactamente los mismos vértices del borde: sin huecos ni traslapes
+        self.assertEqual({p for p in left if p[0] > 0.5}, {p for p in right if p[0] < 1.5})
+
+    def test_tolerance_simplifies_the_shared_arc_once(self):
+        topology = encode_topology(self._wiggly_neighbours(), tolerance=0.02)
+        self.assertEqual(len(topology["arcs"]), 3)
+        self.assertLess(max(len(arc) for arc in topology["arcs"]), 10)
+        # El anillo de dos arcos conserva al menos un punto interior del borde
+        decoded = self._decoded(topology)
+        self.assertGreaterEqual(len(set(decoded[1][0][0])), 3)
+
+    def test_small_rings_are_not_collapsed(self):
+        triangle = [(5.0, 5.0), (5.001, 5.0), (5.0, 5.001), (5.0, 5.0)]
+        simplified = simplify_layers({"districts": [(1, {}, [[triangle]])]}, 1.0)["districts"]
+        self.assertEqual(len(simplified[1][0][0]), 4)
+
+    def test_empty_layers(self):
+        topology = encode_topology({"comunas": []})
+        self.assertEqual(topology["objects"], {"comunas": {"type": "GeometryCollection", "geometries": []}})
+        self.assertEqual(topology["arcs"], [])
+
+
+class BoundaryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.comunas = [
+            Comuna.objects.create(name=f"Comuna {i}", poly=_square(-77 + i, 3, 1)) for i in range(3)
+        ]
+
+    def setUp(self):
+        self.cache = BoundaryCache()
+        self.factory = RequestFactory()
+
+    def _get(self, payload, **headers):
+        return payload.response(self.factory.get("/", headers=headers))
+
+    def test_accepted_encodings_parses_q_values(self):
+        self.assertEqual(
+            accepted_encodings("gzip;q=0.5, br ;q=0, identity, x;q=abc"),
+            {"gzip": 0.5, "br": 0.0, "identity": 1.0, "x": 0.0},
+        )
+        self.assertEqual(accepted_encodings(None), {})
+
+    def test_encoding_follows_the_q_values(self):
+        payload = Payload(b'{"a":1}', None)
+        response = self._get(payload, accept_encoding="gzip, br;q=0")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), payload.body)
+        for header in ("gzip;q=0, br;q=0", "identity", "*;q=0", ""):
+            response = self._get(payload, accept_encoding=header)
+            self.assertFalse(response.has_header("Content-Encoding"), header)
+            self.assertEqual(response.content, payload.body)
+        response = self._get(payload, accept_encoding="*")
+        self.assertEqual(response["Content-Encoding"], "br" if brotli else "gzip")
+
+    def test_matching_etag_returns_304(self):
+        payload = self.cache.comunas_payload()
+        response = self._get(payload, accept_encoding="gzip;q=1, br;q=0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        cached = self._get(payload, accept_encoding="gzip;q=1, br;q=0.5", if_none_match=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertIn("Accept-Encoding", cached["Vary"])
+        # El ETag es por codificación: el de gzip no sirve para la respuesta sin comprimir
+        self.assertEqual(self._get(payload, if_none_match=response["ETag"]).status_code, 200)
+
+    def test_subsets_are_built_on_demand(self):
+        first, second, third = (comuna.pk for comuna in self.comunas)
+        full = self.cache.comunas_payload()
+        stored = len(self.cache._payloads)
+
+        subset = self.cache.comunas_payload([third, 9999, first, third])
+        self.assertEqual([c["id"] for c in json.loads(subset.body)], [first, third])
+        # Sin variantes precomprimidas ni lugar en la LRU
+        self.assertEqual(subset._variants, {})
+        self.assertEqual(len(self.cache._payloads), stored)
+        self.assertEqual(gzip.decompress(self._get(subset, accept_encoding="gzip").content), subset.body)
+
+        # Todas las comunas, en cualquier orden: la respuesta completa de la LRU
+        self.assertIs(self.cache.comunas_payload([second, third, first]), full)
+        topology = json.loads(self.cache.comunas_payload([second], fmt="topojson").body)
+        self.assertEqual([g["id"] for g in topology["objects"]["comunas"]["geometries"]], [second])
+
+
+class NodeSurveyImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.comuna = Comuna.objects.create(name="Comuna 1", poly=_square(-77, 3, 2))
+        cls.west = _district(cls.comuna, "Oeste", -77, 3)
+        setting = _luminaire_setting("LED", 70)
+        cls.luminaire = {
+            "fk_setting": setting.pk,
+            "fk_opticprotection": OpticProtection.objects.get_or_create(code="IP6", name="IP66")[0].pk,
+            "fk_photocell": PhotoCellType.objects.get_or_create(code="FOT", name="Fotocelda")[0].pk,
+            "fk_armtype": ArmType.objects.get_or_create(code="BRZ", name="Brazo")[0].pk,
+            "code": 501,
+            "trafo": "T9",
+        }
+        cls.trafo = {"code": "T9", "owner": 1, "type": 1, "installationtype": "OH", "using": 2}
+
+    def setUp(self):
+        district_resolver.invalidate()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = directory.name
+        settings_override = override_settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _csv(self, rows):
+        path = os.path.join(self.media, "levantamiento.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["lat", "lng", "painting_code", "address", "trafos", "luminaires"])
+            writer.writerows(rows)
+        return path
+
+    def _rows(self):
+        return [
+            [3.5, -76.5, "1234567", "Calle 5 # 10-20", json.dumps([self.trafo]), json.dumps([self.luminaire])],
+            [3.6, -76.4, "123", "", "", ""],
+            ["x", -76.4, "7654321", "", "", ""],
+            [3.7, -76.3, "7654321", "", "", json.dumps([dict(self.luminaire, code=502, trafo="NOEXISTE")])],
+        ]
+
+    def test_valid_rows_are_inserted_and_the_rest_rejected(self):
+        path = self._csv(self._rows())
+        reject_path = os.path.join(self.media, "rechazos.csv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = NodeSurveyImporter(chunk_size=2).run(path, reject_path=reject_path)
+
+        self.assertEqual((stats["read"], stats["nodes"], stats["rejected"]), (4, 1, 3))
+        self.assertEqual(stats["children"]["trafos"], 1)
+        self.assertEqual(stats["children"]["luminaires"], 1)
+        node = Node.objects.get(painting_code=1234567)
+        self.assertEqual(node.fk_district_id, self.west.pk)
+        luminaire = Luminaire.objects.get(fk_node=node)
+        self.assertEqual(luminaire.fk_trafo.code, "T9")
+        self.assertEqual(Trafo.objects.get(code="T9").fk_node_id, node.pk)
+
+        with open(reject_path, encoding="utf-8") as f:
+            rejects = list(csv.reader(f))[1:]
+        self.assertEqual([row[0] for row in rejects], ["3", "4", "5"])
+        self.assertIn("7 dígitos", rejects[0][1])
+        self.assertIn("Coordenadas", rejects[1][1])
+        self.assertIn("NOEXISTE", rejects[2][1])
+
+    def test_queued_job_reports_progress_and_rejects(self):
+        with open(self._csv(self._rows()), "rb") as f:
+            content = f.read()
+        job = ImportJob(
+            resource=f"{NodeSurveyJobRunner.__module__}.{NodeSurveyJobRunner.__qualname__}",
+            model_label="infrastructure.Node", input_format="CSV", dry_run=False, chunk_size=2,
+        )
+        job.file.save("levantamiento.csv", ContentFile(content), save=False)
+        job.save()
+
+        self.assertTrue(run_import_job(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.DONE, job.message)
+        self.assertEqual((job.total_rows, job.processed_rows, job.new_rows, job.error_rows), (4, 4, 1, 3))
+        self.assertEqual(job.progress, 100)
+        self.assertIn("Nodos creados: 1", job.message)
+        with job.error_report.open("r") as f:
+            self.assertEqual(len(list(csv.reader(f))), 4)
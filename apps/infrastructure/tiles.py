@@ -0,0 +1,220 @@
+# standard library
+import math
+import os
+import shutil
+import tempfile
+import time
+
+# Django
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db import connection
+
+# local Django
+from apps.infrastructure.models import Node
+from apps.infrastructure.mvt import encode_point_layer
+
+
+"""
+    Vector tiles (Mapbox Vector Tile) de la capa de Nodos con caché en disco.
+
+    Cada tile se genera con ST_AsMVT (PostGIS >= 3.0), o en Python con
+    apps.infrastructure.mvt en los demás motores (SpatiaLite), y se guarda en
+    NODE_TILES_CACHE_DIR/{z}/{x}/{y}.mvt. Al crear, mover o eliminar un Nodo sólo
+    se borran los tiles que contienen su ubicación (actual y anterior) en cada zoom.
+
+    Un tile que se genera mientras otra transacción guarda un Nodo puede leer los
+    datos anteriores y escribirse después de la invalidación. Cada invalidación
+    actualiza primero la marca INVALIDATED_STAMP; el tile generado sólo se conserva
+    si la marca es anterior al inicio de su generación (se comprueba después de
+    escribirlo, así que una invalidación simultánea o lo borra o es detectada).
+"""
+
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_LAYER = "nodes"
+# Holgura para la resolución de las fechas de modificación del sistema de archivos
+STAMP_MARGIN_NS = 1_000_000_000
+
+MIN_ZOOM = getattr(settings, "NODE_TILES_MIN_ZOOM", 12)
+MAX_ZOOM = getattr(settings, "NODE_TILES_MAX_ZOOM", 20)
+CACHE_DIR = getattr(
+    settings, "NODE_TILES_CACHE_DIR", os.path.join(settings.BASE_DIR, "cache", "tiles", "nodes")
+)
+
+
+INVALIDATED_STAMP = os.path.join(CACHE_DIR, ".invalidated")
+
+
+def tile_path(z, x, y):
+    return os.path.join(CACHE_DIR, str(z), str(x), f"{y}.mvt")
+
+
+def is_valid_tile(z, x, y):
+    return MIN_ZOOM <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _tile_fraction(lng, lat, z):
+    """Coordenadas de tile (fraccionarias) de un punto WGS84 en el zoom z."""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    lat_rad = math.radians(lat)
+    fx = (lng + 180.0) / 360.0 * n
+    fy = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return fx, fy
+
+
+def tiles_for_point(lng, lat, zooms=None):
+    """
+    Tiles que pueden contener el punto en cada zoom. Un punto sobre el borde
+    (a menos de un pixel de tile) se asigna también al tile vecino.
+    """
+    margin = 1.0 / TILE_EXTENT
+    tiles = set()
+    for z in zooms or range(MIN_ZOOM, MAX_ZOOM + 1):
+        n = 2 ** z
+        fx, fy = _tile_fraction(lng, lat, z)
+        xs = {int(math.floor(fx - margin)), int(math.floor(fx + margin))}
+        ys = {int(math.floor(fy - margin)), int(math.floor(fy + margin))}
+        tiles.update((z, x, y) for x in xs for y in ys if 0 <= x < n and 0 <= y < n)
+    return tiles
+
+
+def _tile_bounds(z, x, y, margin=0.0):
+    """(oeste, sur, este, norte) WGS84 del tile, ampliado margin (fracción de tile) por lado."""
+    n = 2 ** z
+
+    def lng(tx):
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lng(x - margin), lat(y + 1 + margin), lng(x + 1 + margin), lat(y - margin)
+
+
+def render_node_tile(z, x, y):
+    """Genera el tile MVT; devuelve bytes (vacío si no hay nodos)."""
+    if connection.vendor == "postgresql":
+        return _render_postgis(z, x, y)
+    return _render_python(z, x, y)
+
+
+def _render_python(z, x, y):
+    """Mismo tile que _render_postgis (puntos dentro del buffer, mismas propiedades) sin ST_AsMVT."""
+    bbox = Polygon.from_bbox(_tile_bounds(z, x, y, TILE_BUFFER / TILE_EXTENT))
+    bbox.srid = 4326
+    rows = (
+        Node.objects
+        .filter(location__intersects=bbox)
+        .order_by("id")
+        .values_list("id", "painting_code", "is_duplicated", "fk_district_id", "location")
+    )
+    features = []
+    for pk, code, is_duplicated, district_id, location in rows.iterator(chunk_size=2000):
+        fx, fy = _tile_fraction(location.x, location.y, z)
+        px, py = round((fx - x) * TILE_EXTENT), round((fy - y) * TILE_EXTENT)
+        if not (-TILE_BUFFER <= px <= TILE_EXTENT + TILE_BUFFER and -TILE_BUFFER <= py <= TILE_EXTENT + TILE_BUFFER):
+            continue
+        properties = {
+            "id": pk,
+            "painting_code": code,
+            "is_duplicated": bool(is_duplicated),
+            "fk_district_id": district_id,
+        }
+        features.append((px, py, properties))
+    return encode_point_layer(TILE_LAYER, features, TILE_EXTENT)
+
+
+def _render_postgis(z, x, y):
+    table = connection.ops.quote_name(Node._meta.db_table)
+    sql = f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(ST_Transform(n.location, 3857), bounds.geom, %s, %s, true) AS geom,
+                n.id,
+                n.painting_code,
+                COALESCE(n.is_duplicated, false) AS is_duplicated,
+                n.fk_district_id
+            FROM {table} n, bounds
+            WHERE n.location && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(mvtgeom.*, %s, %s, 'geom') FROM mvtgeom
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [z, x, y, TILE_EXTENT, TILE_BUFFER, TILE_LAYER, TILE_EXTENT])
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] is not None else b""
+
+
+def get_node_tile(z, x, y):
+    """Devuelve (bytes, ruta) del tile, generándolo y guardándolo en disco si no existe."""
+    path = tile_path(z, x, y)
+    try:
+        with open(path, "rb") as f:
+            return f.read(), path
+    except FileNotFoundError:
+        pass
+
+    started = time.time_ns()
+    data = render_node_tile(z, x, y)
+
+    # Escritura atómica: otro worker puede estar leyendo o generando el mismo tile
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        if _invalidated_since(started):
+            # Pudo generarse con datos anteriores a la invalidación: no se cachea
+            os.remove(path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return data, path
+
+
+def _touch_stamp():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(INVALIDATED_STAMP, "a"):
+        pass
+    os.utime(INVALIDATED_STAMP, None)
+
+
+def _invalidated_since(started_ns):
+    try:
+        return os.stat(INVALIDATED_STAMP).st_mtime_ns >= started_ns - STAMP_MARGIN_NS
+    except FileNotFoundError:
+        return False
+
+
+def invalidate_node_tiles(points):
+    """Elimina del caché los tiles que contienen alguno de los puntos (lng, lat)."""
+    tiles = set()
+    for lng, lat in points:
+        tiles |= tiles_for_point(lng, lat)
+    if not tiles:
+        return 0
+
+    # La marca va antes de borrar: un tile en generación o la ve o es borrado aquí
+    _touch_stamp()
+    for z, x, y in tiles:
+        try:
+            os.remove(tile_path(z, x, y))
+        except FileNotFoundError:
+            pass
+    return len(tiles)
+
+
+def clear_node_tiles():
+    """Vacía todo el caché de tiles (p.ej. tras una importación masiva)."""
+    _touch_stamp()
+    for entry in os.scandir(CACHE_DIR):
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
@@ -0,0 +1,287 @@
+"""
+    Codificación TopoJSON de polígonos (comunas, barrios).
+
+    Las coordenadas se cuantizan a una grilla entera (transform), los anillos se
+    cortan en los puntos de unión entre polígonos vecinos y cada arco resultante se
+    guarda una sola vez: un borde compartido por dos barrios se transmite una vez y
+    cada barrio lo referencia (índice negativo ~i si lo recorre al revés). Los arcos
+    van codificados en deltas.
+
+    La simplificación (Douglas-Peucker) se aplica a los arcos, después del corte:
+    cada borde compartido se simplifica una sola vez y los dos vecinos conservan el
+    mismo borde, sin huecos ni traslapes. Las uniones son extremos de arco y no se
+    mueven. simplify_layers devuelve los polígonos ya simplificados así (para
+    guardarlos por banda de zoom) y encode_topology acepta la misma tolerancia.
+
+    Especificación: https://github.com/topojson/topojson-specification
+"""
+
+# standard library
+import heapq
+
+
+QUANTIZATION = 100000
+
+
+def _bbox(layers):
+    xs, ys = [], []
+    for features in layers.values():
+        for _, _, polygons in features:
+            for polygon in polygons:
+                for ring in polygon:
+                    for x, y in ring:
+                        xs.append(x)
+                        ys.append(y)
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _delta(points):
+    encoded = []
+    px = py = 0
+    for x, y in points:
+        encoded.append([x - px, y - py])
+        px, py = x, y
+    return encoded
+
+
+class _ArcIndex:
+    """Arcos únicos; un arco y su inverso comparten índice."""
+
+    def __init__(self, junctions):
+        self.junctions = junctions
+        self.arcs = []
+        self._index = {}
+
+    def _ref(self, points):
+        key = tuple(points)
+        i = self._index.get(key)
+        if i is not None:
+            return i
+        i = self._index.get(key[::-1])
+        if i is not None:
+            return ~i
+        self._index[key] = len(self.arcs)
+        self.arcs.append(key)
+        return len(self.arcs) - 1
+
+    def ring(self, ring):
+        """Referencias a arcos de un anillo cuantizado (sin repetir el punto inicial)."""
+        junctions = self.junctions
+        start = next((i for i, p in enumerate(ring) if p in junctions), None)
+        if start is None:
+            # Anillo sin uniones: un único arco cerrado, rotado al punto mínimo para
+            # reconocer el mismo anillo recorrido desde otro vértice
+            start = ring.index(min(ring))
+            rotated = ring[start:] + ring[:start]
+            return [self._ref(rotated + [rotated[0]])]
+
+        rotated = ring[start:] + ring[:start]
+        refs = []
+        current = [rotated[0]]
+        for point in rotated[1:] + [rotated[0]]:
+            current.append(point)
+            if point in junctions:
+                refs.append(self._ref(current))
+                current = [point]
+        return refs
+
+
+def _simplify_arc(arc, tolerance, scale, min_points):
+    """
+    Douglas-Peucker sobre un arco cuantizado (tolerancia en unidades originales).
+    Conserva los extremos y, aunque estén dentro de la tolerancia, los puntos más
+    alejados hasta tener min_points (para que un anillo no colapse).
+    """
+    n = len(arc)
+    if n <= 2:
+        return arc
+    sx, sy = scale
+    points = [(x * sx, y * sy) for x, y in arc]
+
+    def farthest(first, last):
+        (x0, y0), (x1, y1) = points[first], points[last]
+        dx, dy = x1 - x0, y1 - y0
+        length = dx * dx + dy * dy
+        best, index = -1.0, None
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length:
+                t = max(0.0, min(1.0, ((px - x0) * dx + (py - y0) * dy) / length))
+                ex, ey = x0 + t * dx - px, y0 + t * dy - py
+            else:
+                # Arco cerrado: distancia al punto inicial
+                ex, ey = px - x0, py - y0
+            distance = ex * ex + ey * ey
+            if distance > best:
+                best, index = distance, i
+        return best, index
+
+    # Se divide siempre el tramo con el punto más alejado: el resultado es el de
+    # Douglas-Peucker y permite completar min_points con los puntos más relevantes
+    keep = {0, n - 1}
+    limit = tolerance * tolerance
+    pending = []
+    distance, index = farthest(0, n - 1)
+    heapq.heappush(pending, (-distance, 0, n - 1, index))
+    while pending:
+        distance, first, last, index = heapq.heappop(pending)
+        if -distance <= limit and len(keep) >= min_points:
+            break
+        keep.add(index)
+        for a, b in ((first, index), (index, last)):
+            if b - a > 1:
+                distance, i = farthest(a, b)
+                heapq.heappush(pending, (-distance, a, b, i))
+    return tuple(arc[i] for i in sorted(keep))
+
+
+def _simplify_arcs(arcs, refs, tolerance, scale):
+    """
+    Simplifica cada arco una vez. refs: anillos como listas de referencias; un arco
+    de un anillo con menos de tres arcos debe conservar al menos un punto interior
+    para que el anillo no se degenere.
+    """
+    min_points = [4 if arc[0] == arc[-1] else 2 for arc in arcs]
+    for ring in refs:
+        if len(ring) < 3:
+            for ref in ring:
+                i = ref if ref >= 0 else ~ref
+                min_points[i] = max(min_points[i], 3)
+    return [_simplify_arc(arc, tolerance, scale, m) for arc, m in zip(arcs, min_points)]
+
+
+def _split(layers, quantization):
+    """
+    Cuantiza y corta los anillos en arcos. Devuelve (bbox, escala, capas, arcos) con
+    capas {nombre: [(id, propiedades, [[refs de cada anillo] por polígono])]}, o
+    None si no hay coordenadas.
+    """
+    bbox = _bbox(layers)
+    if bbox is None:
+        return None
+
+    x0, y0, x1, y1 = bbox
+    kx = (x1 - x0) / (quantization - 1) or 1
+    ky = (y1 - y0) / (quantization - 1) or 1
+
+    def quantize(ring):
+        points = []
+        for x, y in ring:
+            point = (int(round((x - x0) / kx)), int(round((y - y0) / ky)))
+            if not points or points[-1] != point:
+                points.append(point)
+        if len(points) > 1 and points[0] == points[-1]:
+            points.pop()
+        return points
+
+    quantized = {
+        name: [
+            (pk, properties, [[quantize(ring) for ring in polygon] for polygon in polygons])
+            for pk, properties, polygons in features
+        ]
+        for name, features in layers.items()
+    }
+
+    # Un punto es unión si aparece con vecinos distintos en algún anillo: ahí empieza
+    # o termina un borde compartido
+    neighbours = {}
+    junctions = set()
+    for features in quantized.values():
+        for _, _, polygons in features:
+            for polygon in polygons:
+                for ring in polygon:
+                    n = len(ring)
+                    for i, point in enumerate(ring):
+                        a, b = ring[i - 1], ring[(i + 1) % n]
+                        pair = (a, b) if a < b else (b, a)
+                        seen = neighbours.setdefault(point, pair)
+                        if seen != pair:
+                            junctions.add(point)
+
+    index = _ArcIndex(junctions)
+    split = {}
+    for name, features in quantized.items():
+        split[name] = []
+        for pk, properties, polygons in features:
+            arcs = [[index.ring(ring) for ring in polygon if len(ring) > 2] for polygon in polygons]
+            split[name].append((pk, properties, [polygon for polygon in arcs if polygon]))
+    return bbox, (kx, ky), split, index.arcs
+
+
+def _all_rings(split):
+    return [ring for features in split.values() for _, _, polygons in features for polygon in polygons for ring in polygon]
+
+
+def encode_topology(layers, quantization=QUANTIZATION, tolerance=None):
+    """
+    layers: {nombre: [(id, propiedades, polígonos)]} donde polígonos es una lista de
+    polígonos y cada polígono una lista de anillos [(x, y), ...]. Una entrada con un
+    solo polígono se emite como Polygon, con varios como MultiPolygon. Con tolerance
+    (en las unidades de las coordenadas) los arcos se simplifican antes de codificarse.
+    Devuelve el dict de la Topology.
+    """
+    topology = {"type": "Topology", "objects": {}, "arcs": []}
+    result = _split(layers, quantization)
+    if result is None:
+        for name in layers:
+            topology["objects"][name] = {"type": "GeometryCollection", "geometries": []}
+        return topology
+
+    (x0, y0, x1, y1), (kx, ky), split, arcs = result
+    if tolerance:
+        arcs = _simplify_arcs(arcs, _all_rings(split), tolerance, (kx, ky))
+
+    for name, features in split.items():
+        geometries = []
+        for pk, properties, polygons in features:
+            if not polygons:
+                continue
+            geometry = {"type": "Polygon", "arcs": polygons[0]} if len(polygons) == 1 else {"type": "MultiPolygon", "arcs": polygons}
+            geometry["id"] = pk
+            geometry["properties"] = properties
+            geometries.append(geometry)
+        topology["objects"][name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    topology["bbox"] = [x0, y0, x1, y1]
+    topology["transform"] = {"scale": [kx, ky], "translate": [x0, y0]}
+    topology["arcs"] = [_delta(arc) for arc in arcs]
+    return topology
+
+
+def simplify_layers(layers, tolerance, quantization=QUANTIZATION):
+    """
+    Simplifica capas completas sobre sus arcos compartidos. Mismo formato de entrada
+    que encode_topology; devuelve {nombre: {id: polígonos}} con los anillos cerrados
+    en las coordenadas originales. Un anillo que queda con menos de tres puntos se
+    descarta (y el polígono, si era su anillo exterior).
+    """
+    result = _split(layers, quantization)
+    if result is None:
+        return {name: {} for name in layers}
+
+    (x0, y0, _, _), (kx, ky), split, arcs = result
+    arcs = _simplify_arcs(arcs, _all_rings(split), tolerance, (kx, ky))
+
+    def ring_points(refs):
+        points = []
+        for ref in refs:
+            arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+            points.extend(arc if not points else arc[1:])
+        if points[0] != points[-1]:
+            points.append(points[0])
+        return [(x0 + x * kx, y0 + y * ky) for x, y in points]
+
+    simplified = {}
+    for name, features in split.items():
+        simplified[name] = {}
+        for pk, _, polygons in features:
+            shapes = []
+            for polygon in polygons:
+                rings = [ring_points(refs) for refs in polygon]
+                if len(set(rings[0])) < 3:
+                    continue
+                shapes.append([rings[0]] + [ring for ring in rings[1:] if len(set(ring)) >= 3])
+            simplified[name][pk] = shapes
+    return simplified
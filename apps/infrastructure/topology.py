@@ -0,0 +1,272 @@
+# standard library
+from array import array
+from collections import deque
+
+# Django
+from django.conf import settings
+
+# local Django
+from apps.core.versions import VersionedIndex
+from apps.infrastructure.models import Net, Trafo
+
+
+"""
+    Grafo de la red (Net) en memoria del proceso.
+
+    Cada tramo Net es una arista no dirigida last_node — current_node. La adyacencia
+    se guarda en formato CSR: los nodos se numeran 0..n-1 y los vecinos del nodo i
+    son indices[indptr[i]:indptr[i+1]] (con el id del tramo en edges y su trafo en
+    edge_trafo). Los cambios en Net se aplican sobre una capa incremental pequeña y
+    el CSR se reconstruye cuando esa capa crece o cuando otro proceso modifica la
+    tabla (conteo + última fecha de actualización, verificado cada
+    NET_GRAPH_CHECK_SECONDS).
+"""
+
+
+class NetworkGraph(VersionedIndex):
+    CHECK_SECONDS = getattr(settings, "NET_GRAPH_CHECK_SECONDS", 30)
+    REBUILD_THRESHOLD = 1000
+    models = (Net,)
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def _reset(self):
+        self.node_ids = array("q")
+        self.index = {}
+        self.indptr = array("q", [0])
+        self.indices = array("q")
+        self.edges = array("q")
+        self.edge_trafo = array("q")
+        self.edge_info = {}
+        # Capa incremental: tramos agregados/modificados y eliminados desde el último build
+        self._added = {}
+        self._added_adjacency = {}
+        self._removed = set()
+        self._components = None
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+    def _build(self, version):
+        self._reset()
+        rows = list(
+            Net.objects
+            .filter(last_node__isnull=False, current_node__isnull=False)
+            .values_list("id", "last_node_id", "current_node_id", "fk_trafo_id", "length")
+        )
+
+        index = {}
+        for _, a, b, _, _ in rows:
+            for node_id in (a, b):
+                if node_id not in index:
+                    index[node_id] = len(index)
+
+        size = len(index)
+        degree = [0] * (size + 1)
+        for _, a, b, _, _ in rows:
+            degree[index[a] + 1] += 1
+            degree[index[b] + 1] += 1
+        for i in range(size):
+            degree[i + 1] += degree[i]
+
+        total = degree[size]
+        indices = [0] * total
+        edges = [0] * total
+        edge_trafo = [0] * total
+        cursor = degree[:size]
+        for net_id, a, b, trafo_id, length in rows:
+            ia, ib = index[a], index[b]
+            for source, target in ((ia, ib), (ib, ia)):
+                position = cursor[source]
+                indices[position] = target
+                edges[position] = net_id
+                edge_trafo[position] = trafo_id or 0
+                cursor[source] += 1
+            self.edge_info[net_id] = (a, b, trafo_id, length)
+
+        node_ids = [0] * size
+        for node_id, i in index.items():
+            node_ids[i] = node_id
+
+        self.node_ids = array("q", node_ids)
+        self.index = index
+        self.indptr = array("q", degree)
+        self.indices = array("q", indices)
+        self.edges = array("q", edges)
+        self.edge_trafo = array("q", edge_trafo)
+        self._version = version
+        self._built = True
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+    def _expected_version(self, count_delta, date_updated):
+        """Versión que tendría la tabla si sólo hubiera cambiado el tramo aplicado."""
+        total, last = self._version
+        if date_updated is not None and (last is None or date_updated > last):
+            last = date_updated
+        return (total + count_delta, last)
+
+    def apply_net(self, net_id, last_node_id, current_node_id, trafo_id, length,
+                  count_delta=0, date_updated=None):
+        """
+        Registra un tramo creado o modificado (o eliminado si faltan los nodos).
+        count_delta (+1 creado, -1 eliminado) y date_updated describen el cambio en
+        la tabla para saber si la versión local puede avanzar.
+        """
+        with self._lock:
+            if not self._built:
+                return
+            self._drop_added(net_id)
+            self._removed.add(net_id)
+            self.edge_info.pop(net_id, None)
+            if last_node_id and current_node_id:
+                self._added[net_id] = (last_node_id, current_node_id, trafo_id, length)
+                self.edge_info[net_id] = (last_node_id, current_node_id, trafo_id, length)
+                for a, b in ((last_node_id, current_node_id), (current_node_id, last_node_id)):
+                    self._added_adjacency.setdefault(a, []).append((b, net_id, trafo_id or 0))
+            self._components = None
+            if len(self._added) + len(self._removed) > self.REBUILD_THRESHOLD:
+                self._built = False
+            else:
+                # Si la tabla sólo cambió por este tramo la versión local ya lo incluye y
+                # se evita un rebuild; si otro proceso también la modificó, la versión
+                # queda atrás y el próximo _ensure reconstruye
+                expected = self._expected_version(count_delta, date_updated)
+                if self._current_version() == expected:
+                    self._version = expected
+
+    def remove_net(self, net_id):
+        self.apply_net(net_id, None, None, None, None, count_delta=-1)
+
+    def _drop_added(self, net_id):
+        edge = self._added.pop(net_id, None)
+        if edge is None:
+            return
+        for node_id in edge[:2]:
+            neighbours = self._added_adjacency.get(node_id, [])
+            self._added_adjacency[node_id] = [n for n in neighbours if n[1] != net_id]
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def neighbours(self, node_id):
+        """Tuplas (nodo vecino, id del tramo, id del trafo) de un nodo."""
+        i = self.index.get(node_id)
+        if i is not None:
+            removed = self._removed
+            for position in range(self.indptr[i], self.indptr[i + 1]):
+                net_id = self.edges[position]
+                if net_id not in removed:
+                    yield self.node_ids[self.indices[position]], net_id, self.edge_trafo[position]
+        yield from self._added_adjacency.get(node_id, ())
+
+    def _bfs(self, start, trafo_id=None, blocked=()):
+        """Recorrido en anchura (sin pasar por los tramos blocked): {nodo: (padre, tramo, saltos)}."""
+        visited = {start: (None, None, 0)}
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            depth = visited[node_id][2]
+            for neighbour, net_id, edge_trafo in self.neighbours(node_id):
+                if (trafo_id is not None and edge_trafo != trafo_id) or net_id in blocked:
+                    continue
+                if neighbour not in visited:
+                    visited[neighbour] = (node_id, net_id, depth + 1)
+                    queue.append(neighbour)
+        return visited
+
+    def downstream(self, trafo_id, blocked=()):
+        """
+        Nodos alimentados por un transformador: recorrido desde el nodo del trafo por
+        los tramos de ese trafo, omitiendo los tramos en blocked (fallados).
+        Devuelve (nodo raíz, {nodo: (padre, tramo, saltos)}).
+        """
+        self._ensure()
+        with self._lock:
+            root = Trafo.objects.filter(pk=trafo_id).values_list("fk_node_id", flat=True).first()
+            if root is None:
+                # Sin nodo de instalación: todos los nodos que tocan tramos del trafo
+                nodes = {}
+                for net_id, (a, b, edge_trafo, _) in self.edge_info.items():
+                    if edge_trafo == trafo_id:
+                        nodes.setdefault(a, (None, None, None))
+                        nodes.setdefault(b, (None, None, None))
+                return None, nodes
+            return root, self._bfs(root, trafo_id=trafo_id, blocked=blocked)
+
+    @staticmethod
+    def descendants(tree, node_id):
+        """Nodos del subárbol de node_id (incluido) en un árbol devuelto por downstream."""
+        children = {}
+        for child, (parent, _, _) in tree.items():
+            if parent is not None:
+                children.setdefault(parent, []).append(child)
+        found = {node_id}
+        stack = [node_id]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in found:
+                    found.add(child)
+                    stack.append(child)
+        return found
+
+    def edge(self, net_id):
+        """(last_node, current_node, trafo, length) de un tramo, o None."""
+        self._ensure()
+        return self.edge_info.get(net_id)
+
+    def path(self, source, target):
+        """Camino con menos tramos entre dos nodos: lista de (nodo, tramo) o None."""
+        self._ensure()
+        with self._lock:
+            if source == target:
+                return [(source, None)]
+            visited = {source: (None, None)}
+            queue = deque([source])
+            while queue:
+                node_id = queue.popleft()
+                for neighbour, net_id, _ in self.neighbours(node_id):
+                    if neighbour in visited:
+                        continue
+                    visited[neighbour] = (node_id, net_id)
+                    if neighbour == target:
+                        steps = []
+                        current = target
+                        while current is not None:
+                            parent, via = visited[current]
+                            steps.append((current, via))
+                            current = parent
+                        return steps[::-1]
+                    queue.append(neighbour)
+            return None
+
+    def component(self, node_id):
+        """Nodos de la componente conexa que contiene node_id."""
+        self._ensure()
+        with self._lock:
+            return set(self._bfs(node_id))
+
+    def components(self):
+        """Lista de componentes conexas (conjuntos de nodos), de mayor a menor."""
+        self._ensure()
+        with self._lock:
+            if self._components is None:
+                nodes = set(self.index) | set(self._added_adjacency)
+                seen = set()
+                components = []
+                for node_id in nodes:
+                    if node_id in seen:
+                        continue
+                    members = set(self._bfs(node_id))
+                    seen |= members
+                    if len(members) > 1 or any(True for _ in self.neighbours(node_id)):
+                        components.append(members)
+                components.sort(key=len, reverse=True)
+                self._components = components
+            return self._components
+
+
+network_graph = NetworkGraph()
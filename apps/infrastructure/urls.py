@@ -1,21 +1,33 @@
 from django.urls import path
 
+from apps.infrastructure.views.export.stream import InventoryExportView
+from apps.infrastructure.views.inventory.dashboard import InventoryDashboardAPI
 from apps.infrastructure.views.location.comunaViews import ComunaSearchAllView
-from apps.infrastructure.views.location.districtViews import DistrictSearchByComuna
+from apps.infrastructure.views.location.districtViews import DistrictSearchByComuna, DistrictSearchByPoint
 from apps.infrastructure.views.location.nodeViews import (
+    NodeAddressSearchView,
     NodeInDistrictView,
+    NodeInfrastructureBatchView,
+    NodeNearestView,
     NodeSearchComunaView,
     NodeSearchId,
     NodeSearchInArea,
     NodeSearchPaintingCode,
+    NodeTypeaheadView,
     SearchInfrastructureInNodeView,
 )
+from apps.infrastructure.views.location.tileViews import NodeTileView
+from apps.infrastructure.views.network.graph import NetworkGraphAPI
+from apps.infrastructure.views.network.outage import OutageImpactAPI
 from apps.infrastructure.views.node.crud import (
     NodeCreateAPI,
     NodeDeleteAPI,
+    NodeMergeAPI,
     NodeUpdateAPI,
 )
+from apps.infrastructure.views.node.duplicates import NodeDuplicateReviewAPI
 from apps.infrastructure.views.node.list import NodeListView
+from apps.infrastructure.views.trafo.loads import TrafoLoadAPI
 
 
 app_name = "infrastructure"
@@ -28,16 +40,39 @@ urlpatterns = [
     path("api/node/create/", NodeCreateAPI.as_view(), name="api_node_create"),
     path("api/node/<int:pk>/", NodeUpdateAPI.as_view(), name="api_node_detail"),
     path("api/node/<int:pk>/delete/", NodeDeleteAPI.as_view(), name="api_node_delete"),
+    path("api/node/merge/", NodeMergeAPI.as_view(), name="api_node_merge"),
+    path("api/nodes/duplicates/", NodeDuplicateReviewAPI.as_view(), name="api_node_duplicates"),
 
     # APIs de búsqueda de Nodes
     path("api/nodes/by-painting-code/<int:painting_code>/", NodeSearchPaintingCode.as_view(), name="search_node"),
+    path("api/nodes/by-address/", NodeAddressSearchView.as_view(), name="nodes_by_address"),
+    path("api/nodes/typeahead/", NodeTypeaheadView.as_view(), name="nodes_typeahead"),
     path("api/nodes/by-district/", NodeInDistrictView.as_view(), name="nodes_by_district"),
     path("api/nodes/by-comuna/", NodeSearchComunaView.as_view(), name="nodes_by_comuna"),
     path("api/nodes/by-id/<int:id>/", NodeSearchId.as_view(), name="node_by_id"),
     path("api/nodes/in-area/", NodeSearchInArea.as_view(), name="nodes_in_area"),
+    path("api/nodes/nearest/", NodeNearestView.as_view(), name="nodes_nearest"),
+    path("api/nodes/infrastructure/", NodeInfrastructureBatchView.as_view(), name="nodes_infrastructure"),
     path("api/nodes/<int:pk>/infrastructure/", SearchInfrastructureInNodeView.as_view(), name="node_infrastructure"),
 
     # APIs de geografía consumidas por el mapa
     path("api/comunas/", ComunaSearchAllView.as_view(), name="api_comunas"),
     path("api/comunas/<int:comuna>/districts/", DistrictSearchByComuna.as_view(), name="api_districts_by_comuna"),
+    path("api/districts/at-point/", DistrictSearchByPoint.as_view(), name="api_district_at_point"),
+
+    # Grafo de la red (tramos)
+    path("api/network/graph/", NetworkGraphAPI.as_view(), name="api_network_graph"),
+    path("api/network/outage/", OutageImpactAPI.as_view(), name="api_network_outage"),
+
+    # Carga por transformador
+    path("api/trafos/load/", TrafoLoadAPI.as_view(), name="api_trafo_load"),
+
+    # Resumen de inventario
+    path("api/inventory/summary/", InventoryDashboardAPI.as_view(), name="api_inventory_summary"),
+
+    # Exportación en flujo del inventario (csv, geojson, ndjson)
+    path("export/<slug:name>.<slug:fmt>", InventoryExportView.as_view(), name="inventory_export"),
+
+    # Vector tiles (MVT) de la capa de Nodos
+    path("tiles/nodes/<int:z>/<int:x>/<int:y>.mvt", NodeTileView.as_view(), name="node_tiles"),
 ]
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from apps.infrastructure.exports import EXPORTS, FORMATS, STREAMS
+from apps.mixins import APIPermissionValidation
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class InventoryExportView(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Exporta un modelo del inventario completo en flujo.
+
+    URL: export/<modelo>.<formato>  (modelo: nodes, trafos, luminaires, supports,
+    apboxes, nets; formato: csv, geojson, ndjson). Filtros GET opcionales: comuna, district.
+
+    La respuesta se genera después de que la vista retorna, por eso no se envuelve
+    en la transacción de ATOMIC_REQUESTS.
+    """
+
+    def get_perms(self):
+        model = EXPORTS.get(self.kwargs.get("name"), (None,))[0]
+        if model is None:
+            return ["infrastructure.view_node"]
+        return [f"{model._meta.app_label}.view_{model._meta.model_name}"]
+
+    def get(self, request, name, fmt, *args, **kwargs):
+        if name not in EXPORTS or fmt not in FORMATS:
+            return JsonResponse({"type": "error", "msg": "Exportación no soportada."}, status=404)
+
+        model, geometry, _ = EXPORTS[name]
+        # Prefijo hacia el nodo del elemento ("" para nodos, "fk_node__", "current_node__")
+        prefix = geometry[: -len("location")]
+        queryset = model.objects.all()
+        try:
+            if request.GET.get("district"):
+                queryset = queryset.filter(**{f"{prefix}fk_district_id": int(request.GET["district"])})
+            elif request.GET.get("comuna"):
+                queryset = queryset.filter(**{f"{prefix}fk_district__fk_comuna_id": int(request.GET["comuna"])})
+        except ValueError:
+            return JsonResponse({"type": "error", "msg": "Filtro inválido."}, status=400)
+
+        response = StreamingHttpResponse(STREAMS[fmt](name, queryset), content_type=FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{name}_{datetime.now():%Y%m%d_%H%M}.{fmt}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,46 @@
+import time
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from apps.infrastructure.rollups import DIMENSIONS, inventory_summary
+from apps.mixins import APIPermissionValidation
+
+
+class InventoryDashboardAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Resumen de inventario (conteos y vatios instalados) por categoría.
+
+    Parámetros GET: comuna, district (excluyentes; sin ninguno es toda la ciudad),
+    dimension (se puede repetir; ver DIMENSIONS).
+    Lee sólo la tabla InventoryRollup: el costo no depende del tamaño del inventario.
+    """
+    permission_required = ["infrastructure.view_node"]
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            dimensions = request.GET.getlist("dimension")
+            unknown = [d for d in dimensions if d not in DIMENSIONS]
+            if unknown:
+                raise ValueError(f"Dimensión desconocida: {', '.join(unknown)}.")
+            comuna = request.GET.get("comuna")
+            district = request.GET.get("district")
+            data = {
+                "type": "success",
+                "data": inventory_summary(
+                    comuna=int(comuna) if comuna else None,
+                    district=int(district) if district else None,
+                    dimensions=dimensions or None,
+                ),
+            }
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
@@ -4,41 +4,41 @@ from django.http import JsonResponse
 from django.views import View
 
 # local Django
-from apps.infrastructure.models import Comuna
+from apps.infrastructure.boundaries import boundary_cache, layer_params
 
 
-def _serialize_comuna(comuna):
-    if not comuna.poly:
-        return None
-    inverted_coords = [{"lat": lat, "lng": lon} for lon, lat in comuna.poly.coords[0]]
-    center = comuna.centerPoint
-    return {
-        "pk": comuna.pk,
-        "name": comuna.name,
-        "type": comuna.type,
-        "center": {"lat": center.y, "lng": center.x} if center else None,
-        "polygon": inverted_coords,
-    }
+def _invalid_params():
+    return JsonResponse({"type": "error", "msg": "Parámetros inválidos (zoom, tolerance o format=json|topojson)."}, status=400)
 
 
 class ComunaSearchAllView(LoginRequiredMixin, View):
-    """Devuelve todas las comunas con polígono y punto central; requiere autenticación."""
+    """
+    Devuelve todas las comunas con polígono y punto central; requiere autenticación.
+    Respuesta precomprimida desde boundary_cache, con ETag (304 si no cambió).
+    ?zoom= o ?tolerance= (grados) devuelven el polígono simplificado de esa banda.
+    """
 
     def get(self, request, *args, **kwargs):
-        comunas = Comuna.objects.only("id", "name", "type", "centerPoint", "poly")
-        data = [c for c in (_serialize_comuna(c) for c in comunas) if c]
-        return JsonResponse(data, safe=False)
+        try:
+            band, fmt = layer_params(request)
+        except ValueError:
+            return _invalid_params()
+        return boundary_cache.comunas_payload(band=band, fmt=fmt).response(request)
 
 
 class ComunaSearchView(View):
-    """Devuelve comunas filtradas por lista de IDs separados por coma (parámetro ?comunas=); sin autenticación requerida."""
+    """
+    Devuelve comunas filtradas por lista de IDs separados por coma (parámetro ?comunas=); sin autenticación requerida.
+    Los subconjuntos no se guardan en boundary_cache: se arman a pedido con los fragmentos de cada comuna.
+    """
 
     def get(self, request, *args, **kwargs):
+        try:
+            band, fmt = layer_params(request)
+        except ValueError:
+            return _invalid_params()
         params = request.GET.get("comunas")
-        queryset = Comuna.objects.only("id", "name", "type", "centerPoint", "poly")
+        comunaid_list = None
         if params:
             comunaid_list = [int(n) for n in params.split(",") if n.strip().isdigit()]
-            queryset = queryset.filter(id__in=comunaid_list)
-
-        data = [c for c in (_serialize_comuna(c) for c in queryset) if c]
-        return JsonResponse(data, safe=False)
+        return boundary_cache.comunas_payload(comunaid_list, band=band, fmt=fmt).response(request)
@@ -1,48 +1,57 @@
 # Django
-from django.shortcuts import get_object_or_404
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views import View
 
 # local Django
-from apps.infrastructure.models import District, Comuna
-
-
-def _serialize_district(district):
-    if not district.poly:
-        return None
-    polygons = []
-    for polygon in district.poly:
-        inverted_coords = [{"lat": lat, "lng": lon} for lon, lat in polygon[0].coords]
-        polygons.append(inverted_coords)
-    return {
-        "pk": district.pk,
-        "name": district.name,
-        "estrato": district.estrato,
-        "cod_unico": district.cod_unico,
-        "polygon": polygons,
-        "fk_comuna": district.fk_comuna_id,
-    }
+from apps.infrastructure.boundaries import boundary_cache, layer_params
+from apps.infrastructure.spatial import district_resolver
+
+
+def _invalid_params():
+    return JsonResponse({"type": "error", "msg": "Parámetros inválidos (zoom, tolerance o format=json|topojson)."}, status=400)
 
 
 class DistrictSearchView(View):
-    """Devuelve todos los barrios con geometría de polígono."""
+    """Devuelve todos los barrios con geometría de polígono (?zoom= o ?tolerance= para simplificarla)."""
 
     def get(self, request, *args, **kwargs):
-        districts = District.objects.only(
-            "id", "name", "estrato", "cod_unico", "poly", "fk_comuna_id"
-        )
-        data = [d for d in (_serialize_district(d) for d in districts) if d]
-        return JsonResponse(data, safe=False)
+        try:
+            band, fmt = layer_params(request)
+        except ValueError:
+            return _invalid_params()
+        return boundary_cache.districts_payload(band=band, fmt=fmt).response(request)
 
 
 class DistrictSearchByComuna(View):
-    """Devuelve barrios filtrados por ID de comuna."""
+    """Devuelve barrios filtrados por ID de comuna (?zoom= o ?tolerance= para simplificarlos)."""
 
     def get(self, request, comuna, *args, **kwargs):
-        comuna_obj = get_object_or_404(Comuna, pk=comuna)
-        districts = District.objects.filter(fk_comuna=comuna_obj).only(
-            "id", "name", "estrato", "cod_unico", "poly", "fk_comuna_id"
-        )
-        data = [d for d in (_serialize_district(d) for d in districts) if d]
-        return JsonResponse(data, safe=False)
\ No newline at end of file
+        try:
+            band, fmt = layer_params(request)
+        except ValueError:
+            return _invalid_params()
+        payload = boundary_cache.districts_payload(comuna, band=band, fmt=fmt)
+        if payload is None:
+            raise Http404("Comuna no encontrada.")
+        return payload.response(request)
+
+
+class DistrictSearchByPoint(View):
+    """
+    Devuelve el barrio (y su comuna) que contiene un punto: ?lat=&lng=
+
+    Se resuelve con el índice espacial en memoria (district_resolver), sin consultar
+    la base de datos.
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            lat = float(request.GET["lat"])
+            lng = float(request.GET["lng"])
+        except (KeyError, ValueError):
+            return JsonResponse({"type": "error", "msg": "Coordenadas inválidas (lat/lng)."}, status=400)
+
+        district_id = district_resolver.resolve(lng, lat)
+        if district_id is None:
+            return JsonResponse({"type": "error", "msg": "El punto no pertenece a ningún barrio."}, status=404)
+        return JsonResponse({"type": "success", "data": district_resolver.get_district(district_id)})
@@ -1,14 +1,20 @@
 import json
 import time
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.db.models import Collect, Extent
+from django.contrib.gis.db.models.functions import Centroid, Distance, GeometryDistance, SnapToGrid
+from django.contrib.gis.geos import GEOSGeometry, Point
 from django.core.serializers import serialize
+from django.db import connection
+from django.db.models import Count, Min, Prefetch
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 
-from apps.infrastructure.models import District, Node
+from apps.infrastructure.models import ApBox, District, Luminaire, Node, Support, Trafo
+from apps.infrastructure.search import painting_code_index, search_addresses
 from apps.mixins import APIPermissionValidation
 
 
@@ -26,6 +32,23 @@ def _serialize_node(node):
     }
 
 
+def _parse_bbox(request):
+    """Polígono del viewport a partir de ?west=&south=&east=&north=."""
+    try:
+        west = float(request.GET["west"])
+        south = float(request.GET["south"])
+        east = float(request.GET["east"])
+        north = float(request.GET["north"])
+    except (KeyError, ValueError):
+        raise ValueError("Parámetros bbox inválidos (west/south/east/north).")
+
+    bbox_wkt = (
+        f"POLYGON(({west} {south}, {east} {south}, "
+        f"{east} {north}, {west} {north}, {west} {south}))"
+    )
+    return GEOSGeometry(bbox_wkt, srid=4326)
+
+
 class NodeInDistrictView(LoginRequiredMixin, APIPermissionValidation, View):
     """
     DEPRECATED. Buscar todos los nodos de un barrio.
@@ -58,26 +81,83 @@ class NodeInDistrictView(LoginRequiredMixin, APIPermissionValidation, View):
 
 
 class NodeSearchPaintingCode(LoginRequiredMixin, APIPermissionValidation, View):
-    """Buscar nodos por código de pintado."""
+    """Buscar nodos por código de pintado (índice en memoria, sin consultar la base)."""
     permission_required = ["infrastructure.view_node"]
 
     def get(self, request, painting_code, *args, **kwargs):
         start_time = time.time()
         try:
-            nodes = (
-                Node.objects
-                .select_related("fk_district__fk_comuna")
-                .filter(painting_code=painting_code)
-            )
-            if not nodes.exists():
+            nodes = painting_code_index.exact(painting_code)
+            if not nodes:
                 raise Exception("No se encontraron nodos con el código pintado suministrado.")
-            data = {"type": "success", "data": [_serialize_node(n) for n in nodes]}
+            data = {"type": "success", "data": nodes}
         except Exception as e:
             data = {"type": "error", "msg": str(e)}
         data["time"] = str(time.time() - start_time)
         return JsonResponse(data, safe=False)
 
 
+class NodeTypeaheadView(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Autocompletado por código pintado: ?q=<prefijo>&k=<máx. resultados>
+
+    Devuelve los primeros k nodos (orden de código) cuyo código empieza por el prefijo.
+    """
+    permission_required = ["infrastructure.view_node"]
+
+    DEFAULT_K = 10
+    MAX_K = 50
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            prefix = request.GET.get("q", "").strip()
+            if not prefix.isdigit():
+                raise ValueError("El prefijo debe contener sólo dígitos.")
+            k = max(1, min(int(request.GET.get("k") or self.DEFAULT_K), self.MAX_K))
+            data = {"type": "success", "data": painting_code_index.prefix(prefix, k)}
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
+
+
+class NodeAddressSearchView(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Búsqueda aproximada por dirección: ?q=<texto>&k=<máx. resultados>
+
+    Acepta la forma en que llegan los reportes ("Calle 5 con Carrera 40"); devuelve
+    los nodos candidatos ordenados por similitud (score de 0 a 1) con coordenadas.
+    """
+    permission_required = ["infrastructure.view_node"]
+
+    DEFAULT_K = 10
+    MAX_K = 50
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            query = request.GET.get("q", "").strip()
+            if len(query) < 3:
+                raise ValueError("Ingrese al menos 3 caracteres de la dirección.")
+            k = max(1, min(int(request.GET.get("k") or self.DEFAULT_K), self.MAX_K))
+            data = {"type": "success", "data": search_addresses(query, k=k)}
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
+
+
 class NodeSearchId(LoginRequiredMixin, APIPermissionValidation, View):
     """Buscar nodo por ID."""
     permission_required = ["infrastructure.view_node"]
@@ -98,27 +178,36 @@ class NodeSearchInArea(LoginRequiredMixin, APIPermissionValidation, View):
 
     Modos soportados:
     - bbox: ?west=&south=&east=&north=  → todos los nodos dentro del viewport.
-    - punto+radio: ?lat=&lng=            → nodos cercanos al punto (compat. legacy).
+      Con ?zoom= por debajo de NODE_CLUSTER_MAX_ZOOM se devuelven celdas de una
+      grilla (conteo, centroide y bounds) agregadas en la base de datos en vez de
+      los puntos crudos.
+    - punto+radio: ?lat=&lng=            → nodos cercanos al punto (compat. legacy,
+      usar NodeNearestView).
     """
     permission_required = ["infrastructure.view_node"]
 
     DEFAULT_DISTANCE = 0.0010  # ~110m en grados WGS84
     MAX_BBOX_RESULTS = 5000
+    CLUSTER_MAX_ZOOM = getattr(settings, "NODE_CLUSTER_MAX_ZOOM", 15)
+    CLUSTER_CELL_PX = 64  # lado de la celda en píxeles de pantalla (tiles de 256px)
 
-    def _bbox_response(self, request):
+    def _parse_bbox(self, request):
+        return _parse_bbox(request)
+
+    def _parse_zoom(self, request):
+        zoom = request.GET.get("zoom")
+        if zoom in (None, ""):
+            return None
         try:
-            west = float(request.GET["west"])
-            south = float(request.GET["south"])
-            east = float(request.GET["east"])
-            north = float(request.GET["north"])
-        except (KeyError, ValueError):
-            raise ValueError("Parámetros bbox inválidos (west/south/east/north).")
+            return max(0, min(int(float(zoom)), 22))
+        except ValueError:
+            raise ValueError("Parámetro zoom inválido.")
 
-        bbox_wkt = (
-            f"POLYGON(({west} {south}, {east} {south}, "
-            f"{east} {north}, {west} {north}, {west} {south}))"
-        )
-        bbox = GEOSGeometry(bbox_wkt, srid=4326)
+    def _bbox_response(self, request):
+        bbox = self._parse_bbox(request)
+        zoom = self._parse_zoom(request)
+        if zoom is not None and zoom < self.CLUSTER_MAX_ZOOM:
+            return self._cluster_response(bbox, zoom)
 
         # Payload mínimo para render de marcadores: id, painting_code, lng, lat.
         # Evitamos construir instancias Node y joinear a District/Comuna: los nombres
@@ -134,7 +223,54 @@ class NodeSearchInArea(LoginRequiredMixin, APIPermissionValidation, View):
             for pk, code, loc in rows[: self.MAX_BBOX_RESULTS]
             if loc is not None
         ]
-        return {"type": "success", "data": data, "truncated": truncated}
+        return {"type": "success", "mode": "points", "data": data, "truncated": truncated}
+
+    def _cluster_response(self, bbox, zoom):
+        """
+        Agrupa los nodos del bbox en celdas de una grilla cuyo tamaño depende del
+        zoom (≈CLUSTER_CELL_PX píxeles en pantalla). La agregación ocurre en la base
+        de datos: una vista de ciudad se reduce a unos cientos de celdas.
+        """
+        cell_size = (360.0 / (2 ** zoom)) * self.CLUSTER_CELL_PX / 256.0
+        rows = list(
+            Node.objects
+            .filter(location__within=bbox)
+            .annotate(cell=SnapToGrid("location", cell_size))
+            .values("cell")
+            .annotate(
+                count=Count("id"),
+                node_id=Min("id"),
+                painting_code=Min("painting_code"),
+                center=Centroid(Collect("location")),
+                extent=Extent("location"),
+            )
+            .order_by()[: self.MAX_BBOX_RESULTS + 1]
+        )
+        truncated = len(rows) > self.MAX_BBOX_RESULTS
+
+        data = []
+        for row in rows[: self.MAX_BBOX_RESULTS]:
+            center = row["center"]
+            west, south, east, north = row["extent"]
+            item = {
+                "count": row["count"],
+                "lng": center.x,
+                "lat": center.y,
+                "bounds": {"west": west, "south": south, "east": east, "north": north},
+            }
+            # Una celda con un único nodo se puede pintar directamente como marcador
+            if row["count"] == 1:
+                item.update({"id": row["node_id"], "pk": row["node_id"], "painting_code": row["painting_code"]})
+            data.append(item)
+
+        return {
+            "type": "success",
+            "mode": "clusters",
+            "zoom": zoom,
+            "cell_size": cell_size,
+            "data": data,
+            "truncated": truncated,
+        }
 
     def _point_radius_response(self, request):
         longitud = request.GET.get("lng")
@@ -143,7 +279,8 @@ class NodeSearchInArea(LoginRequiredMixin, APIPermissionValidation, View):
             raise ValueError("No ha ingresado coordenadas válidas para la consulta.")
 
         punto = GEOSGeometry(f"POINT({longitud} {latitud})", srid=4326)
-        queryset = (
+        # Una sola evaluación: el serializador y el mapa de barrios usan la misma lista
+        nodes = list(
             Node.objects
             .select_related("fk_district__fk_comuna")
             .filter(location__distance_lte=(punto, self.DEFAULT_DISTANCE))
@@ -151,13 +288,13 @@ class NodeSearchInArea(LoginRequiredMixin, APIPermissionValidation, View):
 
         geojson_str = serialize(
             "geojson",
-            queryset=queryset,
+            queryset=nodes,
             fields=("pk", "location", "painting_code", "fk_district"),
             geometry_field="location",
         )
         geojson = json.loads(geojson_str)
 
-        node_by_pk = {n.pk: n for n in queryset}
+        node_by_pk = {n.pk: n for n in nodes}
         for feature in geojson.get("features", []):
             pk = feature.get("properties", {}).get("pk") or feature.get("id")
             node = node_by_pk.get(pk)
@@ -180,6 +317,201 @@ class NodeSearchInArea(LoginRequiredMixin, APIPermissionValidation, View):
         return JsonResponse(data, safe=False)
 
 
+class NodeNearestView(View):
+    """
+    Los k nodos más cercanos a un punto: ?lat=&lng=&k=
+
+    En PostGIS el orden usa el operador KNN (<->) sobre el índice espacial, de modo
+    que siempre hay resultados sin importar qué tan lejos esté el poste más cercano;
+    la distancia devuelta es en metros (esfera). Una sola consulta. Es pública porque
+    la consume el formulario ciudadano de PQRs.
+    """
+
+    DEFAULT_K = 10
+    MAX_K = 50
+
+    def _parse(self, request):
+        try:
+            lat = float(request.GET["lat"])
+            lng = float(request.GET["lng"])
+        except (KeyError, ValueError):
+            raise ValueError("No ha ingresado coordenadas válidas para la consulta.")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError("Coordenadas fuera de rango.")
+        try:
+            k = int(request.GET.get("k") or self.DEFAULT_K)
+        except ValueError:
+            raise ValueError("Parámetro k inválido.")
+        return Point(lng, lat, srid=4326), max(1, min(k, self.MAX_K))
+
+    def nearest(self, point, k):
+        queryset = (
+            Node.objects
+            .filter(location__isnull=False)
+            .annotate(distance=Distance("location", point))
+            .select_related("fk_district__fk_comuna")
+        )
+        if connection.vendor == "postgresql":
+            # <-> ordena en grados (plano); se toma un margen y se reordena por metros
+            rows = list(queryset.order_by(GeometryDistance("location", point))[: k * 2])
+            rows.sort(key=lambda n: n.distance.m)
+            return rows[:k]
+        return list(queryset.order_by("distance")[:k])
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            point, k = self._parse(request)
+            data = {
+                "type": "success",
+                "data": [
+                    dict(_serialize_node(node), distance=round(node.distance.m, 2))
+                    for node in self.nearest(point, k)
+                ],
+            }
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
+
+
+LUMINAIRE_RELATED = (
+    "fk_setting", "fk_opticprotection", "fk_photocell", "fk_lightedspace",
+    "fk_armtype", "fk_support", "fk_trafo", "fk_brand",
+)
+
+
+def _choices(model, field):
+    return dict(model._meta.get_field(field).flatchoices)
+
+
+# (modelo, [(llave de salida, lookup de values(), choices o None)])
+INFRASTRUCTURE_COLUMNS = {
+    "trafo": (Trafo, [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("code", "code", None),
+        ("owner", "owner", _choices(Trafo, "owner")),
+        ("type", "type", _choices(Trafo, "type")),
+        ("installationtype", "installationtype", _choices(Trafo, "installationtype")),
+        ("using", "using", _choices(Trafo, "using")),
+        ("power", "power__power", None),
+        ("status", "status", _choices(Trafo, "status")),
+    ]),
+    "luminaire": (Luminaire, [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("code", "code", None),
+        ("fk_setting", "fk_setting__name", None),
+        ("fk_opticprotection", "fk_opticprotection__name", None),
+        ("fk_photocell", "fk_photocell__name", None),
+        ("fk_lightedspace", "fk_lightedspace__name", None),
+        ("fk_armtype", "fk_armtype__name", None),
+        ("fk_support", "fk_support__name", None),
+        ("fk_trafo", "fk_trafo__code", None),
+        ("fk_brand", "fk_brand__name", None),
+        ("height", "height", None),
+        ("financing", "financing", None),
+        ("date_installation", "date_installation", None),
+        ("status", "status", _choices(Luminaire, "status")),
+    ]),
+    "support": (Support, [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("fk_setting", "fk_setting__name", None),
+        ("fk_trafo", "fk_trafo__code", None),
+        ("fk_cimentation", "fk_cimentation__name", None),
+        ("owner", "owner", _choices(Support, "owner")),
+        ("financing", "financing", None),
+        ("status", "status", _choices(Support, "status")),
+    ]),
+    "apbox": (ApBox, [
+        ("id", "id", None),
+        ("fk_node", "fk_node_id", None),
+        ("fk_trafo", "fk_trafo__code", None),
+        ("type", "type", _choices(ApBox, "type")),
+        ("owner", "owner", _choices(ApBox, "owner")),
+        ("status", "status", _choices(ApBox, "status")),
+    ]),
+}
+
+
+class NodeInfrastructureBatchView(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Infraestructura (trafos, luminarias, apoyos y cajas AP) de varios nodos a la vez.
+
+    Nodos: ?ids=1,2,3 o bbox ?west=&south=&east=&north= (máx. MAX_NODES).
+    ?layout=columnar devuelve por tipo un objeto {columna: [valores]} en vez de una
+    lista de objetos; cada fila trae fk_node para agruparla en el cliente.
+
+    Hace una consulta por tipo de elemento (values() con los nombres ya unidos por
+    JOIN) más una para resolver los nodos, sin importar cuántas filas haya.
+    """
+    permission_required = ["infrastructure.view_node"]
+
+    MAX_NODES = 500
+
+    def _node_ids(self, request):
+        if request.GET.get("ids"):
+            try:
+                ids = sorted({int(v) for v in request.GET["ids"].split(",") if v.strip()})
+            except ValueError:
+                raise ValueError("Parámetro ids inválido.")
+            if len(ids) > self.MAX_NODES:
+                raise ValueError(f"Máximo {self.MAX_NODES} nodos por consulta.")
+            return list(Node.objects.filter(id__in=ids).values_list("id", flat=True))
+        if "west" in request.GET:
+            bbox = _parse_bbox(request)
+            ids = list(
+                Node.objects.filter(location__within=bbox)
+                .order_by("id").values_list("id", flat=True)[: self.MAX_NODES + 1]
+            )
+            if len(ids) > self.MAX_NODES:
+                raise ValueError(f"El área tiene más de {self.MAX_NODES} nodos; acerque el mapa.")
+            return ids
+        raise ValueError("Debe indicar ids o un bbox (west/south/east/north).")
+
+    @staticmethod
+    def _rows(model, columns, node_ids):
+        lookups = [lookup for _, lookup, _ in columns]
+        displays = [choices for _, _, choices in columns]
+        rows = model.objects.filter(fk_node_id__in=node_ids).order_by("fk_node_id", "id").values_list(*lookups)
+        return [
+            [choices.get(value, value) if choices else value for value, choices in zip(row, displays)]
+            for row in rows
+        ]
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            columnar = request.GET.get("layout") == "columnar"
+            node_ids = self._node_ids(request)
+
+            data = {"nodes": node_ids}
+            for key, (model, columns) in INFRASTRUCTURE_COLUMNS.items():
+                names = [name for name, _, _ in columns]
+                rows = self._rows(model, columns, node_ids) if node_ids else []
+                if columnar:
+                    data[key] = {name: list(values) for name, values in zip(names, zip(*rows))} if rows else {name: [] for name in names}
+                else:
+                    data[key] = [dict(zip(names, row)) for row in rows]
+            data = {"type": "success", "layout": "columnar" if columnar else "rows", "data": data}
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
+
+
 class SearchInfrastructureInNodeView(LoginRequiredMixin, APIPermissionValidation, View):
     """Buscar toda la infraestructura asociada a un nodo."""
     permission_required = ["infrastructure.view_node"]
@@ -189,12 +521,10 @@ class SearchInfrastructureInNodeView(LoginRequiredMixin, APIPermissionValidation
             node = (
                 Node.objects
                 .prefetch_related(
-                    "apbox_set",
-                    "trafo_set__power",
-                    "luminaire_set__fk_setting",
-                    "luminaire_set__fk_brand",
-                    "support_set__fk_setting__fk_material",
-                    "support_set__fk_setting__fk_supporttype",
+                    Prefetch("apbox_set", ApBox.objects.select_related("fk_trafo")),
+                    Prefetch("trafo_set", Trafo.objects.select_related("power")),
+                    Prefetch("luminaire_set", Luminaire.objects.select_related(*LUMINAIRE_RELATED)),
+                    Prefetch("support_set", Support.objects.select_related("fk_setting", "fk_trafo", "fk_cimentation")),
                 )
                 .get(pk=pk)
             )
@@ -0,0 +1,43 @@
+# standard library
+import os
+
+# Django
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views import View
+
+# local Django
+from apps.infrastructure.tiles import get_node_tile, is_valid_tile
+from apps.mixins import APIPermissionValidation
+
+
+class NodeTileView(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Vector tile (MVT) de la capa de Nodos: /tiles/nodes/{z}/{x}/{y}.mvt
+
+    Cada feature lleva id, painting_code, is_duplicated y fk_district_id. El tile
+    se sirve desde el caché en disco con ETag; el navegador revalida y recibe 304
+    mientras ningún nodo del tile haya cambiado.
+    """
+    permission_required = ["infrastructure.view_node"]
+
+    def get(self, request, z, x, y, *args, **kwargs):
+        if not is_valid_tile(z, x, y):
+            return JsonResponse({"type": "error", "msg": "Tile fuera de rango."}, status=404)
+
+        data, path = get_node_tile(z, x, y)
+
+        try:
+            stat = os.stat(path)
+            etag = f'"{z}-{x}-{y}-{int(stat.st_mtime_ns)}-{stat.st_size}"'
+        except FileNotFoundError:
+            etag = None
+
+        if etag and request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(data, content_type="application/vnd.mapbox-vector-tile")
+        if etag:
+            response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
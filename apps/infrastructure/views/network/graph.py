@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from apps.infrastructure.models import Node
+from apps.infrastructure.topology import network_graph
+from apps.mixins import APIPermissionValidation
+
+
+def _node_points(node_ids):
+    """{id: (painting_code, lng, lat)} de los nodos, en una consulta."""
+    return {
+        pk: (code, loc.x if loc else None, loc.y if loc else None)
+        for pk, code, loc in Node.objects.filter(id__in=list(node_ids)).values_list("id", "painting_code", "location")
+    }
+
+
+class NetworkGraphAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Consultas sobre el grafo de la red (tramos Net) en memoria.
+
+    - ?trafo=<id>                → nodos alimentados por el trafo (saltos desde su nodo).
+    - ?node=<id>                 → componente conexa del nodo.
+    - ?source=<id>&target=<id>   → camino con menos tramos entre dos nodos.
+
+    Cada nodo trae painting_code y coordenadas para pintarlo en el mapa.
+    """
+    permission_required = ["infrastructure.view_net"]
+
+    def _nodes(self, tree):
+        points = _node_points(tree.keys())
+        nodes = []
+        for node_id, (parent, net_id, depth) in tree.items():
+            code, lng, lat = points.get(node_id, (None, None, None))
+            nodes.append({
+                "id": node_id, "painting_code": code, "lng": lng, "lat": lat,
+                "parent": parent, "net": net_id, "depth": depth,
+            })
+        nodes.sort(key=lambda n: (n["depth"] is None, n["depth"] or 0, n["id"]))
+        return nodes
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            if request.GET.get("trafo"):
+                root, tree = network_graph.downstream(int(request.GET["trafo"]))
+                data = {"type": "success", "root": root, "data": self._nodes(tree)}
+            elif request.GET.get("source") and request.GET.get("target"):
+                steps = network_graph.path(int(request.GET["source"]), int(request.GET["target"]))
+                if steps is None:
+                    data = {"type": "error", "msg": "Los nodos no están conectados por la red."}
+                    status = 404
+                else:
+                    tree = {node_id: (None, net_id, i) for i, (node_id, net_id) in enumerate(steps)}
+                    data = {"type": "success", "data": self._nodes(tree)}
+            elif request.GET.get("node"):
+                members = network_graph.component(int(request.GET["node"]))
+                tree = {node_id: (None, None, None) for node_id in members}
+                data = {"type": "success", "data": self._nodes(tree)}
+            else:
+                raise ValueError("Debe indicar trafo, node o source/target.")
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
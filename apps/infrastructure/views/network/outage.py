@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from apps.infrastructure.outages import analyze_outage
+from apps.mixins import APIPermissionValidation
+
+
+def _ids(value):
+    return [int(v) for v in (value or "").split(",") if v.strip()]
+
+
+class OutageImpactAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Impacto de una falla: nodos y luminarias sin servicio, vatios apagados y PQRs
+    activas reportadas en esos nodos.
+
+    Parámetros GET: trafos, apboxes, nets (ids separados por coma; al menos uno).
+    """
+    permission_required = ["infrastructure.view_net"]
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            trafos = _ids(request.GET.get("trafos"))
+            apboxes = _ids(request.GET.get("apboxes"))
+            nets = _ids(request.GET.get("nets"))
+            if not (trafos or apboxes or nets):
+                raise ValueError("Debe indicar al menos un trafo, caja AP o tramo fallado.")
+            data = {"type": "success", "data": analyze_outage(trafos, apboxes, nets)}
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
@@ -1,5 +1,3 @@
-import re
-
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.gis.geos import Point
 from django.db.models import ProtectedError
@@ -7,13 +5,12 @@ from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 
-from apps.infrastructure.models import Node
+from apps.infrastructure.duplicates import DEFAULT_RADIUS, find_nearby_nodes
+from apps.infrastructure.merge import NodeMergeError, merge_nodes
+from apps.infrastructure.models import PAINTING_CODE_REGEX, Node
 from apps.mixins import APIPermissionValidation
 
 
-PAINTING_CODE_REGEX = re.compile(r"^\d{7}$")
-
-
 def _parse_node_payload(request):
     """Extrae y valida los campos del payload (POST) de creación/edición de nodo."""
     painting_code = request.POST.get("painting_code", "").strip()
@@ -51,11 +48,25 @@ class NodeCreateAPI(LoginRequiredMixin, APIPermissionValidation, View):
         try:
             payload = _parse_node_payload(request)
             node = Node.objects.create(**payload)
-            return JsonResponse({
+            data = {
                 "type": "success",
                 "msg": "Nodo creado correctamente.",
                 "data": node.toJSON(),
-            })
+            }
+
+            # Advertir si el nodo quedó encima de otro existente (posible duplicado)
+            location = payload["location"]
+            nearby = find_nearby_nodes([(location.x, location.y)], exclude_ids=[node.pk])[0]
+            if nearby:
+                data["warning"] = (
+                    f"Hay {len(nearby)} nodo(s) a menos de {DEFAULT_RADIUS:g} m "
+                    f"(el más cercano a {nearby[0][2]:g} m); verifique que no sea un duplicado."
+                )
+                data["duplicates"] = [
+                    {"id": pk, "painting_code": code, "distance": distance}
+                    for pk, code, distance in nearby
+                ]
+            return JsonResponse(data)
         except ValueError as e:
             return JsonResponse({"type": "error", "msg": str(e)}, status=400)
         except Exception as e:
@@ -123,3 +134,32 @@ class NodeDeleteAPI(LoginRequiredMixin, APIPermissionValidation, View):
             }, status=409)
         except Exception as e:
             return JsonResponse({"type": "error", "msg": str(e)}, status=500)
+
+
+class NodeMergeAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Fusiona nodos duplicados: re-apunta toda la infraestructura y PQRs de los nodos
+    víctima al sobreviviente y elimina las víctimas.
+
+    Parámetros POST: survivor (id), victims (ids separados por coma)
+    Permisos: infrastructure.change_node, infrastructure.delete_node
+    """
+    permission_required = ["infrastructure.change_node", "infrastructure.delete_node"]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            survivor = request.POST.get("survivor", "").strip()
+            victims = [v for v in request.POST.get("victims", "").replace(" ", "").split(",") if v]
+            if not survivor.isdigit() or not victims or not all(v.isdigit() for v in victims):
+                raise ValueError("Debe indicar el nodo sobreviviente y los ids de los nodos a fusionar.")
+
+            result = merge_nodes(int(survivor), [int(v) for v in victims], user=request.user)
+            return JsonResponse({
+                "type": "success",
+                "msg": f"{result['deleted']} nodo(s) fusionados en el nodo {survivor}.",
+                "data": result,
+            })
+        except (ValueError, NodeMergeError) as e:
+            return JsonResponse({"type": "error", "msg": str(e)}, status=400)
+        except Exception as e:
+            return JsonResponse({"type": "error", "msg": str(e)}, status=500)
@@ -0,0 +1,82 @@
+import time
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import EmptyPage, Paginator
+from django.http import JsonResponse
+from django.views import View
+
+from apps.infrastructure.duplicates import DEFAULT_RADIUS, find_nearby_nodes
+from apps.infrastructure.models import Node
+from apps.mixins import APIPermissionValidation
+
+
+class NodeDuplicateReviewAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Lista paginada de nodos marcados como duplicados (is_duplicated) con los nodos
+    cercanos que originaron la marca, para revisión manual.
+
+    Parámetros GET: page (1), page_size (50, máx 200), radius (metros), district
+    Permisos: infrastructure.view_node
+    """
+    permission_required = ["infrastructure.view_node"]
+    MAX_PAGE_SIZE = 200
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            page_number = int(request.GET.get("page") or 1)
+            page_size = min(int(request.GET.get("page_size") or 50), self.MAX_PAGE_SIZE)
+            radius = float(request.GET.get("radius") or DEFAULT_RADIUS)
+            if page_size <= 0 or radius <= 0:
+                raise ValueError("page_size y radius deben ser positivos.")
+
+            queryset = (
+                Node.objects
+                .filter(is_duplicated=True, location__isnull=False)
+                .select_related("fk_district__fk_comuna")
+                .order_by("id")
+            )
+            if request.GET.get("district"):
+                queryset = queryset.filter(fk_district_id=int(request.GET["district"]))
+
+            paginator = Paginator(queryset, page_size)
+            try:
+                page = paginator.page(page_number)
+            except EmptyPage:
+                page = paginator.page(paginator.num_pages)
+
+            nodes = list(page.object_list)
+            neighbours = find_nearby_nodes(
+                [(n.location.x, n.location.y) for n in nodes], radius=radius
+            )
+            items = []
+            for node, nearby in zip(nodes, neighbours):
+                items.append({
+                    "id": node.pk,
+                    "painting_code": node.painting_code,
+                    "district": node.fk_district.name if node.fk_district else None,
+                    "comuna": node.fk_district.fk_comuna.name if node.fk_district else None,
+                    "lng": node.location.x,
+                    "lat": node.location.y,
+                    "candidates": [
+                        {"id": pk, "painting_code": code, "distance": distance}
+                        for pk, code, distance in nearby if pk != node.pk
+                    ],
+                })
+
+            data = {
+                "type": "success",
+                "data": items,
+                "page": page.number,
+                "num_pages": paginator.num_pages,
+                "count": paginator.count,
+            }
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
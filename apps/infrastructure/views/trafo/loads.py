@@ -0,0 +1,80 @@
+import csv
+import time
+from datetime import datetime
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+
+from apps.infrastructure.loads import get_trafo_loads
+from apps.infrastructure.models import Trafo
+from apps.mixins import APIPermissionValidation
+
+
+REPORT_COLUMNS = (
+    ("trafo", "Id"),
+    ("code", "Código"),
+    ("luminaires", "Luminarias"),
+    ("luminaires_on", "Luminarias en servicio"),
+    ("connected_kw", "Carga conectada (kW)"),
+    ("operating_kw", "Carga en operación (kW)"),
+    ("capacity_kw", "Capacidad (kW)"),
+    ("utilization", "Utilización"),
+)
+
+
+class TrafoLoadAPI(LoginRequiredMixin, APIPermissionValidation, View):
+    """
+    Carga de alumbrado por transformador.
+
+    Parámetros GET: ids (separados por coma; sin ids son todos), comuna,
+    over (sólo trafos con utilización mayor a este valor, p.ej. 0.8),
+    format=csv para descargar el reporte.
+    """
+    permission_required = ["infrastructure.view_trafo"]
+
+    def _queryset(self, request):
+        queryset = Trafo.objects.all()
+        if request.GET.get("ids"):
+            queryset = queryset.filter(id__in=[int(v) for v in request.GET["ids"].split(",") if v.strip()])
+        if request.GET.get("comuna"):
+            queryset = queryset.filter(fk_node__fk_district__fk_comuna_id=int(request.GET["comuna"]))
+        return queryset
+
+    def _loads(self, request):
+        codes = dict(self._queryset(request).values_list("id", "code"))
+        loads = get_trafo_loads(codes.keys())
+        over = request.GET.get("over")
+        if over:
+            over = float(over)
+            loads = [l for l in loads if l["utilization"] is not None and l["utilization"] > over]
+        return [dict(load, code=codes.get(load["trafo"])) for load in loads]
+
+    def _csv_response(self, loads):
+        response = HttpResponse(content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = (
+            f'attachment; filename="carga_transformadores_{datetime.now():%Y%m%d}.csv"'
+        )
+        response.write("﻿")
+        writer = csv.writer(response)
+        writer.writerow([title for _, title in REPORT_COLUMNS])
+        for load in loads:
+            writer.writerow(["" if load.get(key) is None else load[key] for key, _ in REPORT_COLUMNS])
+        return response
+
+    def get(self, request, *args, **kwargs):
+        start_time = time.time()
+        status = 200
+        try:
+            loads = self._loads(request)
+            if request.GET.get("format") == "csv":
+                return self._csv_response(loads)
+            data = {"type": "success", "data": loads}
+        except ValueError as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 400
+        except Exception as e:
+            data = {"type": "error", "msg": str(e)}
+            status = 500
+        data["time"] = str(time.time() - start_time)
+        return JsonResponse(data, status=status)
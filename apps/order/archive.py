@@ -0,0 +1,173 @@
+# Django
+from django.apps import apps
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+# Django simple history
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.utils import get_history_manager_for_model
+
+# local Django
+from apps.core.counts import apply_list_count_changes
+from .models import OrderActive, OrderActiveRoute, OrderClosed, OrderClosedRoute
+
+PqrActive = apps.get_model('pqrs', 'PqrActive')
+PqrActiveRoute = apps.get_model('pqrs', 'PqrActiveRoute')
+PqrClosed = apps.get_model('pqrs', 'PqrClosed')
+PqrClosedRoute = apps.get_model('pqrs', 'PqrClosedRoute')
+
+
+"""
+    Archivo de PQRs y órdenes: paso de las tablas activas a las cerradas.
+
+    Las filas se copian conservando el id, por conjuntos: una lectura por tabla
+    (PQRs, rutas, órdenes, rutas de orden, actividades), un bulk_create de lo
+    nuevo, un bulk_update de lo que ya estaba en la tabla cerrada (una PQR con
+    una orden cerrada antes, un reintento) y un DELETE por tabla de origen. El
+    número de sentencias no depende de cuántas PQRs u órdenes se archiven.
+
+    Los borrados no disparan señales: django-cleanup borraría las imágenes que
+    ahora referencia la orden cerrada y cada fila escribiría su propio histórico
+    y su propio conteo. Por eso el histórico (+ en cerradas, - en activas) y los
+    conteos de los listados (ListCount) se escriben aquí, también en bloque.
+"""
+
+
+BATCH_SIZE = 500
+HISTORY_REASON = 'Archivo'
+
+
+def _value(row, attname):
+    value = getattr(row, attname)
+    # Las imágenes se copian como ruta: el archivo no se mueve
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _write_history(model, objs, history_type, user=None):
+    """Histórico de `objs` en bloque, como bulk_history_create pero con cualquier tipo (+, ~, -)."""
+    try:
+        historical = get_history_manager_for_model(model).model
+    except NotHistoricalModelError:
+        return
+    date = timezone.now()
+    historical.objects.bulk_create([
+        historical(
+            history_date=date,
+            history_user=user or historical.get_default_history_user(obj),
+            history_change_reason=HISTORY_REASON,
+            history_type=history_type,
+            **{field.attname: getattr(obj, field.attname) for field in historical.tracked_fields},
+        )
+        for obj in objs
+    ], batch_size=BATCH_SIZE)
+
+
+def _copy_rows(target, rows, user=None):
+    """
+    Copia `rows` (instancias de la tabla activa) a `target` con el mismo id: crea
+    las que faltan y actualiza las que ya existen. Escribe el histórico y los
+    conteos de `target`; devuelve las instancias copiadas.
+    """
+    if not rows:
+        return []
+    fields = [field for field in target._meta.concrete_fields if not field.primary_key]
+    copies = [
+        target(pk=row.pk, **{field.attname: _value(row, field.attname) for field in fields})
+        for row in rows
+    ]
+    previous = {obj.pk: obj for obj in target._default_manager.filter(pk__in=[obj.pk for obj in copies])}
+    created = [obj for obj in copies if obj.pk not in previous]
+    updated = [obj for obj in copies if obj.pk in previous]
+
+    target._default_manager.bulk_create(created, batch_size=BATCH_SIZE)
+    if updated:
+        target._default_manager.bulk_update(updated, [field.name for field in fields], batch_size=BATCH_SIZE)
+
+    _write_history(target, created, '+', user)
+    _write_history(target, updated, '~', user)
+    apply_list_count_changes(target, removed=previous.values(), added=copies)
+    return copies
+
+
+def _delete_rows(model, rows, user=None):
+    """Borra `rows` sin señales, con su histórico (-) y su conteo."""
+    if not rows:
+        return
+    _write_history(model, rows, '-', user)
+    queryset = model._default_manager.filter(pk__in=[row.pk for row in rows])
+    queryset._raw_delete(queryset.db)
+    apply_list_count_changes(model, removed=rows)
+
+
+def _copy_pqrs(pqr_ids, user=None, only_missing=False):
+    """Copia PQRs activas (con sus rutas) a PqrClosed; devuelve (PQRs, rutas) activas copiadas."""
+    if only_missing:
+        existing = set(PqrClosed.objects.filter(pk__in=pqr_ids).values_list('pk', flat=True))
+        pqr_ids = [pk for pk in pqr_ids if pk not in existing]
+        if not pqr_ids:
+            return [], []
+    pqrs = list(PqrActive.objects.filter(pk__in=pqr_ids))
+    if not pqrs:
+        return [], []
+    routes = list(PqrActiveRoute.objects.filter(fk_pqr_id__in=[pqr.pk for pqr in pqrs]))
+    _copy_rows(PqrClosed, pqrs, user)
+    _copy_rows(PqrClosedRoute, routes, user)
+    return pqrs, routes
+
+
+@transaction.atomic
+def archive_orders(order_ids, user=None):
+    """
+    Mueve órdenes activas a OrderClosed con sus rutas y actividades. La PQR de
+    cada orden se copia a PqrClosed si aún no está; la PQR activa sigue mientras
+    tenga órdenes abiertas. Devuelve cuántas órdenes se archivaron.
+    """
+    orders = list(OrderActive.objects.filter(pk__in=list(order_ids)))
+    if not orders:
+        return 0
+    ids = [order.pk for order in orders]
+    _copy_pqrs({order.fk_pqr_id for order in orders}, user, only_missing=True)
+
+    routes = list(OrderActiveRoute.objects.filter(fk_ot_id__in=ids))
+    _copy_rows(OrderClosed, orders, user)
+    _copy_rows(OrderClosedRoute, routes, user)
+
+    # Actividades: se reemplazan las de la orden cerrada por las de la activa
+    active_field = OrderActive._meta.get_field('activities')
+    closed_field = OrderClosed._meta.get_field('activities')
+    active_through, closed_through = active_field.remote_field.through, closed_field.remote_field.through
+    active_column, closed_column = f'{active_field.m2m_field_name()}_id', f'{closed_field.m2m_field_name()}_id'
+    activity_column = f'{active_field.m2m_reverse_field_name()}_id'
+    pairs = list(
+        active_through.objects.filter(**{f'{active_column}__in': ids}).values_list(active_column, activity_column)
+    )
+    stale = closed_through.objects.filter(**{f'{closed_column}__in': ids})
+    stale._raw_delete(stale.db)
+    closed_through.objects.bulk_create(
+        [closed_through(**{closed_column: order_id, activity_column: activity_id}) for order_id, activity_id in pairs],
+        batch_size=BATCH_SIZE,
+    )
+    moved = active_through.objects.filter(**{f'{active_column}__in': ids})
+    moved._raw_delete(moved.db)
+
+    _delete_rows(OrderActiveRoute, routes, user)
+    _delete_rows(OrderActive, orders, user)
+    return len(ids)
+
+
+@transaction.atomic
+def archive_pqrs(pqr_ids, user=None):
+    """
+    Mueve PQRs activas a PqrClosed con sus rutas y todas sus órdenes activas
+    (con las rutas y actividades de cada una). Devuelve cuántas PQRs se archivaron.
+    """
+    pqrs, routes = _copy_pqrs(list(pqr_ids), user)
+    if not pqrs:
+        return 0
+    ids = [pqr.pk for pqr in pqrs]
+    archive_orders(OrderActive.objects.filter(fk_pqr_id__in=ids).values_list('pk', flat=True), user)
+
+    _delete_rows(PqrActiveRoute, routes, user)
+    _delete_rows(PqrActive, pqrs, user)
+    return len(ids)
@@ -2,3 +2,4 @@ from django.dispatch import receiver
 from django.db.models import signals
 
 from .order_active import *
+from .counts import *
@@ -0,0 +1,8 @@
+from apps.core.counts import track_list_counts
+
+from ..models import OrderActive, OrderClosed
+
+
+# Conteos por estado y área de los listados de órdenes
+track_list_counts(OrderActive, 'fk_area_id')
+track_list_counts(OrderClosed, 'fk_area_id')
@@ -23,6 +23,11 @@ let currentOrder = 'id';
 let currentOrderDir = 'desc';
 let currentSearch = '';
 let totalRecords = 0;
+// Paginación por cursor: la respuesta trae el cursor de la página siguiente y de la anterior
+let nextCursor = null;
+let prevCursor = null;
+let pageCursor = '';
+let pageLast = false;
 
 let locateMap = null;
 let locateMarker = null;
@@ -33,6 +38,11 @@ let locateMarker = null;
 
 function loadOrdersData() {
     const inicio = currentPage * pageSize;
+    // Página vecina por cursor, la última desde el final y cualquier otra por posición
+    const cursor = pageCursor;
+    const ultima = pageLast;
+    pageCursor = '';
+    pageLast = false;
 
     $.ajax({
         url: window.location.pathname,
@@ -40,7 +50,9 @@ function loadOrdersData() {
         data: {
             action: 'searchdata',
             inicio: inicio,
-            limite: pageSize,
+            limite: ultima ? totalRecords - inicio : pageSize,
+            cursor: cursor,
+            ultima: ultima,
             filtro: currentSearch,
             order_by: currentOrder,
             order_dir: currentOrderDir
@@ -60,6 +72,8 @@ function loadOrdersData() {
         success: function (response) {
             if (response.type === 'success') {
                 totalRecords = response.length;
+                nextCursor = response.next;
+                prevCursor = response.prev;
                 renderTable(response.objects);
                 updatePagination();
             } else {
@@ -237,6 +251,9 @@ function updateInfo() {
 function changePage(page) {
     const totalPages = Math.ceil(totalRecords / pageSize);
     if (page < 0 || page >= totalPages) return;
+    if (page === currentPage + 1 && nextCursor) pageCursor = nextCursor;
+    else if (page === currentPage - 1 && prevCursor) pageCursor = prevCursor;
+    else if (page > 0 && page === totalPages - 1) pageLast = true;
     currentPage = page;
     loadOrdersData();
 }
@@ -1,3 +1,62 @@
 from django.test import TestCase
 
-# Create your tests here.
+from apps.core.counts import list_count
+from apps.order.archive import archive_pqrs
+from apps.pqrs.models import GeneralTypeDamage, PqrActive, PqrActiveRoute, PqrClosed, PqrClosedRoute
+
+
+class ArchivePqrsTests(TestCase):
+    # Crear una PQR asigna su radicado (alias propio en PostgreSQL)
+    databases = {"default", "file_numbers"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.damage = GeneralTypeDamage.objects.create(name="Luminaria apagada")
+
+    def _pqr(self, status=3):
+        return PqrActive.objects.create(
+            fk_type_damage=self.damage, name="ana perez", observation="Sin luz", status=status
+        )
+
+    def test_pqr_moves_with_its_routes_and_keeps_its_id(self):
+        pqr = self._pqr()
+        self.assertEqual(PqrActiveRoute.objects.filter(fk_pqr=pqr).count(), 1)
+
+        self.assertEqual(archive_pqrs([pqr.pk]), 1)
+
+        self.assertFalse(PqrActive.objects.filter(pk=pqr.pk).exists())
+        self.assertFalse(PqrActiveRoute.objects.filter(fk_pqr_id=pqr.pk).exists())
+        closed = PqrClosed.objects.get(pk=pqr.pk)
+        self.assertEqual(closed.file_number, pqr.file_number)
+        self.assertEqual(closed.name, "Ana Perez")
+        self.assertEqual(closed.status, 3)
+        self.assertEqual(PqrClosedRoute.objects.filter(fk_pqr=closed).count(), 1)
+
+    def test_history_records_the_move(self):
+        pqr = self._pqr()
+        archive_pqrs([pqr.pk])
+        self.assertTrue(
+            PqrClosed.historical.filter(id=pqr.pk, history_type="+", history_change_reason="Archivo").exists()
+        )
+        self.assertTrue(
+            PqrActive.historical.filter(id=pqr.pk, history_type="-", history_change_reason="Archivo").exists()
+        )
+
+    def test_list_counts_follow_the_move(self):
+        pqrs = [self._pqr(status=3), self._pqr(status=3), self._pqr(status=0)]
+        active_done, active_void = list_count(PqrActive, 3), list_count(PqrActive, 0)
+        closed_done, closed_void = list_count(PqrClosed, 3), list_count(PqrClosed, 0)
+
+        self.assertEqual(archive_pqrs([pqr.pk for pqr in pqrs]), 3)
+
+        self.assertEqual(list_count(PqrActive, 3), active_done - 2)
+        self.assertEqual(list_count(PqrActive, 0), active_void - 1)
+        self.assertEqual(list_count(PqrClosed, 3), closed_done + 2)
+        self.assertEqual(list_count(PqrClosed, 0), closed_void + 1)
+        # Los conteos mantenidos coinciden con un COUNT(*)
+        self.assertEqual(list_count(PqrClosed, 3), PqrClosed.objects.filter(status=3).count())
+
+    def test_unknown_ids_are_ignored(self):
+        pqr = self._pqr()
+        self.assertEqual(archive_pqrs([pqr.pk + 1000]), 0)
+        self.assertTrue(PqrActive.objects.filter(pk=pqr.pk).exists())
@@ -13,6 +13,8 @@ from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404
 
 # local Django
+from apps.core.counts import list_count
+from apps.core.paging import paginate
 from apps.mixins import ValidatePermissionRequiredMixin
 from ..models import OrderActive, OrderClosed, OrderActiveRoute
 from ..choices import OT_STATUS
@@ -103,19 +105,27 @@ class OrderActiveBase(LoginRequiredMixin, ValidatePermissionRequiredMixin, ListV
             )
         ).values(*self.fields_to_select).order_by(order_by)
 
-        # Filtrar por grupo de usuario
+        # Filtrar por grupo de usuario; el contador es por estado y área, con cuadrilla
+        # se cuenta de verdad
+        self.count_key = (status, area.pk)
         group = request.user.groups.first()
         if not (group and group.name in ('Administrador', 'Supervisor')):
             queryset = queryset.filter(fk_crew=request.user.fk_crew)
+            self.count_key = None
 
         return queryset
 
+    def get_length(self, request, queryset):
+        # COUNT exacto sólo al buscar; sin filtro, el conteo por estado y área (apps.core.counts)
+        if self.count_key is None or request.POST.get('filtro', '').strip():
+            return queryset.count()
+        return list_count(self.model, *self.count_key)
+
     def get_data(self, request, queryset):
-        inicio = int(request.POST.get('inicio', 0))
-        fin = int(request.POST.get('limite', 50))
+        rows, next_cursor, prev_cursor = paginate(queryset, request.POST)
 
         list_data = []
-        for valor in queryset[inicio:inicio + fin]:
+        for valor in rows:
             valor['remaining_time'] = OrderActiveBase.calculate_remaining_time(valor['date_limit'])
             valor['date_creation'] = valor['date_creation'].strftime('%Y-%m-%d %H:%M:%S')
             valor['date_limit'] = valor['date_limit'].strftime('%Y-%m-%d %H:%M:%S') if valor['date_limit'] else ''
@@ -123,7 +133,9 @@ class OrderActiveBase(LoginRequiredMixin, ValidatePermissionRequiredMixin, ListV
 
         return {
             "type": 'success',
-            "length": queryset.count(),
+            "length": self.get_length(request, queryset),
+            "next": next_cursor,
+            "prev": prev_cursor,
             "objects": list_data
         }
 
@@ -190,11 +202,10 @@ class OrderActiveListState3(OrderActiveBase):
     status = 3
 
     def get_data(self, request, queryset):
-        inicio = int(request.POST.get('inicio', 0))
-        fin = int(request.POST.get('limite', 50))
+        rows, next_cursor, prev_cursor = paginate(queryset, request.POST)
 
         list_data = []
-        for valor in queryset[inicio:inicio + fin]:
+        for valor in rows:
             valor['remaining_time'] = OrderActiveBase.calculate_remaining_time(valor['date_limit'])
             valor['date_creation'] = valor['date_creation'].strftime('%Y-%m-%d %H:%M:%S')
             valor['date_limit'] = valor['date_limit'].strftime('%Y-%m-%d %H:%M:%S') if valor['date_limit'] else ''
@@ -208,7 +219,9 @@ class OrderActiveListState3(OrderActiveBase):
 
         return {
             "type": 'success',
-            "length": queryset.count(),
+            "length": self.get_length(request, queryset),
+            "next": next_cursor,
+            "prev": prev_cursor,
             "objects": list_data
         }
 
@@ -271,20 +284,28 @@ class OrderClosedListState4(LoginRequiredMixin, ValidatePermissionRequiredMixin,
                 Q(fk_crew__name__icontains=search_term)
             )
         ).values(*self.fields_to_select).order_by(order_by)
+        self.count_key = (status, area.pk)
         return queryset
 
+    def get_length(self, request, queryset):
+        # COUNT exacto sólo al buscar; sin filtro, el conteo por estado y área (apps.core.counts)
+        if request.POST.get('filtro', '').strip():
+            return queryset.count()
+        return list_count(self.model, *self.count_key)
+
     def get_data(self, request, queryset):
-        inicio = int(request.POST.get('inicio', 0))
-        fin = int(request.POST.get('limite', 50))
+        rows, next_cursor, prev_cursor = paginate(queryset, request.POST)
 
         list_data = []
-        for valor in queryset[inicio:inicio + fin]:
+        for valor in rows:
             valor['date_creation'] = valor['date_creation'].strftime('%Y-%m-%d %H:%M:%S')
             list_data.append(valor)
 
         return {
             "type": 'success',
-            "length": queryset.count(),
+            "length": self.get_length(request, queryset),
+            "next": next_cursor,
+            "prev": prev_cursor,
             "objects": list_data
         }
 
@@ -1,5 +1,4 @@
 # standard library
-import os
 import time
 from datetime import datetime
 
@@ -9,12 +8,11 @@ from django.db import transaction
 from django.apps import apps
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from django.utils.timezone import now
 from django.views import View
 
 # local Django
 from ..models import (
-    OrderActive, OrderClosed, OrderActiveRoute, OrderClosedRoute,
+    OrderActive,
     CauseRejectOrder, TypeOrder, InternalTypeDamage, Priority, TimingRepair
 )
 
@@ -108,51 +106,11 @@ class OrderStatusChangeHandler:
             new_route.output_date = datetime.now()
         new_route.save()
 
-    @transaction.atomic
-    def move_to_close(self):
-        """Move an OrderActive to OrderClosed."""
-        from apps.pqrs.views.tools import PqrStatusChangeHandler
-
-        PqrClosed = apps.get_model('pqrs', 'PqrClosed')
-        active_pqr = self.instance.fk_pqr
-        pqr_id_for_closed_order = None
-
-        pqr_closed_instance = PqrClosed.objects.filter(id=active_pqr.id).first()
-        if pqr_closed_instance:
-            pqr_id_for_closed_order = pqr_closed_instance.id
-        else:
-            pqr_handler = PqrStatusChangeHandler(active_pqr)
-            newly_closed_pqr = pqr_handler.move_to_close()
-            pqr_id_for_closed_order = newly_closed_pqr.id
-
-        order_closed = OrderClosed(id=self.instance.id, fk_pqr_id=pqr_id_for_closed_order)
-        for field in self.instance._meta.fields:
-            if field.name not in ('id', 'fk_pqr'):
-                setattr(order_closed, field.name, getattr(self.instance, field.name))
-
-        for field_name in ['image1', 'image2']:
-            image_active = getattr(self.instance, field_name)
-            if image_active:
-                filename = os.path.basename(image_active.name)
-                new_filename = f'ot_images/{now().strftime("%Y/%m/%d")}/{filename}'
-                setattr(order_closed, field_name, new_filename)
-                setattr(self.instance, field_name, None)
-
-        activities = self.instance.activities.all()
-        order_closed.save()
-        order_closed.activities.add(*activities)
-
-        history_active = OrderActiveRoute.objects.filter(fk_ot=self.instance)
-        for history in history_active:
-            order_closed_history = OrderClosedRoute(
-                id=history.id, user_creation=history.user_creation,
-                input_date=history.input_date,
-                output_date=history.output_date if history.output_date is not None else None,
-                fk_ot=order_closed, state=history.state, cause=history.cause
-            )
-            order_closed_history.save()
-        history_active.delete()
-        self.instance.delete()
+    def move_to_close(self, user=None):
+        """Mueve la orden a OrderClosed con sus rutas y actividades (ver apps.order.archive)."""
+        from apps.order.archive import archive_orders
+
+        archive_orders([self.instance.pk], user)
 
 
 class OrderStatusChangeAPI(LoginRequiredMixin, View):
@@ -180,7 +138,7 @@ class OrderStatusChangeAPI(LoginRequiredMixin, View):
             handler.create_route(request.user, init_state)
 
             if state == 4:
-                handler.move_to_close()
+                handler.move_to_close(request.user)
 
             data = {'type': 'success', 'msg': f'Se cambió el estado de la orden {str(instance)} correctamente'}
         except Exception as e:
@@ -1,3 +1,5 @@
+import itertools
+
 from django.contrib import admin
 from django.utils.html import format_html
 
@@ -10,13 +12,65 @@ from .models import *
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
+from apps.core.admin import BackgroundImportAdminMixin
+from apps.core.counts import rebuild_list_counts
+from apps.core.imports import BulkImportResource
+from apps.users.models import Reporter
+from .file_numbers import next_file_number
+from .search import SearchDocumentBuilder
+
+
+# Radicados provisionales de las simulaciones: fuera del rango AA000000-99999999 de
+# los reales y distintos entre bloques simulados en paralelo
+DRY_RUN_FILE_NUMBERS = itertools.count(10 ** 12)
+
 
-class PqrActiveResource(resources.ModelResource):
+class PqrActiveResource(BulkImportResource):
     class Meta:
         model = PqrActive
+        exclude = ('search_document',)
+
+    def prepare_instance(self, instance):
+        # Lo que hacen PqrActive.save() y la señal pre_save de radicado
+        if instance.name:
+            instance.name = instance.name.title()
+        if instance._state.adding and not instance.file_number:
+            # La reserva de radicados no se revierte con la simulación: no gastarlos en ella
+            instance.file_number = next(DRY_RUN_FILE_NUMBERS) if self.dry_run else next_file_number()
+        # Lo que hace la señal pre_save de search_document, con los nombres memorizados
+        if not hasattr(self, '_search_builder'):
+            self._search_builder = SearchDocumentBuilder()
+        instance.search_document = self._search_builder(instance)
+
+    def get_bulk_update_fields(self):
+        # search_document no es columna del archivo pero se recalcula en cada fila
+        return super().get_bulk_update_fields() + ['search_document']
+
+    def after_bulk_save(self, instances, created):
+        super().after_bulk_save(instances, created)
+        if not created:
+            return
+        # Ruta inicial y Reporter de cada PQR nueva (señal post_save); las PQR
+        # importadas no envían correo de creación
+        PqrActiveRoute.objects.bulk_create([PqrActiveRoute(fk_pqr=pqr, state=1) for pqr in instances])
+        reporters = {
+            pqr.dni: Reporter(dni=pqr.dni, name=pqr.name, phone_number=pqr.phone_number, email=pqr.email)
+            for pqr in instances if pqr.dni
+        }
+        if reporters:
+            Reporter.objects.bulk_create(
+                reporters.values(),
+                update_conflicts=True,
+                unique_fields=['dni'],
+                update_fields=['name', 'phone_number', 'email'],
+            )
+
+    def after_job(self):
+        # bulk_create no dispara las señales de los conteos de los listados
+        rebuild_list_counts(PqrActive)
 
 @admin.register(PqrActive)
-class PqrActiveAdmin(ImportExportModelAdmin):
+class PqrActiveAdmin(BackgroundImportAdminMixin, ImportExportModelAdmin):
     resource_class= PqrActiveResource
     search_fields = ('id','file_number','name','phone_number','dni','email','observation')
     list_display = ('id','file_number','name','phone_number','email','fk_type_damage','status')
@@ -26,6 +80,7 @@ class PqrActiveAdmin(ImportExportModelAdmin):
 class PqrClosedResource(resources.ModelResource):
     class Meta:
         model = PqrClosed
+        exclude = ('search_document',)
 
 @admin.register(PqrClosed)
 class PqrClosedAdmin(ImportExportModelAdmin):
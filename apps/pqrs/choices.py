@@ -4,3 +4,7 @@ PQR_STATUS = (
     (2, 'En proceso'),
     (3, 'Atentida'),
 )
+
+# Estados finales (anulada o atendida); en los demás la PQR sigue abierta
+PQR_FINAL_STATUS = (0, 3)
+PQR_OPEN_STATUS = tuple(value for value, _ in PQR_STATUS if value not in PQR_FINAL_STATUS)
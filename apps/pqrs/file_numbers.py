@@ -0,0 +1,107 @@
+# standard library
+import threading
+from datetime import datetime
+
+# Django
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Max
+
+# local Django
+from .models import FileNumberSequence, PqrActive, PqrClosed
+
+
+"""
+    Radicados de PQR: AA000001, AA000002, ... donde AA son los dos últimos dígitos
+    del año. Cada año tiene su fila en FileNumberSequence, creada al pedir el
+    primer radicado del año, y se incrementa con un único
+    UPDATE ... SET last_value = last_value + n RETURNING last_value, así que dos
+    peticiones simultáneas nunca leen el mismo valor.
+
+    En PostgreSQL el UPDATE va por una conexión propia en autocommit (el alias
+    FILE_NUMBER_DB_ALIAS de DATABASES, con ATOMIC_REQUESTS desactivado): el bloqueo de
+    la fila dura lo que la sentencia y no toda la petición (ATOMIC_REQUESTS), de
+    modo que las creaciones concurrentes no se serializan. A cambio, un radicado
+    de una PQR que se revierte queda sin usar. Con FILE_NUMBER_BLOCK_SIZE > 1 cada
+    proceso reserva bloques y los entrega desde memoria (menos escrituras, pero los
+    radicados de procesos distintos se intercalan y el resto de un bloque se pierde
+    al reiniciar). En otros motores el UPDATE va en la transacción en curso y no se
+    reservan bloques: un bloque revertido volvería a entregarse.
+"""
+
+
+YEAR_BASE = 1000000
+
+_lock = threading.Lock()
+# (año, próximo radicado del bloque, fin del bloque)
+_block = (None, 0, 0)
+
+
+def _connection():
+    # La conexión del alias FILE_NUMBER_DB_ALIAS es por hilo y la cierra Django
+    # (fin de petición) o el hilo que la abrió (connections.close_all())
+    alias = getattr(settings, "FILE_NUMBER_DB_ALIAS", None)
+    if connection.vendor != "postgresql" or alias not in connections:
+        return connection
+    return connections[alias]
+
+
+def _block_size():
+    if connection.vendor != "postgresql":
+        return 1
+    return max(1, getattr(settings, "FILE_NUMBER_BLOCK_SIZE", 1))
+
+
+def _seed(year):
+    """Último radicado ya usado del año (PQRs creadas antes de la secuencia o importadas)."""
+    start = (year % 100) * YEAR_BASE
+    used = [
+        model.objects.filter(file_number__gt=start, file_number__lt=start + YEAR_BASE)
+        .aggregate(value=Max("file_number"))["value"]
+        for model in (PqrActive, PqrClosed)
+    ]
+    return max([value for value in used if value] or [start])
+
+
+def reserve_file_numbers(count=1, year=None):
+    """Reserva `count` radicados consecutivos del año; devuelve el último."""
+    year = year or datetime.now().year
+    conn = _connection()
+    quote = conn.ops.quote_name
+    table, year_column, value_column = (
+        quote(FileNumberSequence._meta.db_table), quote("year"), quote("last_value")
+    )
+    increment = (
+        f"UPDATE {table} SET {value_column} = {value_column} + %s "
+        f"WHERE {year_column} = %s RETURNING {value_column}"
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(increment, [count, year])
+        row = cursor.fetchone()
+        if row is None:
+            # Primer radicado del año; si otro proceso crea la fila a la vez, gana el primero
+            cursor.execute(
+                f"INSERT INTO {table} ({year_column}, {value_column}) VALUES (%s, %s) "
+                f"ON CONFLICT ({year_column}) DO NOTHING",
+                [year, _seed(year)],
+            )
+            cursor.execute(increment, [count, year])
+            row = cursor.fetchone()
+    return row[0]
+
+
+def next_file_number(now=None):
+    """Siguiente radicado; desde el bloque reservado por este proceso si lo hay."""
+    global _block
+    year = (now or datetime.now()).year
+    size = _block_size()
+    if size == 1:
+        return reserve_file_numbers(1, year)
+
+    with _lock:
+        block_year, value, end = _block
+        if block_year != year or value >= end:
+            last = reserve_file_numbers(size, year)
+            block_year, value, end = year, last - size + 1, last + 1
+        _block = (block_year, value + 1, end)
+    return value
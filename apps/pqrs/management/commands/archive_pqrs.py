@@ -0,0 +1,50 @@
+# standard library
+from datetime import datetime
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# local Django
+from apps.order.archive import archive_pqrs
+from apps.pqrs.choices import PQR_FINAL_STATUS
+from apps.pqrs.models import PqrActive
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve PQRs activas (con rutas, órdenes y actividades) a las tablas de cerradas. "
+        "Sin ids toma las PQRs en los estados indicados que no tengan órdenes abiertas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Ids de PQR a archivar")
+        parser.add_argument("--status", type=int, action="append", help="Estado a archivar (repetible); por defecto los finales (0 y 3)")
+        parser.add_argument("--before", help="Sólo PQRs creadas antes de esta fecha (AAAA-MM-DD)")
+        parser.add_argument("--with-orders", action="store_true", help="Archiva también PQRs con órdenes abiertas")
+        parser.add_argument("--batch-size", type=int, default=500, help="PQRs por transacción")
+        parser.add_argument("--dry-run", action="store_true", help="Sólo informa cuántas PQRs se archivarían")
+
+    def handle(self, *args, **options):
+        queryset = PqrActive.objects.all()
+        if options["ids"]:
+            queryset = queryset.filter(pk__in=options["ids"])
+        else:
+            queryset = queryset.filter(status__in=options["status"] or PQR_FINAL_STATUS)
+            if not options["with_orders"]:
+                queryset = queryset.filter(orderactive__isnull=True)
+        if options["before"]:
+            try:
+                queryset = queryset.filter(date_creation__lt=datetime.strptime(options["before"], "%Y-%m-%d"))
+            except ValueError:
+                raise CommandError("--before debe tener el formato AAAA-MM-DD")
+
+        ids = list(queryset.order_by("id").values_list("id", flat=True).distinct())
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{len(ids)} PQRs por archivar."))
+            return
+
+        archived = 0
+        size = max(1, options["batch_size"])
+        for start in range(0, len(ids), size):
+            archived += archive_pqrs(ids[start:start + size])
+        self.stdout.write(self.style.SUCCESS(f"{archived} PQRs archivadas."))
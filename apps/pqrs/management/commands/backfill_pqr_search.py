@@ -0,0 +1,16 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# local Django
+from apps.pqrs.search import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Calcula search_document de las PQRs activas y cerradas (filtro de los listados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000, help="PQRs por actualización")
+
+    def handle(self, *args, **options):
+        updated = refresh_search_documents(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{updated} documentos de búsqueda actualizados."))
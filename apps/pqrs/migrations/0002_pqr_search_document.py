@@ -0,0 +1,57 @@
+# Generated by Django 5.1.6 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+TRIGRAM_INDEXES = {
+    'PQR_ACTIVE': 'PQR_ACTIVE_search_document_trgm_idx',
+    'PQR_CLOSED': 'PQR_CLOSED_search_document_trgm_idx',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm y el índice GIN sólo existen en PostgreSQL; en otros motores el
+    # filtro de los listados es un LIKE sin índice
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, name in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin ("search_document" gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pqractive',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de búsqueda'),
+        ),
+        migrations.AddField(
+            model_name='pqrclosed',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Documento de búsqueda'),
+        ),
+        migrations.AddIndex(
+            model_name='pqractive',
+            index=models.Index(fields=['date_creation'], name='PQR_ACTIVE_date_cr_8d9ae1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pqrclosed',
+            index=models.Index(fields=['date_creation'], name='PQR_CLOSED_date_cr_1984aa_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Último radicado entregado de cada año según la tabla anterior (AA000001, ...)
+    FileNumber = apps.get_model('pqrs', 'FileNumber')
+    FileNumberSequence = apps.get_model('pqrs', 'FileNumberSequence')
+    last = {}
+    for value in FileNumber.objects.values_list('value', flat=True).iterator():
+        year = 2000 + value // 1000000
+        last[year] = max(last.get(year, 0), value)
+    FileNumberSequence.objects.bulk_create(
+        [FileNumberSequence(year=year, last_value=value) for year, value in last.items()]
+    )
+
+
+def restore_file_numbers(apps, schema_editor):
+    FileNumber = apps.get_model('pqrs', 'FileNumber')
+    FileNumberSequence = apps.get_model('pqrs', 'FileNumberSequence')
+    sequence = FileNumberSequence.objects.order_by('-year').first()
+    if sequence is not None:
+        FileNumber.objects.create(value=sequence.last_value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0002_pqr_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileNumberSequence',
+            fields=[
+                ('year', models.PositiveSmallIntegerField(primary_key=True, serialize=False, verbose_name='Año')),
+                ('last_value', models.PositiveBigIntegerField(verbose_name='Último radicado')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de radicados',
+                'verbose_name_plural': 'Secuencias de radicados',
+                'db_table': 'FILE_NUMBER_SEQUENCE',
+                'ordering': ['-year'],
+            },
+        ),
+        migrations.RunPython(seed_sequences, restore_file_numbers),
+        migrations.DeleteModel(
+            name='FileNumber',
+        ),
+    ]
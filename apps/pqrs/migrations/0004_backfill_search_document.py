@@ -0,0 +1,56 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# Documento tal como se armaba al agregar la columna (copia de apps.pqrs.search: la
+# migración no debe cambiar si ese módulo cambia después)
+DOCUMENT_SEPARATOR = ' | '
+DOCUMENT_FIELDS = (
+    'file_number',
+    'name',
+    'fk_type_damage__name',
+    'fk_node_reported__painting_code',
+    'fk_node_reported__fk_district__name',
+    'fk_node_reported__fk_district__fk_comuna__name',
+    'fk_origin__name',
+)
+BATCH_SIZE = 2000
+
+
+def normalize_search(text):
+    if text is None:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', text))
+
+
+def build_document(values):
+    return DOCUMENT_SEPARATOR.join(filter(None, (normalize_search(value) for value in values)))
+
+
+def backfill_search_documents(apps, schema_editor):
+    # Sin documento las PQRs existentes no aparecerían en el filtro de los listados
+    for model_name in ('PqrActive', 'PqrClosed'):
+        model = apps.get_model('pqrs', model_name)
+        pending = []
+        rows = model.objects.filter(search_document='').order_by('id').values_list('id', *DOCUMENT_FIELDS)
+        for pk, *values in rows.iterator(chunk_size=BATCH_SIZE):
+            pending.append(model(id=pk, search_document=build_document(values)))
+            if len(pending) >= BATCH_SIZE:
+                model.objects.bulk_update(pending, ['search_document'])
+                pending = []
+        if pending:
+            model.objects.bulk_update(pending, ['search_document'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pqrs', '0003_filenumbersequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
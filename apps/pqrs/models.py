@@ -1,6 +1,5 @@
 # standard library
 import re, os
-from datetime import datetime
 
 # Django
 from django.db import models, transaction
@@ -127,36 +126,23 @@ class CauseRejectPqr(BaseModel):
         item = model_to_dict(self, exclude=['user_creation', 'user_updated'])
         return item
 
-class FileNumber(models.Model):
-    value = models.PositiveBigIntegerField(blank=True, null=False, unique=True, verbose_name='Número de radicado')
+class FileNumberSequence(models.Model):
+    """
+    Último radicado entregado de cada año (AA000001, AA000002, ...). Lo incrementa
+    apps.pqrs.file_numbers con un único UPDATE ... RETURNING, sin leer antes.
+    """
+    year = models.PositiveSmallIntegerField(primary_key=True, verbose_name='Año')
+    last_value = models.PositiveBigIntegerField(verbose_name='Último radicado')
 
     class Meta:
-        db_table = 'FILE_NUMBER'
-        verbose_name = 'Número de Radicado'
-        verbose_name_plural = 'Números de Radicados'
-        ordering = ['-id']
+        db_table = 'FILE_NUMBER_SEQUENCE'
+        verbose_name = 'Secuencia de radicados'
+        verbose_name_plural = 'Secuencias de radicados'
+        ordering = ['-year']
 
     def __str__(self):
-        return f"{self.value}"
-    
-    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        with transaction.atomic():
-            last_middle_year = datetime.now().year % 100
-
-            if not self.value:
-                last_instance = FileNumber.objects.order_by('-id').first()
-
-                if last_instance is not None:
-                    # Validamos que los dos primeros dígitos del último radicado guardado sean iguales a los dos últimos del año actual
-                    if last_middle_year == (int(last_instance.value) // 1000000):
-                        self.value = last_instance.value + 1
-                    else:
-                        FileNumber.objects.all().delete()
-                        self.value = (last_middle_year * 1000000) + 1
-                else:
-                    self.value = (last_middle_year * 1000000) + 1  # Número de radicado para el primer registro
-            super(FileNumber, self).save()
-    
+        return f"{self.year}: {self.last_value}"
+
 class PqrBase(models.Model):
     date_creation = models.DateTimeField(auto_now_add=True,null=True,blank=True)
     date_updated = models.DateTimeField(auto_now=True,null=True,blank=True)
@@ -195,6 +181,8 @@ class PqrBase(models.Model):
     )
     email = models.EmailField(verbose_name='Correo electrónico', null=True, blank=False, unique=False)
     observation = models.TextField(max_length=600, blank=False, null=False, verbose_name='Observaciones')
+    # Radicado, reportante, daño, código de pintado, barrio, comuna y origen normalizados (ver apps.pqrs.search)
+    search_document = models.TextField(blank=True, default='', editable=False, verbose_name='Documento de búsqueda')
 
     class Meta:
         abstract=True
@@ -212,7 +200,7 @@ class PqrBase(models.Model):
         return item
 
 class PqrActive(PqrBase):
-    historical = HistoricalRecords()
+    historical = HistoricalRecords(excluded_fields=['search_document'])
 
     class Meta:
         db_table = 'PQR_ACTIVE'
@@ -222,6 +210,7 @@ class PqrActive(PqrBase):
             models.Index(fields=['status']),
             models.Index(fields=['file_number']),
             models.Index(fields=['fk_node_reported', 'status']),
+            models.Index(fields=['date_creation']),
         ]
         ordering = ['id']
 
@@ -237,7 +226,7 @@ class PqrActive(PqrBase):
         return item
 
 class PqrClosed(PqrBase):
-    historical = HistoricalRecords()
+    historical = HistoricalRecords(excluded_fields=['search_document'])
 
     class Meta:
         db_table = 'PQR_CLOSED'
@@ -247,6 +236,7 @@ class PqrClosed(PqrBase):
             models.Index(fields=['status']),
             models.Index(fields=['file_number']),
             models.Index(fields=['fk_node_reported', 'status']),
+            models.Index(fields=['date_creation']),
         ]
         ordering = ['id']
 
@@ -0,0 +1,164 @@
+# standard library
+import re
+import unicodedata
+from datetime import datetime, timedelta
+
+# Django
+from django.db.models import Q
+
+# local Django
+from apps.infrastructure.models import Node
+from .models import GeneralTypeDamage, Origin, PqrActive, PqrClosed
+
+
+"""
+    Búsqueda de PQRs en los listados.
+
+    Cada PQR guarda en search_document (minúsculas, sin tildes) su radicado,
+    nombre del reportante, tipo de daño, código de pintado, barrio, comuna y
+    origen. El documento se arma al guardar (señal pre_save, importaciones) y se
+    recalcula cuando cambia el nombre de alguno de esos datos relacionados. En
+    PostgreSQL la columna tiene un índice GIN de trigramas (pg_trgm), que atiende
+    el LIKE '%término%' sin recorrer la tabla.
+"""
+
+
+# Separador entre campos: el término normalizado nunca lo contiene, así que una
+# búsqueda no puede coincidir a caballo entre dos campos
+DOCUMENT_SEPARATOR = " | "
+DOCUMENT_FIELDS = (
+    "file_number",
+    "name",
+    "fk_type_damage__name",
+    "fk_node_reported__painting_code",
+    "fk_node_reported__fk_district__name",
+    "fk_node_reported__fk_district__fk_comuna__name",
+    "fk_origin__name",
+)
+DATE_PREFIX = re.compile(r"^(\d{4})-(\d{1,2})(?:-(\d{1,2})(?:[ T](\d{1,2})(?::(\d{1,2}))?)?)?$")
+
+
+def normalize_search(text):
+    """Minúsculas, sin tildes y con la puntuación convertida en espacios."""
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def build_document(values):
+    """Documento de búsqueda a partir de los valores en el orden de DOCUMENT_FIELDS."""
+    return DOCUMENT_SEPARATOR.join(filter(None, (normalize_search(value) for value in values)))
+
+
+class SearchDocumentBuilder:
+    """
+    Arma search_document de instancias sin guardar. Memoriza los nombres
+    relacionados para que una importación masiva no consulte una vez por fila.
+    """
+
+    def __init__(self):
+        self._damages = {}
+        self._origins = {}
+        self._nodes = {}
+
+    def _damage(self, pk):
+        if pk not in self._damages:
+            self._damages[pk] = GeneralTypeDamage.objects.filter(pk=pk).values_list("name", flat=True).first()
+        return self._damages[pk]
+
+    def _origin(self, pk):
+        if pk not in self._origins:
+            self._origins[pk] = Origin.objects.filter(pk=pk).values_list("name", flat=True).first()
+        return self._origins[pk]
+
+    def _node(self, pk):
+        if pk not in self._nodes:
+            self._nodes[pk] = Node.objects.filter(pk=pk).values_list(
+                "painting_code", "fk_district__name", "fk_district__fk_comuna__name"
+            ).first() or (None, None, None)
+        return self._nodes[pk]
+
+    def __call__(self, pqr):
+        painting_code, district, comuna = (
+            self._node(pqr.fk_node_reported_id) if pqr.fk_node_reported_id else (None, None, None)
+        )
+        return build_document((
+            pqr.file_number,
+            pqr.name,
+            self._damage(pqr.fk_type_damage_id) if pqr.fk_type_damage_id else None,
+            painting_code,
+            district,
+            comuna,
+            self._origin(pqr.fk_origin_id) if pqr.fk_origin_id else None,
+        ))
+
+
+def refresh_search_documents(batch_size=2000, **filters):
+    """
+    Recalcula search_document de las PQRs (activas y cerradas) que cumplan los
+    filtros; sólo escribe las filas cuyo documento cambió. Devuelve cuántas.
+    """
+    updated = 0
+    for model in (PqrActive, PqrClosed):
+        pending = []
+        queryset = model.objects.filter(**filters).order_by("id").values_list("id", "search_document", *DOCUMENT_FIELDS)
+        for pk, current, *values in queryset.iterator(chunk_size=batch_size):
+            document = build_document(values)
+            if document != current:
+                pending.append(model(id=pk, search_document=document))
+            if len(pending) >= batch_size:
+                model.objects.bulk_update(pending, ["search_document"])
+                updated += len(pending)
+                pending = []
+        if pending:
+            model.objects.bulk_update(pending, ["search_document"])
+            updated += len(pending)
+    return updated
+
+
+def _date_span(term):
+    """Intervalo [inicio, fin) de un prefijo de fecha: 2025-03, 2025-03-14, 2025-03-14 08:30."""
+    match = DATE_PREFIX.match(term)
+    if not match:
+        return None
+    year, month, day, hour, minute = (int(part) if part else None for part in match.groups())
+    try:
+        if day is None:
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+        elif hour is None:
+            start = datetime(year, month, day)
+            end = start + timedelta(days=1)
+        elif minute is None:
+            start = datetime(year, month, day, hour)
+            end = start + timedelta(hours=1)
+        else:
+            start = datetime(year, month, day, hour, minute)
+            end = start + timedelta(minutes=1)
+    except ValueError:
+        return None
+    return start, end
+
+
+def search_filter(term):
+    """
+    Q para el filtro de los listados. El texto va contra search_document (índice
+    de trigramas); un número también busca por id exacto y un prefijo de fecha por
+    rango de date_creation, ambos por índice. Un término sin letras ni números no
+    coincide con ninguna PQR.
+    """
+    term = (term or "").strip()
+    if not term:
+        return Q()
+    normalized = normalize_search(term)
+    # contains y no icontains: el documento ya está en minúsculas y UPPER() sobre
+    # la columna impediría usar el índice. Un término sólo de puntuación ("-")
+    # queda vacío y contains "" coincidiría con todo: no busca en el texto
+    condition = Q(search_document__contains=normalized) if normalized else Q(pk__in=[])
+    if term.isdigit() and len(term) < 19:
+        condition |= Q(id=int(term))
+    span = _date_span(term)
+    if span:
+        condition |= Q(date_creation__gte=span[0], date_creation__lt=span[1])
+    return condition
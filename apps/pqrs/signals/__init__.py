@@ -1 +1,3 @@
-from .creation import *
\ No newline at end of file
+from .creation import *
+from .search import *
+from .counts import *
@@ -0,0 +1,8 @@
+from apps.core.counts import track_list_counts
+
+from ..models import PqrActive, PqrClosed
+
+
+# Conteos por estado de los listados de PQRs
+track_list_counts(PqrActive)
+track_list_counts(PqrClosed)
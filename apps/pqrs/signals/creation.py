@@ -4,7 +4,8 @@ from django.db.models import signals
 
 from django.urls import reverse
 from django.apps import apps
-from ..models import PqrActive, PqrActiveRoute, FileNumber
+from ..models import PqrActive, PqrActiveRoute
+from ..file_numbers import next_file_number
 from config.settings import DOMAIN
 
 from apps.utils.send_mails import GenericSendMail
@@ -12,7 +13,7 @@ from apps.utils.send_mails import GenericSendMail
 @receiver(signals.pre_save, sender = PqrActive)
 def create_pqr_file_number(sender, instance, **kwargs):
     if instance._state.adding and not instance.file_number:
-        instance.file_number = FileNumber.objects.create().value
+        instance.file_number = next_file_number()
 
 @receiver(signals.post_save, sender = PqrActive)
 def send_email_pqr_creation(sender, instance, created, **kwargs):
@@ -0,0 +1,52 @@
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import signals
+
+from apps.infrastructure.models import Comuna, District, Node
+from apps.infrastructure.reassignment import locations_imported, nodes_reassigned
+from ..models import GeneralTypeDamage, Origin, PqrActive, PqrClosed
+from ..search import SearchDocumentBuilder, refresh_search_documents
+
+
+@receiver(signals.pre_save, sender=PqrActive)
+@receiver(signals.pre_save, sender=PqrClosed)
+def build_pqr_search_document(sender, instance, **kwargs):
+    # Corre después de create_pqr_file_number (creation.py se conecta primero)
+    instance.search_document = SearchDocumentBuilder()(instance)
+
+
+# Campo de la PQR por el que se llega a cada dato relacionado del documento
+RELATED_LOOKUPS = {
+    GeneralTypeDamage: 'fk_type_damage',
+    Origin: 'fk_origin',
+    Node: 'fk_node_reported',
+    District: 'fk_node_reported__fk_district',
+    Comuna: 'fk_node_reported__fk_district__fk_comuna',
+}
+
+
+@receiver(signals.post_save, sender=GeneralTypeDamage)
+@receiver(signals.post_save, sender=Origin)
+@receiver(signals.post_save, sender=Node)
+@receiver(signals.post_save, sender=District)
+@receiver(signals.post_save, sender=Comuna)
+def refresh_related_search_documents(sender, instance, created, **kwargs):
+    # Una instancia nueva no tiene PQRs; en las demás sólo se reescriben los
+    # documentos que efectivamente cambian
+    if created:
+        return
+    filters = {RELATED_LOOKUPS[sender]: instance.pk}
+    transaction.on_commit(lambda: refresh_search_documents(**filters))
+
+
+@receiver(nodes_reassigned)
+def refresh_reassigned_search_documents(sender, node_ids, **kwargs):
+    for i in range(0, len(node_ids), 1000):
+        refresh_search_documents(fk_node_reported__in=node_ids[i:i + 1000])
+
+
+@receiver(locations_imported)
+def refresh_imported_location_search_documents(sender, ids, **kwargs):
+    lookup = RELATED_LOOKUPS[sender]
+    for i in range(0, len(ids), 1000):
+        refresh_search_documents(**{f'{lookup}__in': ids[i:i + 1000]})
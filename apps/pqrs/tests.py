@@ -1,3 +1,114 @@
-from django.test import TestCase
+import threading
+from datetime import datetime
+from unittest import skipUnless
 
-# Create your tests here.
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.pqrs.file_numbers import next_file_number, reserve_file_numbers
+from apps.pqrs.models import FileNumberSequence, GeneralTypeDamage, PqrActive
+from apps.pqrs.search import normalize_search, refresh_search_documents, search_filter
+
+
+@override_settings(FILE_NUMBER_BLOCK_SIZE=1)
+class FileNumberTests(TransactionTestCase):
+    # En PostgreSQL el UPDATE de la secuencia va por su propio alias
+    databases = {"default", "file_numbers"}
+
+    def test_numbers_are_consecutive_within_a_year(self):
+        self.assertEqual(reserve_file_numbers(1, 2031), 31000001)
+        self.assertEqual(reserve_file_numbers(1, 2031), 31000002)
+        # Un bloque devuelve su último radicado
+        self.assertEqual(reserve_file_numbers(3, 2031), 31000005)
+        self.assertEqual(FileNumberSequence.objects.get(year=2031).last_value, 31000005)
+
+    def test_each_year_has_its_own_sequence(self):
+        self.assertEqual(reserve_file_numbers(1, 2031), 31000001)
+        self.assertEqual(reserve_file_numbers(1, 2032), 32000001)
+        self.assertEqual(reserve_file_numbers(1, 2031), 31000002)
+
+    def test_first_number_of_a_year_follows_existing_pqrs(self):
+        damage = GeneralTypeDamage.objects.create(name="Luminaria apagada")
+        PqrActive.objects.create(
+            fk_type_damage=damage, name="ana perez", observation="Sin luz", file_number=31000041, status=0
+        )
+        self.assertEqual(reserve_file_numbers(1, 2031), 31000042)
+
+    def test_next_file_number_uses_the_given_date(self):
+        self.assertEqual(next_file_number(datetime(2031, 3, 1)), 31000001)
+        self.assertEqual(next_file_number(datetime(2031, 12, 31)), 31000002)
+
+    @skipUnless(connection.vendor == "postgresql", "Asignación concurrente sólo en PostgreSQL")
+    def test_concurrent_allocation_hands_out_distinct_numbers(self):
+        threads, per_thread = 8, 25
+        barrier = threading.Barrier(threads)
+        numbers, errors = [], []
+        lock = threading.Lock()
+
+        def allocate():
+            try:
+                barrier.wait()
+                values = [reserve_file_numbers(1, 2031) for _ in range(per_thread)]
+                with lock:
+                    numbers.extend(values)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=allocate) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(numbers), list(range(31000001, 31000001 + threads * per_thread)))
+
+
+class SearchDocumentTests(TestCase):
+    # Crear una PQR asigna su radicado (alias propio en PostgreSQL)
+    databases = {"default", "file_numbers"}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.damage = GeneralTypeDamage.objects.create(name="Luminaria Apagada")
+        cls.pqr = PqrActive.objects.create(
+            fk_type_damage=cls.damage, name="josé pérez", observation="Sin luz", status=0
+        )
+        cls.other = PqrActive.objects.create(
+            fk_type_damage=GeneralTypeDamage.objects.create(name="Poste caído"),
+            name="ana gomez", observation="Poste en la vía", status=0,
+        )
+
+    def _search(self, term):
+        return sorted(PqrActive.objects.filter(search_filter(term)).values_list("id", flat=True))
+
+    def test_normalize_search(self):
+        self.assertEqual(normalize_search("  Calle 5 #40-12, Pérez "), "calle 5 40 12 perez")
+        self.assertEqual(normalize_search(None), "")
+
+    def test_document_is_built_on_save(self):
+        self.pqr.refresh_from_db()
+        self.assertEqual(self.pqr.search_document, f"{self.pqr.file_number} | jose perez | luminaria apagada")
+
+    def test_filter_matches_the_document_without_accents(self):
+        self.assertEqual(self._search("PÉREZ"), [self.pqr.pk])
+        self.assertEqual(self._search("luminaria apag"), [self.pqr.pk])
+        self.assertEqual(self._search(str(self.other.file_number)), [self.other.pk])
+        self.assertEqual(self._search("perez | luminaria"), [])
+
+    def test_punctuation_only_terms_match_nothing(self):
+        for term in ("-", "#", " . "):
+            self.assertEqual(self._search(term), [], term)
+        self.assertEqual(self._search(""), [self.pqr.pk, self.other.pk])
+
+    def test_number_also_matches_the_id(self):
+        self.assertIn(self.other.pk, self._search(str(self.other.pk)))
+
+    def test_renamed_damage_refreshes_the_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.damage.name = "Luminaria intermitente"
+            self.damage.save()
+        self.assertEqual(self._search("intermitente"), [self.pqr.pk])
+        self.assertEqual(refresh_search_documents(), 0)
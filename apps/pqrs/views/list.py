@@ -14,7 +14,10 @@ from django.core.exceptions import ValidationError
 # local Django
 from config.settings import *
 from ..models import *
+from apps.core.counts import list_count
+from apps.core.paging import paginate
 from apps.mixins import ValidatePermissionRequiredMixin
+from ..search import search_filter
 
 
 MODULE_NAME = 'PQRs'
@@ -75,32 +78,30 @@ class PqrStateBaseListView(LoginRequiredMixin, ValidatePermissionRequiredMixin,
         search_term = request.POST.get('filtro', '').strip()
         
         queryset = self.model.objects.filter(
-            Q(status=status) & (
-                Q(id__icontains=search_term) |
-                Q(date_creation__icontains=search_term) |
-                Q(file_number__icontains=search_term) |
-                Q(fk_type_damage__name__icontains=search_term) |
-                Q(fk_node_reported__painting_code__icontains=search_term) |
-                Q(fk_node_reported__fk_district__fk_comuna__name__icontains=search_term) |
-                Q(fk_node_reported__fk_district__name__icontains=search_term) |
-                Q(fk_origin__name__icontains=search_term) |
-                Q(name__icontains=search_term)
-            )
+            Q(status=status) & search_filter(search_term)
         ).values(*self.fields_to_select).order_by(order_by)
+        self.count_status = status
         return queryset
     
+    def get_length(self, request, queryset):
+        # COUNT exacto sólo al buscar; sin filtro, el conteo por estado (apps.core.counts)
+        if self.count_status is None or request.POST.get('filtro', '').strip():
+            return queryset.count()
+        return list_count(self.model, self.count_status)
+
     def get_data(self, request, queryset):
-        inicio = int(request.POST.get('inicio', 0))
-        fin = int(request.POST.get('limite', 50))
+        rows, next_cursor, prev_cursor = paginate(queryset, request.POST)
 
         list_data = [
             {**valor, 'date_creation': valor['date_creation'].strftime('%Y-%m-%d %H:%M:%S')} 
-            for valor in queryset[inicio:inicio+fin]
+            for valor in rows
         ]
 
         self.data = {
             "type": 'success',
-            "length": queryset.count(),
+            "length": self.get_length(request, queryset),
+            "next": next_cursor,
+            "prev": prev_cursor,
             "objects": list_data
         }
         return self.data
@@ -173,18 +174,10 @@ class PqrReviewListView(PqrStateBaseListView):
         # Consulta con filtros combinados
         queryset = self.model.objects.filter(
             Q(status=status) & 
-            Q(orderactive__isnull=not with_order) & (
-                Q(id__icontains=search_term) |
-                Q(date_creation__icontains=search_term) |
-                Q(file_number__icontains=search_term) |
-                Q(fk_type_damage__name__icontains=search_term) |
-                Q(fk_node_reported__painting_code__icontains=search_term) |
-                Q(fk_node_reported__fk_district__fk_comuna__name__icontains=search_term) |
-                Q(fk_node_reported__fk_district__name__icontains=search_term) |
-                Q(fk_origin__name__icontains=search_term) |
-                Q(name__icontains=search_term)
-            )
+            Q(orderactive__isnull=not with_order) & search_filter(search_term)
         ).values(*self.fields_to_select).order_by(order_by).distinct()    
+        # El filtro por órdenes no tiene contador: siempre conteo exacto
+        self.count_status = None
         return queryset
     
     def get_context_data(self, **kwargs):
@@ -236,19 +229,9 @@ class PqrAtendedListView(PqrStateBaseListView):
         search_term = request.POST.get('filtro', '').strip()
         
         queryset = self.model.objects.filter(
-            Q(status=status) & (
-                Q(id__icontains=search_term) |
-                Q(date_creation__icontains=search_term) |
-                Q(file_number__icontains=search_term) |
-                Q(fk_type_damage__name__icontains=search_term) |
-                Q(fk_node_reported__painting_code__icontains=search_term) |
-                Q(fk_node_reported__fk_district__fk_comuna__name__icontains=search_term) |
-                Q(fk_node_reported__fk_district__name__icontains=search_term) |
-                Q(fk_origin__name__icontains=search_term) |
-                Q(name__icontains=search_term)
-            )
+            Q(status=status) & search_filter(search_term)
         ).values(*self.fields_to_select).order_by(order_by)
-        
+        self.count_status = status
         return queryset
     
     def get_context_data(self, **kwargs):
@@ -21,7 +21,7 @@ from ..models import PqrActive, CauseRejectPqr
 
 class PqrRejectAPI(LoginRequiredMixin, APIPermissionValidation, View):
     """
-    Anula una PQR: cambia estado a 0, envía email, anula órdenes asociadas y mueve a PqrClosed.
+    Anula una PQR: cambia estado a 0, anula órdenes asociadas, mueve todo a las tablas de cerradas y envía email.
 
     Permisos: pqrs.change_pqractive
     Métodos HTTP: GET (lista causas) | POST (pqr=<id>, cause=<id>)
@@ -68,7 +68,6 @@ class PqrRejectAPI(LoginRequiredMixin, APIPermissionValidation, View):
         pqr_handler.validate_status(0, params['user'])
         pqr_handler.change_status(0)
         pqr_handler.create_route(2, params['cause'])
-        pqr_handler.move_to_close()
 
         # Anular órdenes asociadas si existen
         try:
@@ -81,10 +80,12 @@ class PqrRejectAPI(LoginRequiredMixin, APIPermissionValidation, View):
                 order_handler.validate_status(0, params['user'])
                 order_handler.change_status(0)
                 order_handler.create_route(params['user'], init_state)
-                order_handler.move_to_close()
         except (ImportError, AttributeError):
             pass
 
+        # Mueve la PQR, sus rutas y sus órdenes a las tablas de cerradas
+        pqr_handler.move_to_close(params['user'])
+
         self.send_email_annulment(params['pqr'], params['cause'])
         return {'type': 'success', 'msg': f'Se ha anulado la PQR #{params["pqr"].file_number} correctamente.'}
 
@@ -141,10 +142,6 @@ class PqrRejectAPI(LoginRequiredMixin, APIPermissionValidation, View):
             }
             # Anulación de PQR
             data = self.pqr_annulment(**params)
-
-            # Eliminación de PQR activa e históricos
-            params['pqr'].pqractiveroute_set.all().delete()
-            params['pqr'].delete()
         except Exception as e:
             data = {'type': 'error', 'msg': str(e)}
         data['time'] = str(time.time() - start_time)
@@ -12,7 +12,7 @@ from django.views.generic import View
 
 # local Django
 from apps.mixins import APIPermissionValidation
-from ..models import PqrActive, PqrActiveRoute, PqrClosed, PqrClosedRoute
+from ..models import PqrActive, PqrActiveRoute
 
 
 class PqrStatusChangeHandler:
@@ -94,31 +94,13 @@ class PqrStatusChangeHandler:
             new_route.output_date = datetime.now()
         new_route.save()
 
-    @transaction.atomic
-    def move_to_close(self):
+    def move_to_close(self, user=None):
         """
-        Copia un PqrActive con sus PqrActiveRoute a un PqrClosed con sus PqrClosedRoute.
+        Mueve la PQR a PqrClosed con sus rutas y sus órdenes activas (ver apps.order.archive).
         """
-        pqr_closed = PqrClosed(id=self.instance.id)
-
-        for field in self.instance._meta.fields:
-            if field.name != 'id':
-                setattr(pqr_closed, field.name, getattr(self.instance, field.name))
-        pqr_closed.save()
-
-        history_active = PqrActiveRoute.objects.filter(fk_pqr=self.instance)
-
-        for route in history_active:
-            history_closed = PqrClosedRoute(
-                id=route.id,
-                input_date=route.input_date,
-                output_date=route.output_date if route.output_date is not None else None,
-                fk_pqr=pqr_closed,
-                state=route.state,
-                cause=route.cause
-            )
-            history_closed.save()
-        return pqr_closed
+        from apps.order.archive import archive_pqrs
+
+        archive_pqrs([self.instance.pk], user)
 
 
 class PqrStatusChangeAPI(LoginRequiredMixin, APIPermissionValidation, View):
@@ -8,3 +8,13 @@ def csv_to_dict(csv_file_path):
         reader = csv.DictReader(csv_file)
         data = list(reader)
     return data
+
+def csv_iter_rows(csv_file_path, encoding='utf-8-sig'):
+    """
+    Recorre un archivo CSV fila por fila sin cargarlo completo en memoria.
+    Devuelve tuplas (número de línea, fila como diccionario).
+    """
+    with open(csv_file_path, 'r', encoding=encoding, newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        for row in reader:
+            yield reader.line_num, row
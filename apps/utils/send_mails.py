@@ -1,39 +1,22 @@
-# standard library
-import os
-import environ
-from pathlib import Path
-
 # Django
-from django.template.loader import render_to_string
+from django.db import transaction
 
-# Resend
-import resend
-from resend import Emails
+# local Django
+from apps.core.mail import queue_email
 
 def GenericSendMail(params):
     """
-    Metodo genérico para envío de correos usando Resend
+    Metodo genérico para envío de correos: lo deja en la cola (apps.core.mail) dentro
+    de la transacción en curso; el envío por Resend ocurre al confirmarla.
     """
+    data = {}
     try:
-        data = {}
-        BASE_DIR = Path(__file__).resolve().parent.parent
-
-        env = environ.Env()
-        environ.Env.read_env(os.path.join(BASE_DIR, ".env"))
-
-        resend.api_key = env("RESEND_API_KEY")
-
-        email_data = {
-            "from": env("EMAIL_HOST_USER"),  # ej: "Mi App <onboarding@resend.dev>"
-            "to": [params["email_to"]],
-            "subject": params["subject"],
-            "html": render_to_string(params["html"], params),
-        }
-
-        Emails.send(email_data)  # ✔ correcto para la versión 2.x
+        # Punto de guardado: un fallo al encolar no invalida la transacción de la petición
+        with transaction.atomic():
+            queue_email(params["email_to"], params["subject"], params["html"], params)
 
         data["type"] = "success"
-        data["msg"] = "Envio de correo exitoso"
+        data["msg"] = "Correo en cola de envío"
 
     except Exception as e:
         data["error"] = str(e)
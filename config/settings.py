@@ -85,6 +85,15 @@ DATABASES = {
     'default': env.db('DATABASE_URL')
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
+# Conexión propia en autocommit para los radicados de PQR (apps.pqrs.file_numbers):
+# el UPDATE de la secuencia no queda dentro de la transacción de la petición. Django
+# la cierra al terminar cada petición; los hilos propios llaman connections.close_all()
+FILE_NUMBER_DB_ALIAS = 'file_numbers'
+DATABASES[FILE_NUMBER_DB_ALIAS] = {
+    **DATABASES['default'],
+    'ATOMIC_REQUESTS': False,
+    'TEST': {'MIRROR': 'default'},
+}
 
 
 # Password validation
@@ -154,4 +163,70 @@ SESSION_SAVE_EVERY_REQUEST = True
 DOMAIN = env('DOMAIN')
 
 GOOGLE_MAPS_API_KEY = env('GOOGLE_MAPS_API_KEY')
-GOOGLE_MAPS_MAP_ID = env('GOOGLE_MAPS_MAP_ID', default='')
\ No newline at end of file
+GOOGLE_MAPS_MAP_ID = env('GOOGLE_MAPS_MAP_ID', default='')
+
+# Mapa de nodos: por debajo de este zoom NodeSearchInArea devuelve celdas agregadas
+NODE_CLUSTER_MAX_ZOOM = env.int('NODE_CLUSTER_MAX_ZOOM', default=15)
+
+# Vector tiles de Nodos (caché en disco por zoom)
+NODE_TILES_MIN_ZOOM = env.int('NODE_TILES_MIN_ZOOM', default=12)
+NODE_TILES_MAX_ZOOM = env.int('NODE_TILES_MAX_ZOOM', default=20)
+NODE_TILES_CACHE_DIR = env('NODE_TILES_CACHE_DIR', default=os.path.join(BASE_DIR, 'cache', 'tiles', 'nodes'))
+
+# Índice en memoria de barrios: cada cuántos segundos se verifica si otro proceso los modificó
+DISTRICT_INDEX_CHECK_SECONDS = env.int('DISTRICT_INDEX_CHECK_SECONDS', default=30)
+
+# Detección de nodos duplicados: distancia máxima (metros) entre dos nodos para considerarlos el mismo
+NODE_DUPLICATE_RADIUS = env.float('NODE_DUPLICATE_RADIUS', default=3.0)
+
+# Carga por transformador: segundos que se conserva en caché el resultado de cada trafo
+TRAFO_LOAD_CACHE_SECONDS = env.int('TRAFO_LOAD_CACHE_SECONDS', default=86400)
+
+# Caché compartida entre procesos (las invalidaciones de un worker o de un comando deben verla
+# todos): tabla django_cache por defecto, o p. ej. CACHE_URL=redis://host:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://django_cache'),
+    # Carga por transformador: una entrada por trafo, en su propia caché para que no
+    # desplace a las demás (tokens de recuperación de contraseña en default)
+    'trafo_loads': env.cache('TRAFO_LOAD_CACHE_URL', default='dbcache://trafo_load_cache'),
+}
+CACHES['trafo_loads'].setdefault('OPTIONS', {}).setdefault(
+    'MAX_ENTRIES', env.int('TRAFO_LOAD_CACHE_MAX_ENTRIES', default=100000)
+)
+
+# Grafo de la red en memoria: cada cuántos segundos se verifica si otro proceso modificó los tramos
+NET_GRAPH_CHECK_SECONDS = env.int('NET_GRAPH_CHECK_SECONDS', default=30)
+
+# Índice en memoria de códigos pintados: cada cuántos segundos se verifica si otro proceso modificó los nodos
+# y si cada worker web lo construye al arrancar (config/wsgi.py) en lugar de en la primera consulta
+NODE_CODE_INDEX_CHECK_SECONDS = env.int('NODE_CODE_INDEX_CHECK_SECONDS', default=30)
+NODE_CODE_INDEX_WARM_UP = env.bool('NODE_CODE_INDEX_WARM_UP', default=True)
+
+# Importaciones del admin en segundo plano: filas por bloque, hilos para la simulación,
+# si se procesan en un hilo del propio proceso web (por defecto no: comando run_import_jobs)
+# y segundos sin avance tras los que un trabajo en Procesando se da por interrumpido
+IMPORT_JOB_CHUNK_SIZE = env.int('IMPORT_JOB_CHUNK_SIZE', default=1000)
+IMPORT_JOB_WORKERS = env.int('IMPORT_JOB_WORKERS', default=4)
+IMPORT_JOBS_IN_PROCESS = env.bool('IMPORT_JOBS_IN_PROCESS', default=False)
+IMPORT_JOB_LEASE_SECONDS = env.int('IMPORT_JOB_LEASE_SECONDS', default=900)
+
+# Caché de geometrías de comunas y barrios: cada cuántos segundos se verifica si otro proceso las modificó
+GEOMETRY_CACHE_CHECK_SECONDS = env.int('GEOMETRY_CACHE_CHECK_SECONDS', default=30)
+
+# Geometrías simplificadas de comunas y barrios: zoom máximo de cada banda (por encima de la última se sirve el original)
+BOUNDARY_ZOOM_BANDS = env.list('BOUNDARY_ZOOM_BANDS', cast=int, default=[10, 12, 14])
+
+# Radicados de PQR: cuántos reserva cada proceso por vez (1: uno por PQR, en orden estricto)
+FILE_NUMBER_BLOCK_SIZE = env.int('FILE_NUMBER_BLOCK_SIZE', default=1)
+
+# Correos: credenciales de Resend, transporte (LocmemTransport para pruebas) y cola de envío
+# (si se envía en un hilo al confirmar la transacción en lugar del servicio mail_worker,
+# lote del comando send_queued_emails, intentos y espera base entre reintentos en segundos,
+# que se duplica en cada fallo)
+RESEND_API_KEY = env('RESEND_API_KEY', default='')
+EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
+MAIL_TRANSPORT = env('MAIL_TRANSPORT', default='apps.core.mail.ResendTransport')
+MAIL_OUTBOX_IN_PROCESS = env.bool('MAIL_OUTBOX_IN_PROCESS', default=False)
+MAIL_OUTBOX_BATCH_SIZE = env.int('MAIL_OUTBOX_BATCH_SIZE', default=50)
+MAIL_OUTBOX_MAX_ATTEMPTS = env.int('MAIL_OUTBOX_MAX_ATTEMPTS', default=6)
+MAIL_OUTBOX_RETRY_SECONDS = env.int('MAIL_OUTBOX_RETRY_SECONDS', default=60)
@@ -8,9 +8,18 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
 
 import os
+import threading
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Índice de códigos pintados: se construye al arrancar cada worker, en segundo plano,
+# y no en AppConfig.ready(), que también corre en migrate y en los comandos
+if settings.NODE_CODE_INDEX_WARM_UP:
+    from apps.infrastructure.search import painting_code_index
+
+    threading.Thread(target=painting_code_index.warm_up, daemon=True).start()
@@ -349,7 +349,7 @@ async function searchingByAddress(val_ads) {
             try {
                 showLoader();
                 
-                const response = await fetch(`${window.location.origin}/infrastructure/searchNodesInArea/?lat=${results[0].geometry.location.lat()}&lng=${results[0].geometry.location.lng()}`);
+                const response = await fetch(`${window.location.origin}/infrastructure/api/nodes/nearest/?lat=${results[0].geometry.location.lat()}&lng=${results[0].geometry.location.lng()}&k=10`);
                 const data = await response.text();
                 
                 hideLoader();
@@ -359,26 +359,26 @@ async function searchingByAddress(val_ads) {
                 // Se eliminan todos los marcadores del mapa
                 assignMarkers(markersArray, null);
                 
-                // Pasa la respuesta de string a json
-                nodes = JSON.parse(data).features;
+                // Pasa la respuesta de string a json (los k nodos más cercanos)
+                nodes = JSON.parse(data).data || [];
 
                 // Ciclo para recorrer todos los resultados y pintarlos en el mapa
                 nodes.forEach((node) => {
                     // Crea el marcador para el nodo
                     let node_marker = new google.maps.Marker({
                         position: {
-                            lat: node.geometry.coordinates[1],
-                            lng: node.geometry.coordinates[0],
+                            lat: node.lat,
+                            lng: node.lng,
                         },
                         map,
                         label: {
-                            text: node.properties.painting_code.toString(),
+                            text: node.painting_code.toString(),
                             color: "white",
                             fontSize: "10px",
                             fontWeight: "bold",
                             className: "node-painting-code",
                         },
-                        title: "Marcador " + node.properties.painting_code,
+                        title: "Marcador " + node.painting_code,
                         icon: "/static/img/markers/node.png",
                     });
                     // Crea el infowindow asociado al marcador
@@ -387,19 +387,19 @@ async function searchingByAddress(val_ads) {
                         `<table class='table'>
                             <tr>
                                 <td><b>Código del poste:</b></td>
-                                <td> ${node.properties.painting_code}</td> 
+                                <td> ${node.painting_code}</td> 
                             </tr>
                             <tr>
                                 <td><b>Zona:</b></td>
-                                <td> ${node.properties.fk_comuna__name}</td> 
+                                <td> ${node.comuna}</td> 
                             </tr>
                             <tr>
                                 <td><b>Barrio:</b></td>
-                                <td> ${node.properties.name}</td> 
+                                <td> ${node.district}</td> 
                             </tr>
                         </table>
                         <div class="text-center">
-                            <a id="selectNodeToReport" class='btn btn-outline-danger btn-sm' onclick='selectNode(${node.properties.pk}, ${node.properties.painting_code});'>Seleccionar poste</a>
+                            <a id="selectNodeToReport" class='btn btn-outline-danger btn-sm' onclick='selectNode(${node.pk}, ${node.painting_code});'>Seleccionar poste</a>
                         </div>`,
                     });
 